@@ -1,10 +1,12 @@
 from discord.ext import commands
 import discord
 from discord import app_commands
-import random
 from services.quest import EconomyService
+from services.name_resolver import NameResolver
+from services.metrics import InstrumentedModal, InstrumentedView, query_budget
+from services.rng import game_rng
 
-class CustomInputModal(discord.ui.Modal, title="게임 설정 직접 입력"):
+class CustomInputModal(InstrumentedModal, title="게임 설정 직접 입력"):
     amount = discord.ui.TextInput(label="배팅 금액", placeholder="예: 5000 (최소 1,000)", min_length=1)
     probability = discord.ui.TextInput(label="성공 확률 (%)", placeholder="예: 50 (1 ~ 75)", min_length=1, max_length=2)
 
@@ -35,7 +37,7 @@ class CustomInputModal(discord.ui.Modal, title="게임 설정 직접 입력"):
         self.view.update_embed_data()
         await interaction.response.edit_message(embed=self.view.get_embed(), view=self.view)
 
-class GambleView(discord.ui.View):
+class GambleView(InstrumentedView):
     def __init__(self, user_id, economy: EconomyService, amount, probability):
         super().__init__(timeout=60)
         self.user_id = user_id
@@ -46,6 +48,8 @@ class GambleView(discord.ui.View):
         self.current_pot = amount
         self.game_over = False
         self.started = False
+        self.settling = False
+        self.timed_out = False
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         if interaction.user.id != self.user_id:
@@ -54,32 +58,57 @@ class GambleView(discord.ui.View):
         return True
 
     async def on_timeout(self):
-        if self.started and not self.game_over and self.current_pot > 0:
-            await self.economy.add_balance(self.user_id, self.current_pot)
-            await self.economy.record_payout(self.user_id, self.current_pot)
+        if self.game_over or not self.started:
+            return
+        if self.settling:
+            # 정산 중인 판의 결과 금액은 run_round 가 판이 끝난 뒤 지급
+            self.timed_out = True
+            return
+        if self.current_pot > 0:
+            self.game_over = True
+            await self.economy.cash_out(self.user_id, self.current_pot)
 
     @discord.ui.button(label="🎲 게임 시작", style=discord.ButtonStyle.green)
+    @query_budget(15)
     async def start_game(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.started:
+            await interaction.response.defer()
+            return
         self.clear_items()
         self.started = True
-        
-        if not await self.economy.remove_balance(self.user_id, self.bet_amount):
+        await self.run_round(interaction, bet=self.bet_amount)
+
+    async def run_round(self, interaction: discord.Interaction, bet: int = 0):
+        # 배팅 차감부터 결과 반영까지 한 번의 트랜잭션으로 처리
+        self.settling = True
+        try:
+            result = await self.economy.play_round(self.user_id, self.probability, self.multiplier, self.current_pot, bet=bet)
+        finally:
+            self.settling = False
+
+        if not result["ok"]:
+            self.game_over = True
             await interaction.response.edit_message(content="잔액이 부족합니다!", view=None, embed=None)
             self.stop()
             return
 
-        await self.run_round(interaction)
-
-    async def run_round(self, interaction: discord.Interaction):
-        roll = random.random()
-        success = roll < self.probability
+        success = result["won"]
+        notifications = result["notifications"]
         
         embed = discord.Embed(title="🎲 게임 결과", color=discord.Color.gold() if success else discord.Color.red())
         
         if success:
-            self.current_pot = int(self.current_pot * self.multiplier)
-            notifications = await self.economy.record_game_result(self.user_id, True, self.current_pot, self.probability)
+            self.current_pot = result["pot"]
             
+            if self.timed_out:
+                # 정산하는 동안 시간이 다 되어 버튼을 더 누를 수 없으므로 바로 지급
+                self.game_over = True
+                notifications = notifications + await self.economy.cash_out(self.user_id, self.current_pot)
+                note_text = "\n".join(notifications) if notifications else ""
+                embed.description = f"**성공!** 🎉\n\n시간이 다 되어 **{self.current_pot:,}원**을 자동으로 수령했습니다.\n\n{note_text}"
+                await interaction.response.edit_message(embed=embed, view=None)
+                return
+
             note_text = "\n".join(notifications) if notifications else ""
             embed.description = f"**성공!** 🎉\n\n현재 누적 금액: **{self.current_pot:,}원**\n(배율: {self.multiplier}x / 확률: {int(self.probability*100)}%)\n\n{note_text}"
             
@@ -94,7 +123,6 @@ class GambleView(discord.ui.View):
             
             await interaction.response.edit_message(embed=embed, view=self)
         else:
-            notifications = await self.economy.record_game_result(self.user_id, False, 0, self.probability)
             note_text = "\n".join(notifications) if notifications else ""
             
             self.current_pot = 0
@@ -104,16 +132,24 @@ class GambleView(discord.ui.View):
             await interaction.response.edit_message(embed=embed, view=None)
             
             # 5% 확률로 돌발 퀘스트 발생
-            if random.random() < 0.05:
+            if game_rng.stream("quest_trigger", self.user_id).random() < 0.05:
                 await self.trigger_random_quest(interaction)
 
+    @query_budget(10)
     async def continue_game(self, interaction: discord.Interaction):
+        # 정산 중이거나 이미 끝난 게임에 대한 중복 클릭은 무시
+        if self.game_over or self.settling:
+            await interaction.response.defer()
+            return
         await self.run_round(interaction)
 
+    @query_budget(8)
     async def stop_game(self, interaction: discord.Interaction):
+        if self.game_over or self.settling:
+            await interaction.response.defer()
+            return
         self.game_over = True
-        await self.economy.add_balance(self.user_id, self.current_pot)
-        notifications = await self.economy.record_payout(self.user_id, self.current_pot)
+        notifications = await self.economy.cash_out(self.user_id, self.current_pot)
         
         note_text = "\n" + "\n".join(notifications) if notifications else ""
         embed = discord.Embed(title="💰 게임 종료", description=f"**{self.current_pot:,}원**을 획득했습니다!{note_text}", color=discord.Color.green())
@@ -125,15 +161,17 @@ class GambleView(discord.ui.View):
         if not quest:
             return
 
-        embed = discord.Embed(title="📜 돌발 퀘스트 발생!", description=f"**{quest['target']}연승 도전**\n성공 시: +{quest['reward']:,}원\n실패 시: -{quest['penalty']:,}원\n\n수락하시겠습니까?", color=discord.Color.purple())
-        view = QuestView(self.user_id, self.economy)
+        penalty_text = f"\n실패 시: -{quest['penalty']:,}원" if quest["penalty"] else ""
+        embed = discord.Embed(title="📜 돌발 퀘스트 발생!", description=f"**{quest['name']}**\n성공 시: +{quest['reward']:,}원{penalty_text}\n\n수락하시겠습니까?", color=discord.Color.purple())
+        view = QuestView(self.user_id, self.economy, quest["type"])
         await interaction.followup.send(embed=embed, view=view, ephemeral=True)
 
-class QuestView(discord.ui.View):
-    def __init__(self, user_id, economy):
+class QuestView(InstrumentedView):
+    def __init__(self, user_id, economy, quest_type):
         super().__init__(timeout=60)
         self.user_id = user_id
         self.economy = economy
+        self.quest_type = quest_type
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         if interaction.user.id != self.user_id:
@@ -147,10 +185,10 @@ class QuestView(discord.ui.View):
 
     @discord.ui.button(label="거절", style=discord.ButtonStyle.danger)
     async def decline(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.economy.cancel_quest(self.user_id)
+        await self.economy.cancel_quest(self.user_id, self.quest_type)
         await interaction.response.edit_message(content="퀘스트를 거절했습니다.", view=None, embed=None)
 
-class SettingsView(discord.ui.View):
+class SettingsView(InstrumentedView):
     def __init__(self, user_id, economy, current_balance):
         super().__init__(timeout=180)
         self.user_id = user_id
@@ -220,16 +258,23 @@ class Game(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.economy = EconomyService.get_instance()
+        self.names = NameResolver.get_instance(bot)
+
+    async def cog_unload(self):
+        # 종료 전 캐시에 남아 있는 유저 상태와 잔고 기록을 DB에 반영
+        await self.economy.close()
 
     # Create a group for game commands
     game_group = app_commands.Group(name="도박", description="도박 관련 명령어 모음")
 
     @app_commands.command(name="잔액", description="자신의 현재 잔액을 확인합니다.")
+    @query_budget(2)
     async def balance(self, interaction: discord.Interaction):
         bal = await self.economy.get_balance(interaction.user.id)
         await interaction.response.send_message(f"💰 {interaction.user.mention}님의 잔액: **{bal:,}원**")
 
     @app_commands.command(name="지원금", description="10분마다 지원금 5,000원을 받습니다.")
+    @query_budget(10)
     async def give(self, interaction: discord.Interaction):
         success, remaining = await self.economy.claim_reward(interaction.user.id)
         
@@ -241,6 +286,7 @@ class Game(commands.Cog):
             await interaction.response.send_message(f"⏳ 아직 지원금을 받을 수 없습니다! (**{minutes}분 {seconds}초** 남음)", ephemeral=True)
 
     @app_commands.command(name="출석", description="일일 출석 체크를 하고 100,000원을 받습니다.")
+    @query_budget(12)
     async def attendance(self, interaction: discord.Interaction):
         success, message, reward, streak = await self.economy.attend(interaction.user.id)
         
@@ -259,6 +305,7 @@ class Game(commands.Cog):
             await interaction.response.send_message(f"❌ {message}", ephemeral=True)
 
     @game_group.command(name="랭킹", description="도박 총 획득 금액 랭킹 TOP 10을 확인합니다.")
+    @query_budget(10)
     async def leaderboard(self, interaction: discord.Interaction):
         rankings = await self.economy.get_leaderboard()
         embed = discord.Embed(title="🏆 도박 총 획득 금액 랭킹 TOP 10", color=discord.Color.gold())
@@ -266,16 +313,15 @@ class Game(commands.Cog):
         if not rankings:
             embed.description = "아직 랭크된 유저가 없습니다."
         else:
+            names = await self.names.resolve((uid for uid, _ in rankings), interaction.guild)
             for idx, (uid, amount) in enumerate(rankings, 1):
-                try:
-                    user = await self.bot.fetch_user(int(uid))
-                    name = user.name
-                except Exception:
-                    name = "Unknown"
+                name = names[int(uid)]
                 
                 medal = "🥇" if idx == 1 else "🥈" if idx == 2 else "🥉" if idx == 3 else f"{idx}위"
                 embed.add_field(name=f"{medal}. {name}", value=f"총 획득: **{amount:,}원**", inline=False)
         
+        my_rank = await self.economy.get_rank(interaction.user.id)
+        embed.set_footer(text=f"내 순위: {my_rank}위" if my_rank else "내 순위: 순위 없음")
         await interaction.response.send_message(embed=embed)
 
     @game_group.command(name="시작", description="돈을 걸고 게임을 진행합니다.")
@@ -286,17 +332,17 @@ class Game(commands.Cog):
 
     @game_group.command(name="퀘스트", description="현재 진행 중인 퀘스트를 확인합니다.")
     async def quest(self, interaction: discord.Interaction):
-        quest = await self.economy.get_quest(interaction.user.id)
-        if not quest:
+        quests = await self.economy.get_quests(interaction.user.id)
+        if not quests:
             await interaction.response.send_message("현재 진행 중인 퀘스트가 없습니다.", ephemeral=True)
             return
         
         embed = discord.Embed(title="📜 현재 퀘스트", color=discord.Color.purple())
-        if quest["type"] == "win_streak":
-            embed.description = f"**{quest['target']}연승 도전**"
-            embed.add_field(name="진행 상황", value=f"{quest['current']} / {quest['target']} 회", inline=True)
-            embed.add_field(name="성공 보상", value=f"+{quest['reward']:,}원", inline=True)
-            embed.add_field(name="실패 페널티", value=f"-{quest['penalty']:,}원", inline=True)
+        for quest in quests:
+            value = f"📊 진행 상황: `{quest['current']:,} / {quest['target']:,} {quest['unit']}`\n💰 성공 보상: +{quest['reward']:,}원"
+            if quest["penalty"]:
+                value += f"\n⚠️ 실패 페널티: -{quest['penalty']:,}원"
+            embed.add_field(name=quest["name"], value=value, inline=False)
         
         await interaction.response.send_message(embed=embed)
 
@@ -1,6 +1,8 @@
 from discord.ext import commands, tasks
 import discord
 from discord import app_commands
+from services.cluster import ClusterBus
+from services.metrics import InstrumentedView
 
 class HelpSelect(discord.ui.Select):
     def __init__(self, bot):
@@ -76,7 +78,7 @@ class HelpSelect(discord.ui.Select):
         
         await interaction.response.edit_message(embed=embed)
 
-class HelpView(discord.ui.View):
+class HelpView(InstrumentedView):
     def __init__(self, bot, timeout=180):
         super().__init__(timeout=timeout)
         self.add_item(HelpSelect(bot))
@@ -84,6 +86,9 @@ class HelpView(discord.ui.View):
 class General(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.bus = ClusterBus.get_instance()
+        self.cluster_guilds = {}  # 다른 클러스터가 알려준 서버 수
+        self.bus.subscribe("guilds", self.on_cluster_guilds)
         self.update_status.start()
 
     def cog_unload(self):
@@ -93,10 +98,25 @@ class General(commands.Cog):
     async def update_status(self):
         """봇의 상태 메시지를 주기적으로 업데이트합니다."""
         await self.bot.wait_until_ready()
+        # 샤딩 봇이면 이 프로세스가 맡은 모든 샤드의 서버 수 합계이며, 모든 샤드에 같은 상태를 적용합니다.
         guild_count = len(self.bot.guilds)
+        if self.bus.enabled:
+            # 클러스터 모드에서는 다른 프로세스에 알리고, 마지막으로 받은 값들을 더해 전체 서버 수를 표시
+            self.bus.publish("guilds", self.bus.cluster_id, guild_count)
+            guild_count += sum(self.cluster_guilds.values())
         activity = discord.Game(name=f"🌠 {guild_count}개의 서버를 빛내는 중")
         await self.bot.change_presence(activity=activity)
 
+    def on_cluster_guilds(self, cluster_id: int, count: int):
+        self.cluster_guilds[cluster_id] = count
+
+    def shard_guild_counts(self) -> dict:
+        """샤드 번호별 서버 수"""
+        counts = {}
+        for guild in self.bot.guilds:
+            counts[guild.shard_id] = counts.get(guild.shard_id, 0) + 1
+        return counts
+
     @app_commands.command(name="핑", description="봇의 응답 속도를 확인합니다.")
     async def ping(self, interaction: discord.Interaction):
         latency = round(self.bot.latency * 1000)
@@ -106,6 +126,20 @@ class General(commands.Cog):
             description=f"현재 핑: **{latency}ms**",
             color=discord.Color.green()
         )
+
+        # 샤딩 봇이면 샤드별 핑 표시 (임베드 필드 제한 25개)
+        latencies = getattr(self.bot, "latencies", None)
+        if latencies and isinstance(self.bot, commands.AutoShardedBot):
+            current = interaction.guild.shard_id if interaction.guild else None
+            guild_counts = self.shard_guild_counts()
+            for shard_id, shard_latency in latencies[:24]:
+                marker = " 📍" if shard_id == current else ""
+                embed.add_field(
+                    name=f"샤드 {shard_id}{marker}",
+                    value=f"{round(shard_latency * 1000)}ms · 서버 {guild_counts.get(shard_id, 0)}개",
+                    inline=True
+                )
+            embed.set_footer(text=f"전체 샤드 수: {self.bot.shard_count}")
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="도움말", description="사용 가능한 모든 명령어를 확인합니다.")
@@ -2,10 +2,87 @@ from discord.ext import commands
 from discord import app_commands
 import discord
 import datetime
-from services.moderation_service import ModerationService
+from services.moderation_service import ModerationService, WARNINGS_PAGE_SIZE
+from services.metrics import InstrumentedView
 
 MAX_CLEAR = 50
 
+class WarningsView(InstrumentedView):
+    """경고 목록 페이지 넘김 (한 페이지씩 DB에서 조회)"""
+    def __init__(self, service, member: discord.Member, author_id: int, total: int):
+        super().__init__(timeout=180)
+        self.service = service
+        self.member = member
+        self.author_id = author_id
+        self.total = total
+        self.page = 0
+        self.pages = max(1, (total + WARNINGS_PAGE_SIZE - 1) // WARNINGS_PAGE_SIZE)
+        self.update_buttons()
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("명령어를 실행한 사람만 페이지를 넘길 수 있습니다.", ephemeral=True)
+            return False
+        return True
+
+    def update_buttons(self):
+        self.prev_page.disabled = self.page <= 0
+        self.next_page.disabled = self.page >= self.pages - 1
+
+    def get_embed(self, warnings: list) -> discord.Embed:
+        embed = discord.Embed(title=f"⚠️ {self.member.name}님의 경고 기록", color=discord.Color.orange())
+        start = self.page * WARNINGS_PAGE_SIZE
+        for idx, warn in enumerate(warnings, start + 1):
+            moderator = self.member.guild.get_member(warn['moderator_id'])
+            mod_name = moderator.name if moderator else "Unknown"
+            embed.add_field(name=f"{idx}. {warn['date']}", value=f"사유: {warn['reason']}\n처리자: {mod_name}", inline=False)
+        embed.set_footer(text=f"누적 {self.total}회 | {self.page + 1}/{self.pages} 페이지")
+        return embed
+
+    async def show(self, interaction: discord.Interaction):
+        warnings, self.total = await self.service.get_warnings(self.member.guild.id, self.member.id, self.page)
+        self.pages = max(1, (self.total + WARNINGS_PAGE_SIZE - 1) // WARNINGS_PAGE_SIZE)
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.get_embed(warnings), view=self)
+
+    @discord.ui.button(label="◀ 이전", style=discord.ButtonStyle.secondary)
+    async def prev_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(0, self.page - 1)
+        await self.show(interaction)
+
+    @discord.ui.button(label="다음 ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = min(self.pages - 1, self.page + 1)
+        await self.show(interaction)
+
+class ClearLegacyWarningsView(InstrumentedView):
+    """서버 구분 이전 경고 기록(모든 서버에서 함께 보임)까지 삭제할지 확인"""
+    def __init__(self, service, member: discord.Member, author_id: int):
+        super().__init__(timeout=60)
+        self.service = service
+        self.member = member
+        self.author_id = author_id
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("명령어를 실행한 사람만 선택할 수 있습니다.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="이전 기록도 삭제", style=discord.ButtonStyle.danger)
+    async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.stop()
+        deleted = await self.service.clear_warnings(self.member.guild.id, self.member.id, include_legacy=True)
+        await interaction.response.edit_message(
+            content=f"♻️ {self.member.mention}님의 모든 경고를 초기화했습니다. (서버 구분 이전 기록 포함 {deleted}건)",
+            view=None,
+        )
+
+    @discord.ui.button(label="유지", style=discord.ButtonStyle.secondary)
+    async def keep(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.stop()
+        await interaction.response.edit_message(view=None)
+
 @app_commands.guild_only()
 class Moderation(commands.Cog):
     def __init__(self, bot):
@@ -143,7 +220,7 @@ class Moderation(commands.Cog):
             await interaction.response.send_message("❌ 유저 관리 권한이 없습니다.", ephemeral=True)
             return
 
-        count = await self.service.add_warning(member.id, reason, interaction.user.id)
+        count = await self.service.add_warning(interaction.guild.id, member.id, reason, interaction.user.id)
         
         # DM 발송
         try:
@@ -167,18 +244,16 @@ class Moderation(commands.Cog):
             await interaction.response.send_message("❌ 유저 관리 권한이 없습니다.", ephemeral=True)
             return
 
-        warnings = await self.service.get_warnings(member.id)
+        warnings, total = await self.service.get_warnings(interaction.guild.id, member.id)
         if not warnings:
             await interaction.response.send_message(f"✅ {member.mention}님은 경고 기록이 없습니다.")
             return
 
-        embed = discord.Embed(title=f"⚠️ {member.name}님의 경고 기록", color=discord.Color.orange())
-        for idx, warn in enumerate(warnings, 1):
-            moderator = interaction.guild.get_member(warn['moderator_id'])
-            mod_name = moderator.name if moderator else "Unknown"
-            embed.add_field(name=f"{idx}. {warn['date']}", value=f"사유: {warn['reason']}\n처리자: {mod_name}", inline=False)
-        
-        await interaction.response.send_message(embed=embed)
+        view = WarningsView(self.service, member, interaction.user.id, total)
+        if view.pages > 1:
+            await interaction.response.send_message(embed=view.get_embed(warnings), view=view)
+        else:
+            await interaction.response.send_message(embed=view.get_embed(warnings))
 
     @app_commands.command(name="경고초기화", description="유저의 모든 경고를 초기화합니다.")
     async def clear_warnings(self, interaction: discord.Interaction, member: discord.Member):
@@ -186,7 +261,16 @@ class Moderation(commands.Cog):
             await interaction.response.send_message("❌ 관리자 권한이 필요합니다.", ephemeral=True)
             return
 
-        await self.service.clear_warnings(member.id)
+        await self.service.clear_warnings(interaction.guild.id, member.id)
+        # 남은 경고는 서버 구분 이전 기록뿐 (모든 서버에서 함께 보이므로 확인을 받고 삭제)
+        legacy = await self.service.count_warnings(interaction.guild.id, member.id)
+        if legacy:
+            await interaction.response.send_message(
+                f"♻️ {member.mention}님의 이 서버 경고를 초기화했습니다.\n"
+                f"서버 구분 이전 기록 {legacy}건이 남아 있습니다. 이 기록은 모든 서버에서 함께 보이며, 삭제하면 모든 서버에서 사라집니다.",
+                view=ClearLegacyWarningsView(self.service, member, interaction.user.id),
+            )
+            return
         await interaction.response.send_message(f"♻️ {member.mention}님의 모든 경고를 초기화했습니다.")
 
 async def setup(bot):
@@ -1,11 +1,21 @@
 from discord.ext import commands
 import discord
 from discord import app_commands
-import random
 from services.upgrade_service import UpgradeService
+from services.name_resolver import NameResolver
+from services.metrics import InstrumentedModal, InstrumentedView, query_budget
+from services.rng import game_rng
 
 
-class GearNamingModal(discord.ui.Modal, title="장비 이름 설정"):
+def format_won(amount: float) -> str:
+    """큰 금액을 조/억/만 단위로 줄여 표시합니다."""
+    for unit, size in (("조", 10 ** 12), ("억", 10 ** 8), ("만", 10 ** 4)):
+        if amount >= size:
+            return f"{amount / size:,.1f}{unit}원"
+    return f"{amount:,.0f}원"
+
+
+class GearNamingModal(InstrumentedModal, title="장비 이름 설정"):
     name = discord.ui.TextInput(
         label="장비의 이름을 정해주세요",
         placeholder="최대 10자까지 정할 수 있습니다.",
@@ -24,13 +34,13 @@ class GearNamingModal(discord.ui.Modal, title="장비 이름 설정"):
         await self.callback(interaction)
 
 
-class MinigameView(discord.ui.View):
+class MinigameView(InstrumentedView):
     """1~5 숫자 맞추기 미니게임"""
     def __init__(self, user_id: int, callback):
         super().__init__(timeout=30)
         self.user_id = user_id
         self.callback = callback
-        self.correct_number = random.randint(1, 5)
+        self.correct_number = game_rng.stream("minigame", user_id).randint(1, 5)
         self.bonus = 0.0
         self.answered = False
         
@@ -80,7 +90,7 @@ class MinigameView(discord.ui.View):
         self.stop()
 
 
-class UpgradeConfirmView(discord.ui.View):
+class UpgradeConfirmView(InstrumentedView):
     """강화 확인 뷰"""
     def __init__(self, user_id: int, upgrade_service: UpgradeService, level: int, balance: int, minigame_bonus: float = 0.0):
         super().__init__(timeout=60)
@@ -99,6 +109,7 @@ class UpgradeConfirmView(discord.ui.View):
         return True
     
     @discord.ui.button(label="🔨 강화하기", style=discord.ButtonStyle.danger)
+    @query_budget(12)
     async def do_upgrade(self, interaction: discord.Interaction, button: discord.ui.Button):
         result = await self.upgrade_service.upgrade(self.user_id, self.minigame_bonus)
         
@@ -151,10 +162,12 @@ class UpgradeConfirmView(discord.ui.View):
                 color=discord.Color.orange()
             )
             embed.add_field(name="소모 비용", value=f"{result['cost']:,}원", inline=True)
+
+        if result["notifications"]:
+            embed.add_field(name="알림", value="\n".join(result["notifications"]), inline=False)
         
         # 다시 강화 버튼 제공
-        new_level, _, gear_name = await self.upgrade_service.get_user_gear(self.user_id)
-        new_balance = await self.upgrade_service.get_balance(self.user_id)
+        new_level, _, gear_name, new_balance = await self.upgrade_service.get_gear_overview(self.user_id)
         
         view = UpgradeMainView(self.user_id, self.upgrade_service, new_level, new_balance, gear_name=gear_name)
         await interaction.response.edit_message(embed=embed, view=view)
@@ -208,9 +221,10 @@ class UpgradeConfirmView(discord.ui.View):
                 )
             
             embed.add_field(name="소모 비용", value=f"{result['cost']:,}원", inline=True)
+            if result["notifications"]:
+                embed.add_field(name="알림", value="\n".join(result["notifications"]), inline=False)
             
-            new_level, _, gear_name = await self.upgrade_service.get_user_gear(self.user_id)
-            new_balance = await self.upgrade_service.get_balance(self.user_id)
+            new_level, _, gear_name, new_balance = await self.upgrade_service.get_gear_overview(self.user_id)
             view = UpgradeMainView(self.user_id, self.upgrade_service, new_level, new_balance, gear_name=gear_name)
             await minigame_interaction.followup.send(embed=embed, view=view)
         
@@ -222,7 +236,7 @@ class UpgradeConfirmView(discord.ui.View):
         await interaction.response.edit_message(content="강화를 취소했습니다.", embed=None, view=None)
 
 
-class UpgradeMainView(discord.ui.View):
+class UpgradeMainView(InstrumentedView):
     """메인 강화 UI"""
     def __init__(self, user_id: int, upgrade_service: UpgradeService, level: int, balance: int, gear_name: str = "기본 장비"):
         super().__init__(timeout=120)
@@ -298,8 +312,7 @@ class UpgradeMainView(discord.ui.View):
     
     @discord.ui.button(label="🔄 새로고침", style=discord.ButtonStyle.secondary)
     async def refresh(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.level, _, self.gear_name = await self.upgrade_service.get_user_gear(self.user_id)
-        self.balance = await self.upgrade_service.get_balance(self.user_id)
+        self.level, _, self.gear_name, self.balance = await self.upgrade_service.get_gear_overview(self.user_id)
         await interaction.response.edit_message(embed=self.get_embed(), view=self)
 
 
@@ -308,17 +321,20 @@ class Upgrade(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.upgrade_service = UpgradeService.get_instance()
+        self.names = NameResolver.get_instance(bot)
+
+    async def cog_unload(self):
+        # 종료 전 캐시에 남아 있는 유저 상태와 잔고 기록을 DB에 반영
+        await self.upgrade_service.economy.close()
     
     upgrade_group = app_commands.Group(name="강화", description="장비 강화 관련 명령어")
     
     @upgrade_group.command(name="시작", description="장비 강화를 시작합니다.")
     async def start(self, interaction: discord.Interaction):
         level, max_level, gear_name = await self.upgrade_service.get_user_gear(interaction.user.id)
-        balance = await self.upgrade_service.get_balance(interaction.user.id)
         
         async def show_upgrade_ui(it: discord.Interaction):
-            lvl, _, name = await self.upgrade_service.get_user_gear(interaction.user.id)
-            bal = await self.upgrade_service.get_balance(interaction.user.id)
+            lvl, _, name, bal = await self.upgrade_service.get_gear_overview(interaction.user.id)
             view = UpgradeMainView(interaction.user.id, self.upgrade_service, lvl, bal, gear_name=name)
             if it.response.is_done():
                 await it.followup.send(embed=view.get_embed(), view=view)
@@ -332,9 +348,9 @@ class Upgrade(commands.Cog):
             await show_upgrade_ui(interaction)
     
     @upgrade_group.command(name="정보", description="현재 장비 정보를 확인합니다.")
+    @query_budget(2)
     async def info(self, interaction: discord.Interaction):
-        level, max_level, gear_name = await self.upgrade_service.get_user_gear(interaction.user.id)
-        balance = await self.upgrade_service.get_balance(interaction.user.id)
+        level, max_level, gear_name, balance = await self.upgrade_service.get_gear_overview(interaction.user.id)
         
         tier_name = self.upgrade_service.get_tier_name(level)
         tier_emoji = self.upgrade_service.TIER_EMOJIS.get(tier_name, "⚪")
@@ -352,10 +368,18 @@ class Upgrade(commands.Cog):
         embed.add_field(name="다음 강화 비용", value=f"{cost:,}원", inline=False)
         embed.add_field(name="성공 확률", value=f"{rate*100:.1f}%", inline=True)
         embed.add_field(name="보유 잔액", value=f"{balance:,}원", inline=True)
+
+        estimate = self.upgrade_service.get_next_tier_estimate(level)
+        if estimate:
+            value = (f"평균 **{estimate['attempts']:,.0f}회** · 약 **{format_won(estimate['cost'])}**")
+            if estimate["reach_without_destroy"] < 0.999:
+                value += f"\n파괴 없이 도달할 확률: {estimate['reach_without_destroy'] * 100:.2f}%"
+            embed.add_field(name=f"📈 Lv. {estimate['target']} ({estimate['tier']})까지 예상", value=value, inline=False)
         
         await interaction.response.send_message(embed=embed)
     
     @upgrade_group.command(name="랭킹", description="장비 레벨 랭킹을 확인합니다.")
+    @query_budget(10)
     async def leaderboard(self, interaction: discord.Interaction):
         rankings = await self.upgrade_service.get_leaderboard()
         
@@ -367,12 +391,9 @@ class Upgrade(commands.Cog):
         if not rankings:
             embed.description = "아직 랭킹 데이터가 없습니다."
         else:
+            names = await self.names.resolve((row[0] for row in rankings), interaction.guild)
             for idx, (uid, gear_lv, max_lv, gear_name) in enumerate(rankings, 1):
-                try:
-                    user = await self.bot.fetch_user(int(uid))
-                    name = user.name
-                except Exception:
-                    name = "Unknown"
+                name = names[int(uid)]
                 
                 tier_name = self.upgrade_service.get_tier_name(gear_lv or 1)
                 tier_emoji = self.upgrade_service.TIER_EMOJIS.get(tier_name, "⚪")
@@ -384,6 +405,8 @@ class Upgrade(commands.Cog):
                     inline=False
                 )
         
+        my_rank = await self.upgrade_service.get_rank(interaction.user.id)
+        embed.set_footer(text=f"내 순위: {my_rank}위" if my_rank else "내 순위: 순위 없음")
         await interaction.response.send_message(embed=embed)
     
     @upgrade_group.command(name="도움말", description="강화 시스템에 대한 도움말을 확인합니다.")
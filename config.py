@@ -6,4 +6,76 @@ load_dotenv()
 
 # 환경 변수에서 값을 가져오고, 없으면 기본값(또는 None) 사용
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///stella.db")
\ No newline at end of file
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///stella.db")
+
+# DB 커넥션 풀 설정
+# DB_POOL_PRE_PING=1 이면 체크아웃마다 연결 확인 쿼리를 보냅니다. (왕복 1회 추가)
+# 끄는 경우 DB_POOL_RECYCLE 을 서버/프록시의 유휴 연결 종료 시간보다 짧게 설정하세요.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1").lower() in ("1", "true", "yes")
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))  # asyncpg 준비된 구문 캐시 (PgBouncer 트랜잭션 모드면 0)
+DB_POOL_SLOW_MS = float(os.getenv("DB_POOL_SLOW_MS", "100"))  # 이 시간 이상 커넥션을 기다리면 로그 출력
+
+# SQLite 성능 모드 (WAL + PRAGMA 튜닝 + 단일 쓰기 작업자)
+SQLITE_PERFORMANCE_MODE = os.getenv("SQLITE_PERFORMANCE_MODE", "1").lower() in ("1", "true", "yes")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")        # WAL 에서는 NORMAL 도 손상 없이 안전
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))  # 연결당 페이지 캐시
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_WRITE_BATCH = int(os.getenv("SQLITE_WRITE_BATCH", "100"))      # 한 번에 커밋할 최대 쓰기 작업 수
+
+# launcher.py 가 실행한 클러스터 워커 번호 (단독 실행이면 None)
+CLUSTER_ID = int(os.getenv("CLUSTER_ID")) if os.getenv("CLUSTER_ID") else None
+
+# 유저 상태 캐시 (0이면 캐시를 사용하지 않고 매번 DB에 기록)
+# 클러스터 모드에서는 여러 프로세스가 같은 유저를 고칠 수 있으므로 설정과 관계없이 캐시를 끕니다.
+# (캐시는 읽은 값에 바꾼 결과를 나중에 덮어쓰므로 프로세스마다 캐시가 있으면 잔고 변경이 사라질 수 있고,
+#  반영 후 ClusterBus 로 무효화를 보내도 그 사이 다른 워커의 변경을 덮어쓰는 것은 막지 못함 - README 참고)
+USER_CACHE_SIZE = 0 if CLUSTER_ID is not None else int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_FLUSH_INTERVAL = float(os.getenv("USER_CACHE_FLUSH_INTERVAL", "5"))
+
+# 잔고 변동 기록(ledger) - 유저 상태 밖에서 남긴 기록만 메모리에 모았다가 주기적으로 한 번에 기록
+# (유저 상태 안의 기록은 잔고와 같은 트랜잭션에서 반영)
+LEDGER_FLUSH_INTERVAL = float(os.getenv("LEDGER_FLUSH_INTERVAL", "1"))
+LEDGER_BATCH_SIZE = int(os.getenv("LEDGER_BATCH_SIZE", "1000"))  # 이만큼 쌓이면 주기를 기다리지 않고 기록
+
+# 명령어 지연 시간 계측 (0이면 끔)
+# METRICS_PORT 를 지정하면 127.0.0.1:포트/metrics 로 Prometheus 형식 지표를 내보냅니다. (클러스터는 포트 + CLUSTER_ID)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() in ("1", "true", "yes")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# 명령어별 SQL 쿼리 수 검사 (계측이 켜져 있을 때)
+# 예산은 명령어에 @query_budget(n) 으로 선언하고, 선언하지 않은 명령어는 QUERY_BUDGET_DEFAULT 를 씁니다. (0이면 검사 안 함)
+# QUERY_BUDGET_STRICT=1 이면 예산을 넘은 명령어에서 예외를 발생시킵니다. (테스트/부하 테스트용, 운영에서는 경고만)
+QUERY_BUDGET_DEFAULT = int(os.getenv("QUERY_BUDGET_DEFAULT", "20"))
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "0").lower() in ("1", "true", "yes")
+QUERY_REPEAT_LIMIT = int(os.getenv("QUERY_REPEAT_LIMIT", "5"))  # 같은 문장을 이보다 많이 실행하면 N+1 의심 경고
+
+# 랭킹 순위표 (services/leaderboard.py) - 메모리에 보관하는 상위 유저 수 (그 밖의 유저 순위는 DB에서 셈)
+RANK_BOARD_SIZE = int(os.getenv("RANK_BOARD_SIZE", "1000"))
+
+# 게임 난수 (services/rng.py). RNG_SEED 를 지정하면 같은 행동 순서에서 같은 결과가 나옵니다. (비우면 무작위)
+RNG_SEED = int(os.getenv("RNG_SEED")) if os.getenv("RNG_SEED") else None
+RNG_BUFFER_SIZE = int(os.getenv("RNG_BUFFER_SIZE", "64"))    # 스트림마다 미리 만들어 두는 난수 개수
+# 스트림을 메모리에 보관하는 유저 수 (기본: 유저 캐시의 2배, 유저 캐시에서 밀려난 유저의 스트림은 함께 버림)
+RNG_MAX_USERS = int(os.getenv("RNG_MAX_USERS", str(max(2 * USER_CACHE_SIZE, 20000))))
+
+# 랭킹 등에서 사용하는 유저 이름 조회 설정
+NAME_CACHE_TTL = float(os.getenv("NAME_CACHE_TTL", "3600"))
+NAME_CACHE_NEGATIVE_TTL = float(os.getenv("NAME_CACHE_NEGATIVE_TTL", "60"))
+NAME_CACHE_SIZE = int(os.getenv("NAME_CACHE_SIZE", "10000"))  # 기억하는 이름 수 (넘으면 오래 안 쓴 이름부터 제거)
+NAME_FETCH_CONCURRENCY = int(os.getenv("NAME_FETCH_CONCURRENCY", "5"))
+
+# 샤딩 설정
+# SHARDED=1 이면 AutoShardedBot 으로 실행합니다. SHARD_COUNT 를 비우면 디스코드 권장 샤드 수를 사용하고,
+# SHARD_IDS (예: "0-3,6")를 지정하면 이 프로세스는 해당 샤드만 담당합니다. (SHARD_COUNT 필수)
+SHARDED = os.getenv("SHARDED", "0").lower() in ("1", "true", "yes")
+SHARD_COUNT = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None
+SHARD_IDS = os.getenv("SHARD_IDS", "")
+
+# 클러스터 설정 (launcher.py)
+# 샤드를 CLUSTER_COUNT 개의 프로세스로 나누어 실행합니다. SHARD_COUNT 를 비우면 디스코드 권장 샤드 수를 사용합니다.
+CLUSTER_COUNT = int(os.getenv("CLUSTER_COUNT", "2"))
@@ -0,0 +1,172 @@
+"""
+클러스터 런처 - 샤드를 여러 프로세스(클러스터)로 나누어 실행합니다.
+
+각 워커는 main.py 를 SHARDED=1, SHARD_COUNT, SHARD_IDS, CLUSTER_ID 환경 변수로 실행하며,
+런처는 워커 사이의 메시지(랭킹 갱신, 서버 수)를 중계하고
+비정상 종료된 워커를 점점 늘어나는 대기 시간 후 다시 시작합니다.
+
+사용법: python launcher.py [--clusters 2] [--shards 8]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import urllib.request
+from services.sharding import format_shard_ids, shard_ranges
+
+IDENTIFY_INTERVAL = 5.0   # 샤드 하나가 접속(identify)할 때 필요한 간격(초)
+RESTART_BACKOFF_MIN = 1.0
+RESTART_BACKOFF_MAX = 300.0
+STABLE_UPTIME = 60.0      # 이 시간 이상 살아 있었다면 재시작 대기 시간을 초기화
+SHUTDOWN_TIMEOUT = 30.0
+
+
+def fetch_recommended_shards(token: str) -> int:
+    """디스코드가 권장하는 샤드 수를 조회합니다."""
+    request = urllib.request.Request(
+        "https://discord.com/api/v10/gateway/bot",
+        headers={"Authorization": f"Bot {token}", "User-Agent": "Stella (launcher)"},
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return int(json.load(response)["shards"])
+
+
+def run_worker(cluster_id: int, shard_ids, shard_count: int, inbox, outbox):
+    """워커 프로세스 진입점 (spawn 으로 새 인터프리터에서 실행)"""
+    # config 가 읽기 전에 환경 변수를 설정해야 하므로 main 은 여기서 불러옵니다.
+    os.environ["SHARDED"] = "1"
+    os.environ["SHARD_COUNT"] = str(shard_count)
+    os.environ["SHARD_IDS"] = format_shard_ids(shard_ids)
+    os.environ["CLUSTER_ID"] = str(cluster_id)
+    # SIGTERM 을 Ctrl+C 처럼 처리 → bot.run 이 정상 종료하며 캐시를 반영
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    from services.cluster import ClusterBus
+    ClusterBus.get_instance().attach(cluster_id, inbox, outbox)
+
+    import main
+    main.main()
+
+
+class Launcher:
+    def __init__(self, shard_count: int, clusters: int):
+        self.shard_count = shard_count
+        self.ranges = shard_ranges(shard_count, clusters)
+        self.ctx = multiprocessing.get_context("spawn")
+        self.outbox = self.ctx.Queue()
+        self.inboxes = {}
+        self.inbox_lock = threading.Lock()
+        self.processes = {}
+        self.started_at = {}
+        self.backoff = {}
+        self.restart_at = {}
+        self.stopping = threading.Event()
+
+    def start_worker(self, cluster_id: int):
+        shard_ids = self.ranges[cluster_id]
+        inbox = self.ctx.Queue()
+        with self.inbox_lock:
+            self.inboxes[cluster_id] = inbox
+        process = self.ctx.Process(
+            target=run_worker,
+            args=(cluster_id, shard_ids, self.shard_count, inbox, self.outbox),
+            name=f"stella-cluster-{cluster_id}",
+        )
+        process.start()
+        self.processes[cluster_id] = process
+        self.started_at[cluster_id] = time.monotonic()
+        print(f"[Launcher] 클러스터 {cluster_id} 시작 (PID {process.pid}, 샤드 {format_shard_ids(shard_ids)})")
+
+    def relay(self):
+        """워커가 보낸 메시지를 다른 모든 워커에게 전달합니다."""
+        while True:
+            message = self.outbox.get()
+            if message is None:
+                return
+            sender = message[0]
+            with self.inbox_lock:
+                targets = [q for cid, q in self.inboxes.items() if cid != sender]
+            for inbox in targets:
+                inbox.put(message)
+
+    def supervise(self):
+        while not self.stopping.is_set():
+            now = time.monotonic()
+            for cluster_id, process in list(self.processes.items()):
+                if process.is_alive():
+                    continue
+                if cluster_id not in self.restart_at:
+                    uptime = now - self.started_at[cluster_id]
+                    delay = self.backoff.get(cluster_id, RESTART_BACKOFF_MIN)
+                    if uptime >= STABLE_UPTIME:
+                        delay = RESTART_BACKOFF_MIN
+                    self.backoff[cluster_id] = min(delay * 2, RESTART_BACKOFF_MAX)
+                    self.restart_at[cluster_id] = now + delay
+                    with self.inbox_lock:
+                        self.inboxes.pop(cluster_id, None)
+                    print(f"[Launcher] ⚠️ 클러스터 {cluster_id} 종료 (코드 {process.exitcode}), {delay:.0f}초 후 재시작")
+                elif now >= self.restart_at[cluster_id]:
+                    del self.restart_at[cluster_id]
+                    self.start_worker(cluster_id)
+            self.stopping.wait(1.0)
+
+    def stop(self, *_):
+        self.stopping.set()
+
+    def run(self):
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        relay = threading.Thread(target=self.relay, name="cluster-relay", daemon=True)
+        relay.start()
+
+        print(f"[Launcher] 샤드 {self.shard_count}개를 클러스터 {len(self.ranges)}개로 실행합니다.")
+        for cluster_id, shard_ids in enumerate(self.ranges):
+            if self.stopping.is_set():
+                break
+            self.start_worker(cluster_id)
+            # 앞 클러스터의 샤드가 모두 접속할 시간을 두어 identify 제한을 넘지 않도록 함
+            if cluster_id < len(self.ranges) - 1:
+                self.stopping.wait(len(shard_ids) * IDENTIFY_INTERVAL)
+
+        self.supervise()
+        self.shutdown()
+
+    def shutdown(self):
+        print("[Launcher] 종료 중...")
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        for cluster_id, process in self.processes.items():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                print(f"[Launcher] ⚠️ 클러스터 {cluster_id} 가 응답하지 않아 강제 종료합니다.")
+                process.kill()
+                process.join()
+        self.outbox.put(None)
+        print("[Launcher] 모든 클러스터가 종료되었습니다.")
+
+
+def main():
+    import config
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clusters", type=int, default=config.CLUSTER_COUNT, help="워커 프로세스 수")
+    parser.add_argument("--shards", type=int, default=config.SHARD_COUNT, help="전체 샤드 수 (생략 시 디스코드 권장값)")
+    args = parser.parse_args()
+
+    shard_count = args.shards
+    if shard_count is None:
+        if not config.DISCORD_TOKEN:
+            parser.error("DISCORD_TOKEN 이 없어 권장 샤드 수를 조회할 수 없습니다. --shards 를 지정하세요.")
+        shard_count = fetch_recommended_shards(config.DISCORD_TOKEN)
+        print(f"[Launcher] 디스코드 권장 샤드 수: {shard_count}")
+
+    Launcher(shard_count, args.clusters).run()
+
+
+if __name__ == "__main__":
+    main()
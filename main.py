@@ -2,20 +2,42 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 import config
+from services.sharding import parse_shard_ids, format_shard_ids
+from services.metrics import InstrumentedCommandTree, command_metrics, instrument_http, start_metrics_server
 
 intents = discord.Intents.default()
 intents.message_content = True
 
-bot = commands.Bot(
-    command_prefix="!",
-    intents=intents
-)
+def create_bot() -> commands.Bot:
+    """설정에 따라 일반 봇 또는 샤딩 봇을 생성합니다."""
+    if not config.SHARDED:
+        return commands.Bot(command_prefix="!", intents=intents, tree_cls=InstrumentedCommandTree)
+
+    shard_ids = parse_shard_ids(config.SHARD_IDS)
+    if shard_ids is not None and config.SHARD_COUNT is None:
+        raise ValueError("SHARD_IDS 를 지정하려면 SHARD_COUNT 도 설정해야 합니다.")
+    return commands.AutoShardedBot(
+        command_prefix="!",
+        intents=intents,
+        shard_count=config.SHARD_COUNT,
+        shard_ids=shard_ids,
+        tree_cls=InstrumentedCommandTree,
+    )
+
+bot = create_bot()
 
 @bot.event
 async def on_ready():
     print(f"Logged in as {bot.user} (ID: {bot.user.id})")
+    if bot.shard_count:
+        shard_ids = getattr(bot, "shard_ids", None) or range(bot.shard_count)
+        print(f"Shards: {format_shard_ids(list(shard_ids))} / {bot.shard_count}")
     print("------")
 
+@bot.event
+async def on_shard_ready(shard_id: int):
+    print(f"[Shard {shard_id}] 준비 완료")
+
 @bot.command()
 @commands.is_owner()
 async def sync(ctx):
@@ -26,6 +48,59 @@ async def sync(ctx):
     except Exception as e:
         await ctx.send(f"❌ 동기화 실패: {e}")
 
+@bot.command()
+@commands.is_owner()
+async def pool(ctx):
+    """DB 커넥션 풀 사용 현황을 확인합니다. (봇 소유자 전용)"""
+    from services.pool import pool_telemetry
+    s = pool_telemetry.stats()
+    if s["in_use"] is None:
+        usage = "🗄️ 커넥션 풀 없음 (연결 하나를 공유하는 DB)"
+    else:
+        usage = (f"🗄️ 사용 중 {s['in_use']}/{s['capacity'] or '∞'} (추가 연결 {s['overflow']}, 최대 {s['peak_in_use']}, "
+                 f"포화도 {s['saturation']:.0%})")
+    await ctx.send(
+        f"{usage}\n"
+        f"⏱️ 체크아웃 {s['checkouts']:,}회 · 대기 평균 {s['wait_avg_ms']:.2f}ms · p95 {s['wait_p95_ms']:.2f}ms · "
+        f"최대 {s['wait_max_ms']:.1f}ms · 느림 {s['slow_checkouts']} · 타임아웃 {s['timeouts']}\n"
+        f"🔁 연결 생성 {s['connects']} · 종료 {s['closes']} · 폐기 {s['invalidations']}"
+    )
+
+@bot.command()
+@commands.is_owner()
+async def locks(ctx):
+    """유저별 잠금 경합 현황을 확인합니다. (봇 소유자 전용)"""
+    from services.quest import EconomyService
+    s = EconomyService.get_instance().user_locks.stats()
+    await ctx.send(
+        f"🔒 잠금 {s['acquisitions']:,}회 · 경합 {s['contended']:,}회 ({s['contention_rate']:.1%}) · "
+        f"대기 평균 {s['wait_avg_ms']:.2f}ms · 최대 {s['wait_max_ms']:.1f}ms\n"
+        f"👥 사용 중인 키 {s['keys']} · 대기 중 {s['waiting']} (최대 {s['peak_waiting']})"
+    )
+
+@bot.command()
+@commands.is_owner()
+async def stats(ctx):
+    """명령어별 처리 시간과 쿼리 수를 확인합니다. (봇 소유자 전용)"""
+    if not command_metrics.enabled:
+        await ctx.send("계측이 꺼져 있습니다. (METRICS_ENABLED=0)")
+        return
+    rows = command_metrics.summary()[:15]
+    if not rows:
+        await ctx.send("아직 기록된 명령어가 없습니다.")
+        return
+    lines = [f"{'명령어':<28}{'호출':>7}{'p50':>8}{'p95':>8}{'p99':>8} | {'DB':>6}{'HTTP':>7}{'처리':>6} (평균 ms) | 쿼리 평균/최대"]
+    for r in rows:
+        lines.append(
+            f"{r['name'][:28]:<28}{r['count']:>7}{r['p50_ms']:>8.1f}{r['p95_ms']:>8.1f}{r['p99_ms']:>8.1f} | "
+            f"{r['db_avg_ms']:>6.1f}{r['http_avg_ms']:>7.1f}{r['handler_avg_ms']:>6.1f} | "
+            f"{r['queries_avg']:>5.1f}/{r['queries_max']}"
+            + (f"  오류 {r['errors']}" if r["errors"] else "")
+            + (f"  예산 초과 {r['over_budget']}" if r["over_budget"] else "")
+            + (f"  반복 쿼리 {r['repeated']}" if r["repeated"] else "")
+        )
+    await ctx.send("```\n" + "\n".join(lines) + "\n```")
+
 @bot.tree.error
 async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
     if isinstance(error, app_commands.CommandOnCooldown):
@@ -49,8 +124,16 @@ def main():
 @bot.event
 async def setup_hook():
     from services.db import init_db
+    from services.cluster import setup_cluster_sync
+    from services.rng import game_rng
+    game_rng.log_seed()
     await init_db()
     await load_cogs()
+    setup_cluster_sync()
+    if command_metrics.enabled:
+        instrument_http(bot)
+        if config.METRICS_PORT:
+            await start_metrics_server(config.METRICS_PORT + (config.CLUSTER_ID or 0))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
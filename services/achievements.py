@@ -0,0 +1,93 @@
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List
+from services.db import User
+
+# 업적 조건에 쓰이는 지표: 유저 상태에서 값을 읽는 함수와 진행도 표시 단위
+METRICS = {
+    "wins":               {"value": lambda u: u.wins or 0,                   "unit": "승"},
+    "win_streak":         {"value": lambda u: max(u.streak or 0, 0),         "unit": "연승"},
+    "loss_streak":        {"value": lambda u: max(-(u.streak or 0), 0),      "unit": "연패"},
+    "max_gambling_win":   {"value": lambda u: u.max_gambling_win or 0,       "unit": "원"},
+    "total_gambling_win": {"value": lambda u: u.total_gambling_win or 0,     "unit": "원"},
+    "max_gear_level":     {"value": lambda u: u.max_gear_level or 1,         "unit": "레벨"},
+    "attendance_streak":  {"value": lambda u: u.attendance_streak or 0,      "unit": "일"},
+}
+
+# 업적 정의 (표시 순서대로). 지표 값이 threshold 이상이 되면 달성합니다.
+# 이미 달성 기록이 id 로 저장되므로 기존 항목의 id 는 바꾸지 마세요.
+ACHIEVEMENTS = [
+    {"id": "first_win",       "name": "첫 승리",       "metric": "wins",               "threshold": 1,         "reward": 1000},
+    {"id": "lucky_streak_3",  "name": "3연승",         "metric": "win_streak",         "threshold": 3,         "reward": 5000},
+    {"id": "lucky_streak_5",  "name": "5연승",         "metric": "win_streak",         "threshold": 5,         "reward": 20000},
+    {"id": "bad_luck_3",      "name": "3연패",         "metric": "loss_streak",        "threshold": 3,         "reward": 3000},
+    {"id": "wins_100",        "name": "백전노장",      "metric": "wins",               "threshold": 100,       "reward": 50000},
+    {"id": "jackpot_1m",      "name": "대박",          "metric": "max_gambling_win",   "threshold": 1000000,   "reward": 50000},
+    {"id": "high_roller_10m", "name": "큰손",          "metric": "total_gambling_win", "threshold": 10000000,  "reward": 300000},
+    {"id": "gear_rare",       "name": "희귀 장비",     "metric": "max_gear_level",     "threshold": 41,        "reward": 50000},
+    {"id": "gear_epic",       "name": "영웅 장비",     "metric": "max_gear_level",     "threshold": 61,        "reward": 200000},
+    {"id": "gear_legendary",  "name": "전설 장비",     "metric": "max_gear_level",     "threshold": 71,        "reward": 1000000},
+    {"id": "attendance_7",    "name": "개근 (7일)",    "metric": "attendance_streak",  "threshold": 7,         "reward": 50000},
+    {"id": "attendance_30",   "name": "개근 (30일)",   "metric": "attendance_streak",  "threshold": 30,        "reward": 300000},
+]
+
+
+class AchievementRegistry:
+    """업적 정의를 지표별로 묶어 두고, 값이 바뀐 지표의 업적만 확인합니다.
+
+    지표마다 업적을 threshold 순으로 정렬해 두므로, 한 번의 확인은 값이 바뀐 지표만 bisect 로
+    threshold 가 현재 값 이하인 업적을 찾고, 그런 업적이 있을 때만 달성 기록과 비교합니다.
+    """
+
+    def __init__(self, definitions: Iterable[Dict[str, Any]]):
+        self.definitions = list(definitions)
+        self.by_id = {}
+        self.by_metric = {}
+        for ach in self.definitions:
+            if ach["metric"] not in METRICS:
+                raise ValueError(f"알 수 없는 업적 지표: {ach['metric']} ({ach['id']})")
+            if ach["id"] in self.by_id:
+                raise ValueError(f"중복된 업적 id: {ach['id']}")
+            self.by_id[ach["id"]] = ach
+            self.by_metric.setdefault(ach["metric"], []).append(ach)
+        for achs in self.by_metric.values():
+            achs.sort(key=lambda a: a["threshold"])
+        # bisect 용 threshold 목록
+        self._thresholds = {metric: [a["threshold"] for a in achs] for metric, achs in self.by_metric.items()}
+
+    def __len__(self) -> int:
+        return len(self.definitions)
+
+    def reached(self, user: User, metrics: Iterable[str]) -> List[Dict[str, Any]]:
+        """주어진 지표의 업적 중 조건을 만족했지만 아직 달성 기록이 없는 업적을 반환합니다."""
+        result = []
+        earned = None
+        for metric in metrics:
+            thresholds = self._thresholds.get(metric)
+            if not thresholds:
+                continue
+            value = METRICS[metric]["value"](user)
+            # 가장 낮은 threshold 에도 못 미치면 비교 한 번으로 끝
+            if value < thresholds[0]:
+                continue
+            reached = self.by_metric[metric][:bisect_right(thresholds, value)]
+            if earned is None:
+                earned = set(user.achievements or ())
+            result.extend(ach for ach in reached if ach["id"] not in earned)
+        return result
+
+    def progress(self, user: User) -> List[Dict[str, Any]]:
+        """전체 업적의 달성 여부와 진행도 문자열 (정의 순서)"""
+        earned = set(user.achievements or ())
+        values = {metric: spec["value"](user) for metric, spec in METRICS.items() if metric in self.by_metric}
+        result = []
+        for ach in self.definitions:
+            threshold = ach["threshold"]
+            current = min(values[ach["metric"]], threshold)
+            result.append({
+                "id": ach["id"],
+                "name": ach["name"],
+                "reward": ach["reward"],
+                "completed": ach["id"] in earned,
+                "progress": f"{current:,}/{threshold:,} {METRICS[ach['metric']]['unit']}",
+            })
+        return result
@@ -0,0 +1,240 @@
+import asyncio
+import copy
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+from sqlalchemy import bindparam, update
+from services.db import User, USER_TABLES
+from services.ledger import Ledger
+from services.quests import save_quests
+from services.rng import game_rng
+from services.writer import WriteQueue
+
+# 캐시가 관리하는 컬럼 (기본 키 제외)과 각 컬럼이 속한 테이블
+COLUMN_TABLES = {c.name: table for table in USER_TABLES for c in table.columns if c.name != "user_id"}
+CACHED_COLUMNS = tuple(COLUMN_TABLES)
+
+# 컬럼 외에 유저 객체에 붙어 있는 1:N 상태와 저장 함수 (바뀐 유저의 값 전체를 다시 씀)
+COLLECTIONS = {"quests": save_quests}
+
+# 주기 반영이 실패했을 때 다시 시도하기까지의 대기 시간 (실패할 때마다 두 배, 최대 FLUSH_RETRY_MAX)
+FLUSH_RETRY_MIN = 1.0
+FLUSH_RETRY_MAX = 60.0
+
+
+class _Entry:
+    __slots__ = ("user", "snapshot", "version", "ledger")
+
+    def __init__(self, user: User):
+        self.user = user
+        self.snapshot = _capture(user)  # 마지막으로 DB에 반영된 값
+        self.version = 0                # 변경될 때마다 증가
+        self.ledger = []                # 아직 반영되지 않은 변경의 잔고 기록 (상태와 같은 트랜잭션에서 씀)
+
+
+# 제자리에서 수정될 수 없어 복사하지 않아도 되는 값의 타입
+_IMMUTABLE = (int, float, str, bool, type(None), date, datetime)
+
+
+def _capture(user: User) -> Dict[str, Any]:
+    # 퀘스트 진행도, 업적 목록처럼 제자리에서 수정되는 값만 깊은 복사
+    state = {}
+    for name in CACHED_COLUMNS + tuple(COLLECTIONS):
+        value = getattr(user, name)
+        state[name] = value if isinstance(value, _IMMUTABLE) else copy.deepcopy(value)
+    return state
+
+
+class UserCache:
+    """유저 상태 write-behind 캐시 (LRU 제거 + 변경 추적 + 주기적 일괄 반영)"""
+
+    def __init__(self, max_size: int = 10000, flush_interval: float = 5.0):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._dirty = set()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.flush_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, user_id: int, loader: Callable[[int], Awaitable[User]]) -> User:
+        """캐시에서 유저를 꺼내고, 없으면 loader로 불러와 저장합니다."""
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry.user
+
+        self.misses += 1
+        user = await loader(user_id)
+        # 불러오는 동안 다른 요청이 먼저 채웠다면 그 객체를 사용
+        entry = self._entries.get(user_id)
+        if entry is None:
+            entry = _Entry(user)
+            self._entries[user_id] = entry
+            # 방금 불러온 항목은 호출자가 바로 사용하므로 제거 대상에서 제외
+            self._evict(keep=user_id)
+        return entry.user
+
+    def peek(self, user_id: int) -> Optional[User]:
+        """DB 조회 없이 캐시에 있는 유저만 반환합니다."""
+        entry = self._entries.get(user_id)
+        return entry.user if entry is not None else None
+
+    def backup(self, user: User) -> Dict[str, Any]:
+        """restore() 로 되돌릴 수 있도록 유저 상태를 복사합니다."""
+        return _capture(user)
+
+    def restore(self, user_id: int, state: Dict[str, Any]):
+        """캐시의 유저 객체를 backup() 한 값으로 되돌립니다. (그 사이 반영되었을 수 있으므로 다시 변경 표시)"""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return
+        for name, value in state.items():
+            setattr(entry.user, name, value)
+        self.mark_dirty(user_id)
+
+    def mark_dirty(self, user_id: int, ledger_rows=()):
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return
+        entry.version += 1
+        entry.ledger.extend(ledger_rows)
+        self._dirty.add(user_id)
+        self._ensure_task()
+
+    def _evict(self, keep: Optional[int] = None):
+        if len(self._entries) <= self.max_size:
+            return
+        # 아직 반영되지 않은 항목은 건너뛰고 오래된 순으로 제거
+        for user_id in list(self._entries):
+            if len(self._entries) <= self.max_size:
+                break
+            if user_id in self._dirty or user_id == keep:
+                continue
+            del self._entries[user_id]
+            # 게임 난수 스트림도 유저 캐시와 함께 버림
+            game_rng.forget(user_id)
+            self.evictions += 1
+
+    async def flush(self) -> int:
+        """변경된 유저 상태를 일괄 반영하고 반영한 행 수를 반환합니다. (실패하면 로그를 남기고 0)"""
+        try:
+            return await self._flush()
+        except Exception as e:
+            self.flush_errors += 1
+            print(f"[Cache] ❌ 유저 상태 반영 실패: {e}")
+            return 0
+
+    async def _flush(self) -> int:
+        async with self._flush_lock:
+            if not self._dirty:
+                return 0
+
+            # 테이블별로 나눈 뒤 변경된 컬럼 조합별로 묶어 executemany 로 전송
+            # (잔고만 바뀐 유저는 wallet 행만 다시 씀)
+            pending = []
+            groups: Dict[tuple, list] = {}
+            collections: Dict[str, dict] = {}
+            ledger_rows = []
+            for user_id in list(self._dirty):
+                entry = self._entries[user_id]
+                current = _capture(entry.user)
+                ledger_rows.extend(entry.ledger)
+                changed: Dict[Any, list] = {}
+                for k in CACHED_COLUMNS:
+                    if current[k] != entry.snapshot[k]:
+                        changed.setdefault(COLUMN_TABLES[k], []).append(k)
+                pending.append((user_id, entry, current, entry.version, len(entry.ledger)))
+                for table, columns in changed.items():
+                    row = {"b_user_id": user_id}
+                    row.update({f"b_{k}": current[k] for k in columns})
+                    groups.setdefault((table, tuple(columns)), []).append(row)
+                for name in COLLECTIONS:
+                    if current[name] != entry.snapshot[name]:
+                        collections.setdefault(name, {})[user_id] = current[name]
+
+            async def write(session):
+                for (table, columns), rows in groups.items():
+                    stmt = (
+                        update(table)
+                        .where(table.c.user_id == bindparam("b_user_id"))
+                        .values({k: bindparam(f"b_{k}") for k in columns})
+                    )
+                    await session.execute(stmt, rows)
+                for name, changed_users in collections.items():
+                    await COLLECTIONS[name](session, changed_users)
+                await Ledger.get_instance().write(session, ledger_rows)
+
+            if groups or collections or ledger_rows:
+                await WriteQueue.get_instance().run(write)
+
+            for user_id, entry, current, version, written in pending:
+                entry.snapshot = current
+                del entry.ledger[:written]
+                # 반영 도중 다시 변경되었다면 다음 주기에 반영
+                if entry.version == version:
+                    self._dirty.discard(user_id)
+
+            rows = sum(len(r) for r in groups.values()) + sum(len(c) for c in collections.values())
+            self.flushes += 1
+            self.flushed_rows += rows
+            self._evict()
+            return rows
+
+    def _ensure_task(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        # flush_interval 이 0이면 같은 틱에 쌓인 변경만 묶어 바로 반영 (write-through)
+        # DB 오류가 계속되면 대기 시간을 늘려 가며 다시 시도하여 이벤트 루프를 붙잡지 않도록 함
+        delay = self.flush_interval
+        while self._dirty:
+            await asyncio.sleep(delay)
+            try:
+                # 취소되어도 진행 중인 반영은 끝까지 진행 (close() 가 잠금을 기다려 이어서 반영)
+                await asyncio.shield(self._flush())
+            except Exception as e:
+                self.flush_errors += 1
+                delay = min(max(delay * 2, FLUSH_RETRY_MIN), FLUSH_RETRY_MAX)
+                print(f"[Cache] ❌ 유저 상태 반영 실패 ({len(self._dirty)}명 대기, {delay:.0f}초 후 다시 시도): {e}")
+            else:
+                delay = self.flush_interval
+
+    async def close(self):
+        """주기 반영 작업을 멈추고 남은 변경 사항을 모두 반영합니다."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "dirty": len(self._dirty),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "flush_errors": self.flush_errors,
+        }
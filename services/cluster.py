@@ -0,0 +1,98 @@
+import asyncio
+import threading
+from typing import Any, Callable, Dict
+
+
+class ClusterBus:
+    """클러스터 워커 간 메시지 채널
+
+    launcher.py 가 워커마다 받은 편지함(inbox)과 공용 보낸 편지함(outbox)을 만들어 중계합니다.
+    단일 프로세스로 실행하면 attach() 가 호출되지 않으므로 publish() 는 아무 일도 하지 않습니다.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ClusterBus, cls).__new__(cls)
+            cls._instance.cluster_id = None
+            cls._instance._inbox = None
+            cls._instance._outbox = None
+            cls._instance._handlers = {}
+            cls._instance._loop = None
+            cls._instance.sent = 0
+            cls._instance.received = 0
+        return cls._instance
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls()
+        return cls._instance
+
+    @property
+    def enabled(self) -> bool:
+        return self._outbox is not None
+
+    def attach(self, cluster_id: int, inbox, outbox):
+        """워커 프로세스 시작 시 launcher 가 넘겨준 큐를 연결합니다."""
+        self.cluster_id = cluster_id
+        self._inbox = inbox
+        self._outbox = outbox
+
+    def subscribe(self, topic: str, handler: Callable[..., Any]):
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def publish(self, topic: str, *payload):
+        """다른 모든 워커에게 메시지를 보냅니다."""
+        if self._outbox is None:
+            return
+        self._outbox.put((self.cluster_id, topic, payload))
+        self.sent += 1
+
+    def start(self):
+        """받은 편지함을 읽는 스레드를 시작합니다. (이벤트 루프 안에서 호출)"""
+        if self._inbox is None or self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        threading.Thread(target=self._reader, name="cluster-bus", daemon=True).start()
+
+    def _reader(self):
+        while True:
+            message = self._inbox.get()
+            if message is None:
+                return
+            self._loop.call_soon_threadsafe(self._dispatch, message)
+
+    def _dispatch(self, message):
+        sender, topic, payload = message
+        self.received += 1
+        for handler in self._handlers.get(topic, []):
+            try:
+                handler(*payload)
+            except Exception as e:
+                print(f"[Cluster] ❌ '{topic}' 메시지 처리 실패 (from {sender}): {e}")
+
+
+def setup_cluster_sync():
+    """프로세스별 랭킹을 다른 워커와 동기화하도록 연결합니다."""
+    from services.quest import EconomyService
+    from services.upgrade_service import UpgradeService
+
+    bus = ClusterBus.get_instance()
+    if not bus.enabled:
+        return
+    economy = EconomyService.get_instance()
+    upgrade = UpgradeService.get_instance()
+
+    # 유저 상태는 캐시 없이 행 잠금을 잡고 DB에서 바로 읽고 쓰므로 (config.USER_CACHE_SIZE) 전파할 것이 없음
+    if economy.cache.enabled:
+        raise RuntimeError("클러스터 모드에서는 유저 상태 캐시를 쓸 수 없습니다.")
+
+    # 랭킹 점수 변화 전파
+    boards: Dict[str, Any] = {"gambling": economy.gambling_board, "gear": upgrade.gear_board}
+    for name, board in boards.items():
+        board.listeners.append(lambda user_id, score, extra, name=name: bus.publish("rank", name, user_id, score, extra))
+    bus.subscribe("rank", lambda name, user_id, score, extra: boards[name].update(user_id, score, *extra, notify=False))
+
+    bus.start()
+    print(f"[Cluster] ✅ 클러스터 {bus.cluster_id} 동기화 채널 연결")
@@ -1,8 +1,11 @@
 import os
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy import Column, String, BigInteger, Integer, Float, JSON, DateTime, Date
+from sqlalchemy.orm import sessionmaker, declarative_base, column_property
+from sqlalchemy import Table, Column, String, BigInteger, Integer, Float, JSON, DateTime, Date, Index
+from sqlalchemy.engine import make_url
 import config
+from services.pool import InstrumentedPool, pool_telemetry
+from services.metrics import instrument_engine
 
 # 1. 환경 변수에서 DATABASE_URL을 가져오되, Railway 설정을 우선합니다.
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -22,15 +25,69 @@ if DATABASE_URL and not DATABASE_URL.startswith("sqlite"):
     
     print(f"[DB] PostgreSQL 모드로 연결 시도")
 else:
-    # 로컬 테스트용 (SQLite 비동기 드라이버 사용)
-    DATABASE_URL = "sqlite+aiosqlite:///./stella.db"
-    print(f"[DB] SQLite 모드로 연결 (로컬)")
+    # 로컬 테스트용 (SQLite 비동기 드라이버 사용, 경로를 지정하지 않으면 ./stella.db)
+    DATABASE_URL = DATABASE_URL or "sqlite+aiosqlite:///./stella.db"
+    if not DATABASE_URL.startswith("sqlite+aiosqlite"):
+        DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    print(f"[DB] SQLite 모드로 연결 (로컬, 성능 모드={config.SQLITE_PERFORMANCE_MODE})")
 
 # 3. SQLAlchemy 설정
+def uses_queue_pool(url: str) -> bool:
+    """SQLAlchemy 가 이 주소에 QueuePool 을 쓰는지 (SQLite 메모리 DB 는 연결 하나를 공유하는 StaticPool)"""
+    url = make_url(url)
+    if url.get_backend_name() != "sqlite":
+        return True
+    return url.database not in (None, "", ":memory:") and url.query.get("mode") != "memory"
+
+def engine_options(url: str) -> dict:
+    """config.py 의 커넥션 풀 설정을 create_async_engine 인자로 변환합니다."""
+    options = {"echo": False, "pool_pre_ping": config.DB_POOL_PRE_PING}
+    if uses_queue_pool(url):
+        # 대기 시간 계측 풀은 QueuePool 을 쓰는 엔진에만 설치
+        options.update({
+            "poolclass": InstrumentedPool,
+            "pool_size": config.DB_POOL_SIZE,
+            "max_overflow": config.DB_MAX_OVERFLOW,
+            "pool_timeout": config.DB_POOL_TIMEOUT,
+            "pool_recycle": config.DB_POOL_RECYCLE,
+        })
+    if url.startswith("postgresql+asyncpg"):
+        options["connect_args"] = {"prepared_statement_cache_size": config.DB_STATEMENT_CACHE_SIZE}
+        if config.DB_STATEMENT_CACHE_SIZE == 0:
+            # PgBouncer 트랜잭션 모드에서는 asyncpg 자체 구문 캐시도 꺼야 합니다.
+            options["connect_args"]["statement_cache_size"] = 0
+    return options
+
+def enable_sqlite_performance_mode(engine):
+    """새 SQLite 연결마다 WAL 및 성능 관련 PRAGMA 를 적용합니다."""
+    from sqlalchemy import event
+
+    pragmas = [
+        "PRAGMA journal_mode=WAL",  # 읽기와 쓰기가 서로 막지 않음
+        f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA cache_size=-{config.SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE}",
+        f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
 engine = None
 try:
-    engine = create_async_engine(DATABASE_URL, echo=False, pool_pre_ping=True)
-    print("[DB] ✅ 엔진 생성 성공")
+    engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+    pool_telemetry.slow_ms = config.DB_POOL_SLOW_MS
+    pool_telemetry.attach(engine)
+    if engine.dialect.name == "sqlite" and config.SQLITE_PERFORMANCE_MODE:
+        enable_sqlite_performance_mode(engine)
+    if config.METRICS_ENABLED:
+        instrument_engine(engine)
+    print(f"[DB] ✅ 엔진 생성 성공 (풀 {config.DB_POOL_SIZE}+{config.DB_MAX_OVERFLOW}, pre_ping={config.DB_POOL_PRE_PING})")
 except Exception as e:
     print(f"[DB] ❌ 데이터베이스 엔진 생성 실패: {e}")
     print(f"[DB] 사용된 URL: {DATABASE_URL[:50]}...")  # URL 일부만 출력 (보안)
@@ -44,68 +101,127 @@ AsyncSessionLocal = sessionmaker(
 
 Base = declarative_base()
 
+def insert_ignore(session, entity):
+    """중복 키를 무시하는 방언별 INSERT 구문을 반환합니다.
+
+    PostgreSQL은 ON CONFLICT DO NOTHING, SQLite는 INSERT OR IGNORE 를 사용합니다.
+    (ON CONFLICT 구문은 SQLAlchemy 컴파일 캐시에 저장되지 않으므로 SQLite에서는 접두어 방식 사용)
+    """
+    if session.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert(entity).on_conflict_do_nothing()
+    from sqlalchemy import insert
+    return insert(entity).prefix_with("OR IGNORE", dialect="sqlite")
+
 # 유저 테이블 정의
+# 자주 바뀌는 값(잔고, 도박 전적, 장비)은 좁은 테이블로 나누어, 잔고가 바뀌어도
+# JSON 이 들어 있는 프로필 행을 다시 쓰지 않도록 합니다.
+
+# 프로필 (드물게 변경)
+users_table = Table(
+    "users", Base.metadata,
+    Column("user_id", BigInteger, primary_key=True),       # 디스코드 유저 ID
+    Column("achievements", JSON, default=list),            # 업적 리스트
+    Column("last_claim_time", DateTime, nullable=True),    # 마지막 지원금 수령 시간
+    Column("last_attendance_date", Date, nullable=True),   # 마지막 출석 날짜
+    Column("attendance_streak", Integer, default=0),       # 연속 출석 일수
+)
+
+# 잔고
+wallet_table = Table(
+    "wallet", Base.metadata,
+    Column("user_id", BigInteger, primary_key=True),
+    Column("balance", Integer, default=0),                 # 잔고
+)
+
+# 도박 전적
+gamble_stats_table = Table(
+    "gamble_stats", Base.metadata,
+    Column("user_id", BigInteger, primary_key=True),
+    Column("wins", Integer, default=0),                    # 승리 횟수
+    Column("losses", Integer, default=0),                  # 패배 횟수
+    Column("streak", Integer, default=0),                  # 연속 승리
+    Column("max_risk_win", Float, default=0.0),            # 최고 리스크 승리
+    Column("max_gambling_win", Integer, default=0),        # 도박 최고 당첨금
+    Column("total_gambling_win", Integer, default=0),      # 도박 누적 당첨금
+)
+Index("ix_gamble_stats_total_gambling_win", gamble_stats_table.c.total_gambling_win.desc())
+
+# 장비
+gear_table = Table(
+    "gear", Base.metadata,
+    Column("user_id", BigInteger, primary_key=True),
+    Column("gear_level", Integer, default=1),              # 현재 장비 레벨
+    Column("max_gear_level", Integer, default=1),          # 역대 최고 장비 레벨
+    Column("gear_name", String, default="기본 장비"),       # 장비 이름
+)
+Index("ix_gear_gear_level", gear_table.c.gear_level.desc())
+
+# 한 유저의 상태를 이루는 테이블들 (users 가 먼저 생성되어야 함)
+USER_TABLES = (users_table, wallet_table, gamble_stats_table, gear_table)
+
+# 서비스 코드에서는 네 테이블을 합친 하나의 User 객체로 다룹니다.
 class User(Base):
-    __tablename__ = "users"
-
-    user_id = Column(BigInteger, primary_key=True) # 디스코드 유저 ID
-    balance = Column(Integer, default=0)           # 잔고
-    wins = Column(Integer, default=0)              # 승리 횟수
-    losses = Column(Integer, default=0)            # 패배 횟수
-    streak = Column(Integer, default=0)            # 연속 승리
-    max_risk_win = Column(Float, default=0.0)      # 최고 리스크 승리
-    achievements = Column(JSON, default=list)      # 업적 리스트
-    warnings = Column(JSON, default=list)          # 경고 리스트
-    active_quest = Column(JSON, nullable=True)     # 진행 중인 퀘스트
-    gear_level = Column(Integer, default=1)        # 현재 장비 레벨
-    max_gear_level = Column(Integer, default=1)    # 역대 최고 장비 레벨
-    gear_name = Column(String, default="기본 장비") # 장비 이름
-    max_gambling_win = Column(Integer, default=0)   # 도박 최고 당첨금
-    total_gambling_win = Column(Integer, default=0) # 도박 누적 당첨금
-    last_claim_time = Column(DateTime, nullable=True) # 마지막 지원금 수령 시간
-    last_attendance_date = Column(Date, nullable=True) # 마지막 출석 날짜
-    attendance_streak = Column(Integer, default=0)     # 연속 출석 일수
+    __table__ = (
+        users_table
+        .join(wallet_table, users_table.c.user_id == wallet_table.c.user_id)
+        .join(gamble_stats_table, users_table.c.user_id == gamble_stats_table.c.user_id)
+        .join(gear_table, users_table.c.user_id == gear_table.c.user_id)
+    )
+
+    user_id = column_property(*(table.c.user_id for table in USER_TABLES))
+
+    # 진행 중인 퀘스트 {quest_type: dict} (매핑되지 않는 속성, services/quests.py 가 불러오고 저장)
+    quests = None
+
+# 경고 테이블 정의 (서버별)
+class WarningRecord(Base):
+    __tablename__ = "warnings"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    guild_id = Column(BigInteger, nullable=False)      # 서버 ID (JSON 시절 기록은 0)
+    user_id = Column(BigInteger, nullable=False)       # 대상 유저 ID
+    moderator_id = Column(BigInteger, nullable=False)  # 처리자 ID
+    reason = Column(String, nullable=False)            # 사유
+    created_at = Column(DateTime, nullable=False)      # 부여 시각
+
+    # 서버+유저별 시간순 조회 / 개수 / 일괄 삭제용
+    __table_args__ = (
+        Index("ix_warnings_guild_user_created", guild_id, user_id, created_at),
+    )
+
+# 진행 중인 퀘스트 (유저당 종류별로 하나, 완료/실패/취소 시 삭제)
+quests_table = Table(
+    "quests", Base.metadata,
+    Column("user_id", BigInteger, primary_key=True),
+    Column("quest_type", String, primary_key=True),        # services/quests.py 의 QUEST_TYPES 키
+    Column("target", BigInteger, nullable=False),          # 목표치
+    Column("current", BigInteger, nullable=False),         # 진행도
+    Column("reward", BigInteger, nullable=False),          # 성공 보상
+    Column("penalty", BigInteger, nullable=False),         # 실패 페널티 (없으면 0)
+    Column("created_at", DateTime, nullable=False),        # 부여 시각
+)
+
+# 잔고 변동 기록 (추가 전용)
+ledger_table = Table(
+    "ledger", Base.metadata,
+    Column("id", BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True),
+    Column("user_id", BigInteger, nullable=False),
+    Column("amount", BigInteger, nullable=False),          # 변동량 (음수면 차감)
+    Column("balance_after", BigInteger, nullable=False),   # 변동 후 잔고
+    Column("reason", String, nullable=False),              # 변동 사유 (signup, gamble_bet, upgrade ...)
+    Column("created_at", DateTime, nullable=False),
+)
+Index("ix_ledger_user_id", ledger_table.c.user_id, ledger_table.c.id)
 
 # DB 초기화 함수
 async def init_db():
-    from sqlalchemy import text
+    from services.migrations import migrate
     try:
-        # 1. 기존 테이블 생성 (없을 경우에만 작동)
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        
-        # 2. 부족한 컬럼 강제 추가 (이미 있으면 무시됨)
-        # PostgreSQL은 'IF NOT EXISTS'를 지원하지만, SQLite는 지원하지 않으므로 
-        # 개별 쿼리 단위로 시도하여 모든 환경에서 안전하게 작동하도록 합니다.
-        is_postgres = "postgresql" in DATABASE_URL.lower()
-        
-        columns = [
-            ("gear_level", "INTEGER DEFAULT 1"),
-            ("max_gear_level", "INTEGER DEFAULT 1"),
-            ("gear_name", "VARCHAR DEFAULT '기본 장비'"),
-            ("max_gambling_win", "INTEGER DEFAULT 0"),
-            ("total_gambling_win", "INTEGER DEFAULT 0"),
-            ("last_claim_time", "TIMESTAMP"),
-            ("last_attendance_date", "DATE"),
-            ("attendance_streak", "INTEGER DEFAULT 0")
-        ]
-
-        async with engine.connect() as conn:
-            for col_name, col_type in columns:
-                try:
-                    if is_postgres:
-                        # PostgreSQL: IF NOT EXISTS 문법 사용
-                        await conn.execute(text(f"ALTER TABLE users ADD COLUMN IF NOT EXISTS {col_name} {col_type};"))
-                    else:
-                        # SQLite: IF NOT EXISTS가 없으므로 직접 시도 후 실패 시 무시
-                        await conn.execute(text(f"ALTER TABLE users ADD COLUMN {col_name} {col_type};"))
-                    await conn.commit()
-                except Exception:
-                    # 컬럼이 이미 존재하는 경우 등 에러 발생 시 무시하고 다음 컬럼 진행
-                    pass
-            
-        print("[DB] ✅ 누락된 컬럼 체크 및 추가 완료")
-        print("✅ 데이터베이스 초기화 및 마이그레이션 완료")
+        # 스키마는 services/migrations.py 의 버전별 마이그레이션으로 관리합니다.
+        # 최신 버전이면 schema_version 조회 한 번으로 끝납니다.
+        version = await migrate(engine)
+        print(f"✅ 데이터베이스 초기화 완료 (스키마 버전 {version})")
     except Exception as e:
         print(f"❌ 데이터베이스 초기화 실패: {e}")
         # gaierror 등 연결 오류 발생 시 여기서 캐치됨
@@ -0,0 +1,134 @@
+import asyncio
+from bisect import bisect_left, insort
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+import config
+
+
+class RankBoard:
+    """점수 내림차순 상위 순위표 (증분 갱신 + 내 순위 조회)
+
+    처음 조회할 때 loader로 DB에서 상위 size명만 불러오고, 이후에는 점수가 바뀔 때마다
+    update()로 갱신하여 랭킹 조회 시 DB를 사용하지 않습니다.
+    순위표는 항상 "전체 유저 중 정확한 상위 len(self)명"을 유지합니다. 표 밖의 유저는 표의 마지막
+    항목보다 앞설 때만 들어오고, 표 안의 유저가 마지막 항목 뒤로 밀려나면 (표 밖의 유저와의 순서를
+    알 수 없으므로) 표에서 빠집니다. 표가 요청한 인원보다 작아지면 다시 불러옵니다.
+    표 밖 유저의 순위는 scorer로 점수를 읽은 뒤 counter로 DB에서 (점수 인덱스를 쓰는) COUNT 한 번으로 계산합니다.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[int], Awaitable[Iterable[tuple]]],
+        scorer: Callable[[int], Awaitable[Optional[int]]],
+        counter: Callable[[int], Awaitable[int]],
+        min_score: int = 0,
+        size: Optional[int] = None,
+    ):
+        # loader(limit): 점수 내림차순(동점은 user_id 오름차순) 상위 limit개의 (user_id, score, *extra) 행
+        # scorer(user_id): 유저의 현재 점수, counter(score): 점수가 score 보다 높은 유저 수
+        self._loader = loader
+        self._scorer = scorer
+        self._counter = counter
+        self.min_score = min_score         # 이 점수 이하는 순위에서 제외
+        self.size = size or config.RANK_BOARD_SIZE
+        self._order: List[Tuple[int, int]] = []  # (-score, user_id) 오름차순 정렬
+        self._scores: Dict[int, int] = {}
+        self._extra: Dict[int, tuple] = {}
+        self._pending: Dict[int, tuple] = {}  # 불러오기 전에 들어온 갱신
+        self._loaded = False
+        self._complete = False  # 순위에 들 수 있는 유저가 모두 표에 있는지
+        self._load_lock = asyncio.Lock()
+        self.listeners = []  # (user_id, score, extra) 를 받는 콜백 (클러스터 동기화용)
+        self.reloads = 0
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def update(self, user_id: int, score: int, *extra, notify: bool = True):
+        """유저 점수(와 표시용 부가 정보)를 갱신합니다."""
+        if notify:
+            for listener in self.listeners:
+                listener(user_id, score, extra)
+        if not self._loaded:
+            self._pending[user_id] = (score, extra)
+            return
+        self._apply(user_id, score, extra)
+
+    def _apply(self, user_id: int, score: int, extra: tuple):
+        old = self._scores.get(user_id)
+        if old == score:
+            self._extra[user_id] = extra
+            return
+        if old is not None:
+            self._remove(user_id, old)
+        if score <= self.min_score:
+            return
+        key = (-score, user_id)
+        # 표 밖에 더 높은 유저가 있을 수 있으면 마지막 항목보다 앞설 때만 넣음
+        if not self._complete and (not self._order or key > self._order[-1]):
+            return
+        insort(self._order, key)
+        self._scores[user_id] = score
+        self._extra[user_id] = extra
+        if len(self._order) > self.size:
+            _, last = self._order.pop()
+            del self._scores[last]
+            self._extra.pop(last, None)
+            self._complete = False
+
+    def _remove(self, user_id: int, score: int):
+        del self._order[bisect_left(self._order, (-score, user_id))]
+        del self._scores[user_id]
+        self._extra.pop(user_id, None)
+
+    async def _ensure_loaded(self):
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded:
+                return
+            # 한 명 더 불러와 표 밖에 유저가 남아 있는지 확인
+            rows = list(await self._loader(self.size + 1))
+            self._complete = len(rows) <= self.size
+            for user_id, score, *extra in rows[:self.size]:
+                if score is not None and score > self.min_score:
+                    self._scores[user_id] = score
+                    self._extra[user_id] = tuple(extra)
+            self._order = sorted((-score, user_id) for user_id, score in self._scores.items())
+            self._loaded = True
+            self.reloads += 1
+            # 불러오는 동안 들어온 갱신이 DB 값보다 최신
+            pending, self._pending = self._pending, {}
+            for user_id, (score, extra) in pending.items():
+                self._apply(user_id, score, extra)
+
+    async def top(self, n: int = 10) -> List[tuple]:
+        """상위 n명(최대 size명)의 (user_id, score, *extra) 목록을 반환합니다."""
+        await self._ensure_loaded()
+        n = min(n, self.size)
+        if len(self._order) < n and not self._complete:
+            # 표에서 빠진 유저가 많아 상위 n명을 채울 수 없으면 다시 불러옴
+            self.reset()
+            await self._ensure_loaded()
+        return [(user_id, -neg, *self._extra[user_id]) for neg, user_id in self._order[:n]]
+
+    async def rank(self, user_id: int) -> Optional[int]:
+        """유저의 순위(동점자는 같은 순위)를 반환합니다. 순위에 없으면 None"""
+        await self._ensure_loaded()
+        score = self._scores.get(user_id)
+        if score is not None:
+            return bisect_left(self._order, (-score,)) + 1
+        if self._complete:
+            return None
+        score = await self._scorer(user_id)
+        if score is None or score <= self.min_score:
+            return None
+        return await self._counter(score) + 1
+
+    def reset(self):
+        """다음 조회 때 DB에서 다시 불러오도록 초기화합니다."""
+        self._order = []
+        self._scores.clear()
+        self._extra.clear()
+        self._pending.clear()
+        self._loaded = False
+        self._complete = False
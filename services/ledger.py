@@ -0,0 +1,139 @@
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import insert
+from services.db import ledger_table
+from services.writer import WriteQueue
+import config
+
+# INSERT 에 사용하는 컬럼 순서 (id 는 DB가 부여)
+LEDGER_COLUMNS = ("user_id", "amount", "balance_after", "reason", "created_at")
+
+# 현재 작업(task)이 잔고를 바꾸는 트랜잭션 안에 있으면 (작업, 모아 둔 기록)
+# (이 안에서 만든 백그라운드 작업에도 값이 복사되므로 작업이 같은지 함께 확인)
+_staged: ContextVar[Optional[Tuple[asyncio.Task, List[Tuple]]]] = ContextVar("stella_ledger_staged", default=None)
+
+
+class Ledger:
+    """잔고 변동 기록 (추가 전용)
+
+    잔고 변경은 transaction() 안에서 기록을 모았다가, 잔고를 바꾼 트랜잭션에서 함께 씁니다(write).
+    그래서 잔고만 반영되고 기록이 빠지는(또는 그 반대) 경우가 없습니다.
+    트랜잭션 밖에서 남긴 기록만 메모리 버퍼에 모았다가 백그라운드 작업이 주기적으로
+    (또는 버퍼가 가득 차면 바로) executemany 로 한 번에 기록하며, 이 기록은 잔고와 따로 반영됩니다.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Ledger, cls).__new__(cls)
+            cls._instance.flush_interval = config.LEDGER_FLUSH_INTERVAL
+            cls._instance.batch_size = config.LEDGER_BATCH_SIZE
+            cls._instance._buffer: List[Tuple] = []
+            cls._instance._flush_lock = asyncio.Lock()
+            cls._instance._full = asyncio.Event()
+            cls._instance._task: Optional[asyncio.Task] = None
+            cls._instance.recorded = 0
+            cls._instance.flushed = 0
+            cls._instance.flush_errors = 0
+        return cls._instance
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls()
+        return cls._instance
+
+    def record(self, user_id: int, amount: int, reason: str, balance_after: int):
+        """잔고 변동을 현재 트랜잭션(없으면 버퍼)에 추가합니다. (DB 작업 없음)"""
+        if amount == 0:
+            return
+        self.recorded += 1
+        self._add((user_id, amount, balance_after, reason, datetime.now()))
+
+    def _add(self, row: Tuple):
+        staged = _staged.get()
+        if staged is not None and staged[0] is asyncio.current_task():
+            staged[1].append(row)
+            return
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_size:
+            self._full.set()
+        self._ensure_task()
+
+    @contextmanager
+    def transaction(self) -> Iterator[List[Tuple]]:
+        """블록 안에서 record() 한 기록을 버퍼 대신 돌려주는 목록에 모읍니다.
+
+        호출자는 모인 기록을 잔고를 바꾼 트랜잭션에서 write() 로 쓰고 목록을 비웁니다.
+        블록이 예외로 끝나면 모인 기록을 버리고, 정상 종료 시 남아 있는 기록은 바깥
+        트랜잭션(없으면 버퍼)으로 넘깁니다.
+        """
+        rows: List[Tuple] = []
+        token = _staged.set((asyncio.current_task(), rows))
+        try:
+            yield rows
+        finally:
+            _staged.reset(token)
+        for row in rows:
+            self._add(row)
+
+    async def write(self, session, rows: List[Tuple]):
+        """기록을 세션의 트랜잭션에서 추가합니다. (커밋은 호출자가 함)"""
+        if rows:
+            await session.execute(insert(ledger_table), [dict(zip(LEDGER_COLUMNS, row)) for row in rows])
+
+    def _ensure_task(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while self._buffer:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            # 취소되어도 진행 중인 기록은 끝까지 진행 (close() 가 잠금을 기다려 이어서 반영)
+            await asyncio.shield(self.flush())
+
+    async def flush(self) -> int:
+        """쌓인 기록을 DB에 추가하고 기록한 행 수를 반환합니다."""
+        async with self._flush_lock:
+            if not self._buffer:
+                return 0
+            rows, self._buffer = self._buffer, []
+            try:
+                await WriteQueue.get_instance().run(lambda session: self.write(session, rows))
+            except Exception as e:
+                # 실패한 기록은 버퍼 앞에 되돌려 다음 주기에 다시 시도
+                self._buffer[:0] = rows
+                self.flush_errors += 1
+                print(f"[Ledger] ❌ 잔고 기록 실패 ({len(rows)}건 대기): {e}")
+                return 0
+            self.flushed += len(rows)
+            return len(rows)
+
+    async def close(self):
+        """주기 기록 작업을 멈추고 남은 기록을 모두 반영합니다.
+
+        진행 중이던 기록은 취소되지 않으므로 flush() 가 그 기록이 끝나기를 기다린 뒤 나머지를 반영합니다.
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._buffer),
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "flush_errors": self.flush_errors,
+        }
@@ -0,0 +1,76 @@
+import asyncio
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Hashable
+
+
+class KeyedLock:
+    """키(유저 ID 등)별 asyncio.Lock 모음
+
+    잠금 객체는 WeakValueDictionary 에 보관되므로, 잡고 있거나 기다리는 작업이 없어지면
+    자동으로 사라져 사용한 적 있는 모든 키가 메모리에 남지 않습니다.
+    asyncio.Lock 은 재진입이 되지 않으므로 같은 키를 잡은 상태에서 다시 잡으면 멈춥니다.
+    """
+
+    def __init__(self, name: str = "lock", slow_ms: float = 100.0, warn_interval: float = 10.0):
+        self.name = name
+        self.slow_ms = slow_ms
+        self.warn_interval = warn_interval
+        self._locks: "weakref.WeakValueDictionary[Hashable, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._last_warning = float("-inf")
+        self.acquisitions = 0
+        self.contended = 0      # 다른 작업이 잡고 있어 기다린 횟수
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.waiting = 0        # 현재 기다리는 작업 수
+        self.peak_waiting = 0
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable):
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[key] = lock
+
+        self.acquisitions += 1
+        if lock.locked():
+            self.contended += 1
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+            start = time.perf_counter()
+            try:
+                await lock.acquire()
+            finally:
+                self.waiting -= 1
+            self._record_wait(key, time.perf_counter() - start)
+        else:
+            await lock.acquire()
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def _record_wait(self, key: Hashable, seconds: float):
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        if seconds * 1000 >= self.slow_ms:
+            now = time.monotonic()
+            if now - self._last_warning >= self.warn_interval:
+                self._last_warning = now
+                print(f"[Lock] ⚠️ {self.name} {key} 대기 {seconds * 1000:.0f}ms (현재 대기 {self.waiting}건)")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys": len(self._locks),
+            "acquisitions": self.acquisitions,
+            "contended": self.contended,
+            "contention_rate": self.contended / self.acquisitions if self.acquisitions else 0.0,
+            "wait_avg_ms": self.wait_total / self.contended * 1000 if self.contended else 0.0,
+            "wait_max_ms": self.wait_max * 1000,
+            "waiting": self.waiting,
+            "peak_waiting": self.peak_waiting,
+        }
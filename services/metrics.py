@@ -0,0 +1,401 @@
+import asyncio
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+import discord
+from discord import app_commands
+import config
+
+# 지연 시간 구간 경계(초) - Prometheus 히스토그램의 le 값
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PHASES = ("total", "db", "http", "handler")
+
+
+class Histogram:
+    """고정 구간 히스토그램 (구간별 개수 + 합계)"""
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """구간 안에서 선형 보간한 분위수 추정값 (초)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = BUCKETS[i - 1] if i > 0 else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+
+class QueryBudgetExceeded(AssertionError):
+    """QUERY_BUDGET_STRICT 모드에서 명령어가 쿼리 예산을 넘었을 때 발생합니다."""
+
+
+def query_budget(limit: int):
+    """명령어/UI 콜백이 한 번에 실행해도 되는 SQL 문장 수를 선언합니다.
+
+    app_commands.command / discord.ui.button 등의 데코레이터 아래(함수에 가까운 쪽)에 붙입니다.
+    선언하지 않은 명령어는 QUERY_BUDGET_DEFAULT 를 사용합니다.
+    """
+    def decorator(func):
+        func.__query_budget__ = limit
+        return func
+    return decorator
+
+
+class _Timing:
+    """명령어 하나를 처리하는 동안 쌓이는 DB/HTTP 시간과 실행한 SQL 문장"""
+    __slots__ = ("db", "http", "task", "queries", "statements", "count_db_time")
+
+    def __init__(self):
+        self.db = 0.0
+        self.http = 0.0
+        self.task = asyncio.current_task()
+        self.queries = 0
+        self.statements: Dict[str, List] = {}  # SQL 문장 -> [실행 횟수, 합계 시간(초)]
+        self.count_db_time = True
+
+
+_current: ContextVar[Optional[_Timing]] = ContextVar("stella_command_timing", default=None)
+
+
+class CommandMetrics:
+    """명령어/UI 콜백별 지연 시간 (전체, DB, 디스코드 HTTP, 나머지 처리 시간)
+
+    DB/HTTP 시간은 contextvars 로 현재 처리 중인 명령어에 더해집니다. 명령어 처리 중에 만들어진
+    백그라운드 작업(캐시 반영 등)도 같은 컨텍스트를 물려받으므로, 시작한 작업(task)에서
+    발생한 시간만 더합니다.
+
+    SQL 문장도 같은 방식으로 명령어별로 세어, 쿼리 예산(query_budget)을 넘거나 같은 문장을
+    반복 실행(N+1)하는 명령어를 경고합니다. strict 이면 예산 초과 시 QueryBudgetExceeded 를 발생시킵니다.
+    """
+
+    def __init__(self, enabled: bool = True, default_budget: int = 0, repeat_limit: int = 0,
+                 strict: bool = False, warn_interval: float = 60.0):
+        self.enabled = enabled
+        self.default_budget = default_budget  # 0이면 선언하지 않은 명령어는 검사하지 않음
+        self.repeat_limit = repeat_limit      # 0이면 반복 실행 검사를 하지 않음
+        self.strict = strict
+        self.warn_interval = warn_interval
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.errors: Dict[str, int] = {}
+        self.queries: Dict[str, Dict[str, int]] = {}
+        self._last_warning: Dict[str, float] = {}
+
+    def start(self) -> Tuple[_Timing, Any]:
+        timing = _Timing()
+        return timing, _current.set(timing)
+
+    def finish(self, name: str, timing: _Timing, token, started: float, failed: bool = False,
+               budget: Optional[int] = None):
+        _current.reset(token)
+        total = time.perf_counter() - started
+        values = (total, timing.db, timing.http, max(0.0, total - timing.db - timing.http))
+        for phase, value in zip(PHASES, values):
+            histogram = self.histograms.get((name, phase))
+            if histogram is None:
+                histogram = self.histograms[(name, phase)] = Histogram()
+            histogram.observe(value)
+        if failed:
+            self.errors[name] = self.errors.get(name, 0) + 1
+        self._check_queries(name, timing, budget)
+
+    def _check_queries(self, name: str, timing: _Timing, budget: Optional[int]):
+        stats = self.queries.get(name)
+        if stats is None:
+            stats = self.queries[name] = {"total": 0, "max": 0, "over_budget": 0, "repeated": 0}
+        stats["total"] += timing.queries
+        stats["max"] = max(stats["max"], timing.queries)
+
+        problems = []
+        limit = budget if budget is not None else self.default_budget or None
+        over = limit is not None and timing.queries > limit
+        if over:
+            stats["over_budget"] += 1
+            problems.append(f"쿼리 {timing.queries}개 (예산 {limit})")
+        if self.repeat_limit and timing.statements:
+            statement, (count, _) = max(timing.statements.items(), key=lambda item: item[1][0])
+            if count > self.repeat_limit:
+                stats["repeated"] += 1
+                problems.append(f"같은 쿼리 {count}번 반복 (N+1 의심): {_shorten(statement)}")
+        if not problems:
+            return
+
+        message = f"{name}: " + ", ".join(problems)
+        if over and self.strict:
+            raise QueryBudgetExceeded(message + "\n" + self.describe_queries(timing))
+        now = time.monotonic()
+        if now - self._last_warning.get(name, float("-inf")) >= self.warn_interval:
+            self._last_warning[name] = now
+            print(f"[Metrics] ⚠️ {message}")
+
+    @staticmethod
+    def describe_queries(timing: _Timing, limit: int = 10) -> str:
+        """명령어 하나가 실행한 SQL 문장을 횟수 순으로 나열합니다."""
+        ordered = sorted(timing.statements.items(), key=lambda item: item[1][0], reverse=True)
+        return "\n".join(
+            f"  {count:>4}회 {seconds * 1000:>8.2f}ms  {_shorten(statement)}"
+            for statement, (count, seconds) in ordered[:limit]
+        )
+
+    async def measure(self, name: str, coro, budget: Optional[int] = None):
+        """coro 를 실행하며 name 으로 시간과 쿼리 수를 기록합니다."""
+        if not self.enabled:
+            return await coro
+        timing, token = self.start()
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = await coro
+            failed = False
+            return result
+        finally:
+            self.finish(name, timing, token, started, failed, budget)
+
+    @staticmethod
+    def current() -> Optional[_Timing]:
+        """지금 작업(task)이 처리 중인 명령어 (물려받은 컨텍스트의 백그라운드 작업이면 None)"""
+        timing = _current.get()
+        return timing if timing is not None and timing.task is asyncio.current_task() else None
+
+    @contextmanager
+    def charge(self, timing: Optional[_Timing]):
+        """다른 작업(task)에서 대신 실행하는 쿼리를 timing 의 명령어에 기록합니다. (쓰기 큐 작업자용)
+
+        요청한 작업은 그동안 결과를 기다리고 있으며 그 대기 시간이 DB 시간으로 기록되므로,
+        여기서는 쿼리 수와 문장만 더합니다.
+        """
+        if timing is None:
+            yield
+            return
+        token = _current.set(timing)
+        owner, timing.task = timing.task, asyncio.current_task()
+        timing.count_db_time = False
+        try:
+            yield
+        finally:
+            timing.task = owner
+            timing.count_db_time = True
+            _current.reset(token)
+
+    @staticmethod
+    def _add(attr: str, seconds: float):
+        timing = _current.get()
+        if timing is not None and timing.task is asyncio.current_task():
+            setattr(timing, attr, getattr(timing, attr) + seconds)
+
+    def add_db(self, seconds: float):
+        self._add("db", seconds)
+
+    def add_http(self, seconds: float):
+        self._add("http", seconds)
+
+    @staticmethod
+    def add_query(statement: str, seconds: float):
+        timing = _current.get()
+        if timing is None or timing.task is not asyncio.current_task():
+            return
+        if timing.count_db_time:
+            timing.db += seconds
+        timing.queries += 1
+        entry = timing.statements.get(statement)
+        if entry is None:
+            timing.statements[statement] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """명령어별 요약 (호출 수 내림차순)"""
+        rows = []
+        for (name, phase), total in self.histograms.items():
+            if phase != "total":
+                continue
+            count = total.count
+            queries = self.queries.get(name) or {"total": 0, "max": 0, "over_budget": 0, "repeated": 0}
+            rows.append({
+                "name": name,
+                "count": count,
+                "errors": self.errors.get(name, 0),
+                "p50_ms": total.quantile(0.5) * 1000,
+                "p95_ms": total.quantile(0.95) * 1000,
+                "p99_ms": total.quantile(0.99) * 1000,
+                **{f"{phase}_avg_ms": self.histograms[(name, phase)].sum / count * 1000 for phase in PHASES},
+                "queries_avg": queries["total"] / count,
+                "queries_max": queries["max"],
+                "over_budget": queries["over_budget"],
+                "repeated": queries["repeated"],
+            })
+        rows.sort(key=lambda r: r["count"], reverse=True)
+        return rows
+
+    def render_prometheus(self) -> str:
+        """Prometheus 텍스트 형식으로 내보냅니다."""
+        lines = [
+            "# HELP stella_command_seconds 명령어/UI 콜백 처리 시간 (phase: total, db, http, handler)",
+            "# TYPE stella_command_seconds histogram",
+        ]
+        for (name, phase), histogram in sorted(self.histograms.items()):
+            labels = f'command="{_escape(name)}",phase="{phase}"'
+            cumulative = 0
+            for bound, n in zip(BUCKETS + ("+Inf",), histogram.counts):
+                cumulative += n
+                lines.append(f'stella_command_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"stella_command_seconds_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"stella_command_seconds_count{{{labels}}} {histogram.count}")
+        lines.append("# HELP stella_command_errors_total 오류로 끝난 명령어/UI 콜백 수")
+        lines.append("# TYPE stella_command_errors_total counter")
+        for name, n in sorted(self.errors.items()):
+            lines.append(f'stella_command_errors_total{{command="{_escape(name)}"}} {n}')
+        for metric, key, help_text in (
+            ("stella_command_queries_total", "total", "명령어/UI 콜백이 실행한 SQL 문장 수"),
+            ("stella_command_over_budget_total", "over_budget", "쿼리 예산을 넘은 명령어/UI 콜백 수"),
+            ("stella_command_repeated_queries_total", "repeated", "같은 SQL 문장을 반복 실행(N+1 의심)한 명령어/UI 콜백 수"),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, stats in sorted(self.queries.items()):
+                lines.append(f'{metric}{{command="{_escape(name)}"}} {stats[key]}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _shorten(statement: str, width: int = 120) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= width else statement[:width - 3] + "..."
+
+
+def _budget_of(func) -> Optional[int]:
+    return getattr(func, "__query_budget__", None)
+
+
+command_metrics = CommandMetrics(
+    config.METRICS_ENABLED,
+    default_budget=config.QUERY_BUDGET_DEFAULT,
+    repeat_limit=config.QUERY_REPEAT_LIMIT,
+    strict=config.QUERY_BUDGET_STRICT,
+)
+
+
+# --- DB / HTTP 시간 수집 ---
+
+def instrument_engine(engine):
+    """실행한 SQL 문장과 실행 시간을 현재 명령어에 더합니다."""
+    from sqlalchemy import event
+
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("stella_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        command_metrics.add_query(statement, time.perf_counter() - conn.info["stella_query_start"].pop())
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("stella_query_start"):
+            command_metrics.add_query(
+                exception_context.statement or "", time.perf_counter() - conn.info["stella_query_start"].pop()
+            )
+
+
+def _timed_http(request):
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await request(*args, **kwargs)
+        finally:
+            command_metrics.add_http(time.perf_counter() - started)
+    return wrapper
+
+
+def instrument_http(bot):
+    """디스코드 REST 호출 시간을 현재 명령어의 HTTP 시간에 더합니다.
+
+    일반 API 호출은 bot.http, 상호작용 응답(send_message, edit_message 등)은 웹훅 어댑터를 거칩니다.
+    """
+    from discord.webhook.async_ import async_context
+
+    bot.http.request = _timed_http(bot.http.request)
+    adapter = async_context.get()
+    adapter.request = _timed_http(adapter.request)
+
+
+# --- 명령어 / UI 콜백 감싸기 ---
+
+class InstrumentedCommandTree(app_commands.CommandTree):
+    """모든 슬래시 커맨드 처리 시간을 기록하는 CommandTree"""
+
+    async def _call(self, interaction: discord.Interaction):
+        if not command_metrics.enabled:
+            return await super()._call(interaction)
+        timing, token = command_metrics.start()
+        started = time.perf_counter()
+        try:
+            await super()._call(interaction)
+        finally:
+            command = interaction.command
+            name = f"/{command.qualified_name}" if command is not None else "/unknown"
+            budget = _budget_of(getattr(command, "callback", None))
+            command_metrics.finish(name, timing, token, started, interaction.command_failed, budget)
+
+
+class InstrumentedView(discord.ui.View):
+    """버튼/선택 메뉴 콜백 처리 시간을 'View이름.콜백이름' 으로 기록하는 View"""
+
+    async def _scheduled_task(self, item, interaction: discord.Interaction):
+        if not command_metrics.enabled:
+            return await super()._scheduled_task(item, interaction)
+        callback = getattr(item.callback, "callback", item.callback)
+        name = f"{type(self).__name__}.{getattr(callback, '__name__', type(item).__name__)}"
+        await command_metrics.measure(name, super()._scheduled_task(item, interaction), _budget_of(callback))
+
+
+class InstrumentedModal(discord.ui.Modal):
+    """모달 제출 처리 시간을 'Modal이름.on_submit' 으로 기록하는 Modal"""
+
+    async def _scheduled_task(self, interaction: discord.Interaction, components):
+        if not command_metrics.enabled:
+            return await super()._scheduled_task(interaction, components)
+        await command_metrics.measure(
+            f"{type(self).__name__}.on_submit", super()._scheduled_task(interaction, components), _budget_of(self.on_submit)
+        )
+
+
+# --- Prometheus 엔드포인트 ---
+
+async def start_metrics_server(port: int):
+    """127.0.0.1:port/metrics 로 지표를 내보내는 HTTP 서버를 시작합니다."""
+    from aiohttp import web
+
+    async def handle(request):
+        return web.Response(text=command_metrics.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    print(f"[Metrics] ✅ http://127.0.0.1:{port}/metrics")
+    return runner
@@ -0,0 +1,287 @@
+from datetime import datetime
+from sqlalchemy import (
+    MetaData, Table, Column, String, BigInteger, Integer, Float, JSON, DateTime, Date, Index,
+    inspect, select, func, text,
+)
+from sqlalchemy.exc import DBAPIError
+
+# 적용된 마이그레이션 기록
+schema_meta = MetaData()
+schema_version = Table(
+    "schema_version", schema_meta,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# 마이그레이션 1 시점의 users 테이블 (이후 모델이 바뀌어도 이 정의는 고정)
+_v1_meta = MetaData()
+_v1_users = Table(
+    "users", _v1_meta,
+    Column("user_id", BigInteger, primary_key=True),
+    Column("balance", Integer, default=0),
+    Column("wins", Integer, default=0),
+    Column("losses", Integer, default=0),
+    Column("streak", Integer, default=0),
+    Column("max_risk_win", Float, default=0.0),
+    Column("achievements", JSON),
+    Column("warnings", JSON),
+    Column("active_quest", JSON, nullable=True),
+    Column("gear_level", Integer, default=1),
+    Column("max_gear_level", Integer, default=1),
+    Column("gear_name", String, default="기본 장비"),
+    Column("max_gambling_win", Integer, default=0),
+    Column("total_gambling_win", Integer, default=0),
+    Column("last_claim_time", DateTime, nullable=True),
+    Column("last_attendance_date", Date, nullable=True),
+    Column("attendance_streak", Integer, default=0),
+)
+
+# 초기 버전 DB에 나중에 추가된 컬럼들 (기존 init_db / update_schema.py 가 매번 추가하던 목록)
+_V1_ADDED_COLUMNS = [
+    ("active_quest", "JSON"),
+    ("gear_level", "INTEGER DEFAULT 1"),
+    ("max_gear_level", "INTEGER DEFAULT 1"),
+    ("gear_name", "VARCHAR DEFAULT '기본 장비'"),
+    ("max_gambling_win", "INTEGER DEFAULT 0"),
+    ("total_gambling_win", "INTEGER DEFAULT 0"),
+    ("last_claim_time", "TIMESTAMP"),
+    ("last_attendance_date", "DATE"),
+    ("attendance_streak", "INTEGER DEFAULT 0"),
+]
+
+
+def _existing_columns(conn, table_name: str):
+    inspector = inspect(conn)
+    if not inspector.has_table(table_name):
+        return None
+    return {c["name"] for c in inspector.get_columns(table_name)}
+
+
+async def _m001_users_baseline(conn):
+    """users 테이블 생성 및 누락 컬럼 보충"""
+    existing = await conn.run_sync(_existing_columns, "users")
+    if existing is None:
+        await conn.run_sync(_v1_users.create)
+        return
+    for name, ddl in _V1_ADDED_COLUMNS:
+        if name not in existing:
+            await conn.execute(text(f"ALTER TABLE users ADD COLUMN {name} {ddl}"))
+
+
+async def _m002_ranking_indexes(conn):
+    """랭킹 조회용 내림차순 인덱스"""
+    indexes = [
+        Index("ix_users_total_gambling_win", _v1_users.c.total_gambling_win.desc()),
+        Index("ix_users_gear_level", _v1_users.c.gear_level.desc()),
+    ]
+    for index in indexes:
+        await conn.run_sync(index.create, checkfirst=True)
+
+
+# 마이그레이션 3 시점의 warnings 테이블
+_v3_meta = MetaData()
+_v3_warnings = Table(
+    "warnings", _v3_meta,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("guild_id", BigInteger, nullable=False),
+    Column("user_id", BigInteger, nullable=False),
+    Column("moderator_id", BigInteger, nullable=False),
+    Column("reason", String, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Index("ix_warnings_guild_user_created", "guild_id", "user_id", "created_at"),
+)
+
+
+def _parse_warning_date(value) -> datetime:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return datetime(1970, 1, 1)
+
+
+async def _m003_warnings_table(conn):
+    """users.warnings JSON 목록을 서버별 warnings 테이블로 이전"""
+    await conn.run_sync(_v3_warnings.create)
+
+    # 서버 정보가 없던 기존 기록은 guild_id 0 으로 옮깁니다.
+    result = await conn.execute(
+        select(_v1_users.c.user_id, _v1_users.c.warnings).where(_v1_users.c.warnings.isnot(None))
+    )
+    rows = []
+    for user_id, warnings in result:
+        for warning in warnings or []:
+            rows.append({
+                "guild_id": 0,
+                "user_id": user_id,
+                "moderator_id": int(warning.get("moderator_id") or 0),
+                "reason": str(warning.get("reason") or ""),
+                "created_at": _parse_warning_date(warning.get("date")),
+            })
+    if rows:
+        await conn.execute(_v3_warnings.insert(), rows)
+        print(f"[DB] 경고 {len(rows)}건을 warnings 테이블로 이전")
+    await conn.execute(text("ALTER TABLE users DROP COLUMN warnings"))
+
+
+# 마이그레이션 4 에서 users 에서 분리하는 테이블들
+_v4_meta = MetaData()
+_V4_SPLIT = {
+    "wallet": [Column("balance", Integer, default=0)],
+    "gamble_stats": [
+        Column("wins", Integer, default=0),
+        Column("losses", Integer, default=0),
+        Column("streak", Integer, default=0),
+        Column("max_risk_win", Float, default=0.0),
+        Column("max_gambling_win", Integer, default=0),
+        Column("total_gambling_win", Integer, default=0),
+    ],
+    "gear": [
+        Column("gear_level", Integer, default=1),
+        Column("max_gear_level", Integer, default=1),
+        Column("gear_name", String, default="기본 장비"),
+    ],
+}
+_v4_tables = {
+    name: Table(name, _v4_meta, Column("user_id", BigInteger, primary_key=True), *columns)
+    for name, columns in _V4_SPLIT.items()
+}
+# 랭킹 인덱스 (테이블 생성 시 함께 만들어짐)
+_v4_indexes = [
+    Index("ix_gamble_stats_total_gambling_win", _v4_tables["gamble_stats"].c.total_gambling_win.desc()),
+    Index("ix_gear_gear_level", _v4_tables["gear"].c.gear_level.desc()),
+]
+
+
+async def _m004_split_hot_tables(conn):
+    """자주 바뀌는 잔고/도박 전적/장비 컬럼을 좁은 테이블로 분리"""
+    for name, table in _v4_tables.items():
+        await conn.run_sync(table.create)  # 랭킹 인덱스 포함
+        columns = ", ".join(c.name for c in table.columns)
+        await conn.execute(text(f"INSERT INTO {name} ({columns}) SELECT {columns} FROM users"))
+
+    # 옮긴 컬럼 삭제 (SQLite는 인덱스가 걸린 컬럼을 삭제할 수 없으므로 인덱스부터 제거)
+    await conn.execute(text("DROP INDEX IF EXISTS ix_users_total_gambling_win"))
+    await conn.execute(text("DROP INDEX IF EXISTS ix_users_gear_level"))
+    for table in _v4_tables.values():
+        for column in table.columns:
+            if column.name != "user_id":
+                await conn.execute(text(f"ALTER TABLE users DROP COLUMN {column.name}"))
+
+
+# 마이그레이션 5 시점의 ledger 테이블
+_v5_meta = MetaData()
+_v5_ledger = Table(
+    "ledger", _v5_meta,
+    Column("id", BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True),
+    Column("user_id", BigInteger, nullable=False),
+    Column("amount", BigInteger, nullable=False),
+    Column("balance_after", BigInteger, nullable=False),
+    Column("reason", String, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+)
+Index("ix_ledger_user_id", _v5_ledger.c.user_id, _v5_ledger.c.id)
+
+
+async def _m005_ledger(conn):
+    """잔고 변동 기록 테이블 (기존 유저는 현재 잔고를 시작 기록으로 남김)"""
+    await conn.run_sync(_v5_ledger.create)
+    await conn.execute(
+        text(
+            "INSERT INTO ledger (user_id, amount, balance_after, reason, created_at) "
+            "SELECT user_id, COALESCE(balance, 0), COALESCE(balance, 0), 'opening', :now FROM wallet"
+        ),
+        {"now": datetime.now()},
+    )
+
+
+# 마이그레이션 6 시점의 quests 테이블
+_v6_meta = MetaData()
+_v6_quests = Table(
+    "quests", _v6_meta,
+    Column("user_id", BigInteger, primary_key=True),
+    Column("quest_type", String, primary_key=True),
+    Column("target", BigInteger, nullable=False),
+    Column("current", BigInteger, nullable=False),
+    Column("reward", BigInteger, nullable=False),
+    Column("penalty", BigInteger, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+)
+
+
+async def _m006_quests_table(conn):
+    """users.active_quest JSON 을 유저당 여러 개를 담는 quests 테이블로 이전"""
+    await conn.run_sync(_v6_quests.create)
+
+    now = datetime.now()
+    result = await conn.execute(
+        select(_v1_users.c.user_id, _v1_users.c.active_quest).where(_v1_users.c.active_quest.isnot(None))
+    )
+    rows = []
+    for user_id, quest in result:
+        if not quest or "type" not in quest:
+            continue
+        rows.append({
+            "user_id": user_id,
+            "quest_type": quest["type"],
+            "target": int(quest.get("target") or 0),
+            "current": int(quest.get("current") or 0),
+            "reward": int(quest.get("reward") or 0),
+            "penalty": int(quest.get("penalty") or 0),
+            "created_at": now,
+        })
+    if rows:
+        await conn.execute(_v6_quests.insert(), rows)
+        print(f"[DB] 진행 중인 퀘스트 {len(rows)}건을 quests 테이블로 이전")
+    await conn.execute(text("ALTER TABLE users DROP COLUMN active_quest"))
+
+
+# (버전, 설명, 함수) - 버전 순서대로 한 번씩만 적용됩니다. 이미 배포된 항목은 수정하지 말고 새 항목을 추가하세요.
+MIGRATIONS = [
+    (1, "users 테이블 기본 스키마", _m001_users_baseline),
+    (2, "랭킹 인덱스", _m002_ranking_indexes),
+    (3, "경고를 warnings 테이블로 분리", _m003_warnings_table),
+    (4, "잔고/도박 전적/장비 테이블 분리", _m004_split_hot_tables),
+    (5, "잔고 변동 기록(ledger) 테이블", _m005_ledger),
+    (6, "퀘스트를 quests 테이블로 분리", _m006_quests_table),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+async def current_version(engine) -> int:
+    """적용된 마이그레이션 버전 (기록 테이블이 없으면 0)"""
+    async with engine.connect() as conn:
+        try:
+            result = await conn.execute(select(func.max(schema_version.c.version)))
+            return result.scalar() or 0
+        except DBAPIError:
+            return 0
+
+
+async def migrate(engine) -> int:
+    """적용되지 않은 마이그레이션을 순서대로 실행하고 최종 버전을 반환합니다.
+
+    이미 최신이면 버전 조회 쿼리 한 번으로 끝납니다.
+    """
+    if await current_version(engine) >= LATEST_VERSION:
+        return LATEST_VERSION
+
+    async with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # 여러 프로세스가 동시에 시작해도 한 곳에서만 적용되도록 트랜잭션 잠금
+            await conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('stella_schema'))"))
+        else:
+            await conn.execute(text("BEGIN IMMEDIATE"))
+        await conn.run_sync(schema_version.create, checkfirst=True)
+        version = (await conn.execute(select(func.max(schema_version.c.version)))).scalar() or 0
+
+        for step, description, apply in MIGRATIONS:
+            if step <= version:
+                continue
+            await apply(conn)
+            await conn.execute(schema_version.insert().values(
+                version=step, description=description, applied_at=datetime.now()
+            ))
+            print(f"[DB] 마이그레이션 {step} 적용: {description}")
+            version = step
+    return version
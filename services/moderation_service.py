@@ -1,7 +1,11 @@
 import datetime
-from sqlalchemy import select
-from services.db import AsyncSessionLocal, User
-from services.quest import EconomyService
+from typing import List, Tuple
+from sqlalchemy import select, delete, func
+from services.db import AsyncSessionLocal, WarningRecord
+from services.writer import WriteQueue
+
+WARNINGS_PAGE_SIZE = 10
+LEGACY_GUILD_ID = 0
 
 class ModerationService:
     _instance = None
@@ -16,36 +20,66 @@ class ModerationService:
         if cls._instance is None:
             cls()
         return cls._instance
-    
-    def __init__(self):
-        self.economy = EconomyService.get_instance()
 
-    async def add_warning(self, user_id: int, reason: str, moderator_id: int) -> int:
-        """경고를 추가하고 누적 경고 수를 반환합니다."""
-        async with AsyncSessionLocal() as session:
-            user = await self.economy.get_user(session, user_id)
-            
-            warning = {
-                "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "reason": reason,
-                "moderator_id": moderator_id
-            }
-            
-            # JSON 리스트 복사 후 추가 (SQLAlchemy 감지용)
-            current_warnings = list(user.warnings) if user.warnings else []
-            current_warnings.append(warning)
-            user.warnings = current_warnings
-            
-            await session.commit()
-            return len(current_warnings)
-
-    async def get_warnings(self, user_id: int) -> list:
+    @staticmethod
+    def _scope(guild_id: int, user_id: int):
+        # 서버 구분이 없던 시절의 기록(guild_id 0)은 모든 서버에서 함께 보여줍니다.
+        return (WarningRecord.guild_id.in_((guild_id, LEGACY_GUILD_ID)), WarningRecord.user_id == user_id)
+
+    async def add_warning(self, guild_id: int, user_id: int, reason: str, moderator_id: int) -> int:
+        """경고를 추가하고 이 서버에서의 누적 경고 수를 반환합니다."""
+        async def write(session):
+            session.add(WarningRecord(
+                guild_id=guild_id,
+                user_id=user_id,
+                moderator_id=moderator_id,
+                reason=reason,
+                created_at=datetime.datetime.now(),
+            ))
+            await session.flush()
+            return await session.scalar(select(func.count()).where(*self._scope(guild_id, user_id)))
+
+        return await WriteQueue.get_instance().run(write)
+
+    async def count_warnings(self, guild_id: int, user_id: int) -> int:
         async with AsyncSessionLocal() as session:
-            user = await self.economy.get_user(session, user_id)
-            return user.warnings if user.warnings else []
+            return await session.scalar(select(func.count()).where(*self._scope(guild_id, user_id)))
 
-    async def clear_warnings(self, user_id: int):
+    async def get_warnings(self, guild_id: int, user_id: int, page: int = 0,
+                           page_size: int = WARNINGS_PAGE_SIZE) -> Tuple[List[dict], int]:
+        """경고 목록 한 페이지(오래된 순)와 전체 개수를 반환합니다."""
         async with AsyncSessionLocal() as session:
-            user = await self.economy.get_user(session, user_id)
-            user.warnings = []
-            await session.commit()
+            total = await session.scalar(select(func.count()).where(*self._scope(guild_id, user_id)))
+            result = await session.execute(
+                select(WarningRecord.created_at, WarningRecord.reason, WarningRecord.moderator_id)
+                .where(*self._scope(guild_id, user_id))
+                .order_by(WarningRecord.created_at, WarningRecord.id)
+                .offset(page * page_size)
+                .limit(page_size)
+            )
+            warnings = [
+                {
+                    "date": created_at.strftime("%Y-%m-%d %H:%M:%S"),
+                    "reason": reason,
+                    "moderator_id": moderator_id,
+                }
+                for created_at, reason, moderator_id in result
+            ]
+            return warnings, total
+
+    async def clear_warnings(self, guild_id: int, user_id: int, include_legacy: bool = False) -> int:
+        """이 서버에서 받은 경고를 모두 삭제하고 삭제한 개수를 반환합니다.
+
+        서버 구분이 없던 시절의 기록(guild_id 0)은 모든 서버에서 함께 보이므로, 관리자가 확인한 경우
+        (include_legacy=True)에만 함께 삭제합니다.
+        """
+        if include_legacy:
+            scope = self._scope(guild_id, user_id)
+        else:
+            scope = (WarningRecord.guild_id == guild_id, WarningRecord.user_id == user_id)
+
+        async def write(session):
+            result = await session.execute(delete(WarningRecord).where(*scope))
+            return result.rowcount
+
+        return await WriteQueue.get_instance().run(write)
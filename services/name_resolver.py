@@ -0,0 +1,91 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+import config
+
+
+class NameResolver:
+    """유저 이름 조회 서비스 (게이트웨이 캐시 → TTL 캐시(최대 NAME_CACHE_SIZE 개, LRU) → 동시 fetch_user 순서)"""
+    _instance = None
+
+    UNKNOWN = "Unknown"
+
+    def __new__(cls, bot=None):
+        if cls._instance is None:
+            cls._instance = super(NameResolver, cls).__new__(cls)
+            cls._instance.bot = bot
+            cls._instance._names = OrderedDict()  # user_id -> (이름, 만료 시각), 최근 사용 순
+            cls._instance.max_names = config.NAME_CACHE_SIZE
+            cls._instance._inflight = {}   # user_id -> 진행 중인 조회 Future
+            cls._instance._semaphore = asyncio.Semaphore(config.NAME_FETCH_CONCURRENCY)
+            cls._instance.gateway_hits = 0
+            cls._instance.cache_hits = 0
+            cls._instance.fetches = 0
+        elif bot is not None:
+            cls._instance.bot = bot
+        return cls._instance
+
+    @classmethod
+    def get_instance(cls, bot=None):
+        if cls._instance is None or bot is not None:
+            cls(bot)
+        return cls._instance
+
+    def _cached(self, user_id: int, guild=None) -> Optional[str]:
+        # 1. 게이트웨이 캐시 (REST 호출 없음)
+        member = guild.get_member(user_id) if guild is not None else None
+        user = member or self.bot.get_user(user_id)
+        if user is not None:
+            self.gateway_hits += 1
+            return user.name
+
+        # 2. TTL 캐시
+        entry = self._names.get(user_id)
+        if entry is not None:
+            if entry[1] > time.monotonic():
+                self.cache_hits += 1
+                self._names.move_to_end(user_id)
+                return entry[0]
+            del self._names[user_id]
+        return None
+
+    async def _fetch(self, user_id: int) -> str:
+        async with self._semaphore:
+            self.fetches += 1
+            try:
+                user = await self.bot.fetch_user(user_id)
+                name, ttl = user.name, config.NAME_CACHE_TTL
+            except Exception:
+                # 실패도 잠시 기억하여 같은 ID로 REST 호출이 반복되지 않도록 함
+                name, ttl = self.UNKNOWN, config.NAME_CACHE_NEGATIVE_TTL
+        self._names[user_id] = (name, time.monotonic() + ttl)
+        self._names.move_to_end(user_id)
+        # 유저 캐시처럼 크기를 제한하고 오래 안 쓴 이름부터 제거
+        while len(self._names) > self.max_names:
+            self._names.popitem(last=False)
+        return name
+
+    async def resolve(self, user_ids: Iterable[int], guild=None) -> Dict[int, str]:
+        """여러 유저의 이름을 한 번에 조회합니다. 캐시에 없는 유저만 동시에 REST로 요청합니다."""
+        names = {}
+        waits = {}
+        for user_id in map(int, user_ids):
+            if user_id in names or user_id in waits:
+                continue
+            name = self._cached(user_id, guild)
+            if name is not None:
+                names[user_id] = name
+                continue
+            # 다른 명령어가 이미 조회 중이면 그 결과를 함께 기다림
+            task = self._inflight.get(user_id)
+            if task is None:
+                task = asyncio.ensure_future(self._fetch(user_id))
+                self._inflight[user_id] = task
+                task.add_done_callback(lambda _, uid=user_id: self._inflight.pop(uid, None))
+            waits[user_id] = task
+
+        if waits:
+            results = await asyncio.gather(*waits.values())
+            names.update(zip(waits.keys(), results))
+        return names
@@ -0,0 +1,118 @@
+import time
+from collections import deque
+from typing import Any, Dict
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+import config
+from services.metrics import command_metrics
+
+
+class PoolTelemetry:
+    """커넥션 풀 사용 현황 (체크아웃 대기 시간, 포화도, 연결 생성/종료)"""
+
+    def __init__(self, window: int = 1000, slow_ms: float = 100.0, warn_interval: float = 10.0):
+        self.slow_ms = slow_ms
+        self.warn_interval = warn_interval
+        self._last_warning = float("-inf")
+        self._warned_at = 0
+        self.waits = deque(maxlen=window)  # 최근 체크아웃 대기 시간(초)
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.peak_in_use = 0
+        self.connects = 0        # 새로 연 DB 연결
+        self.closes = 0          # 닫힌 DB 연결 (recycle, overflow 반납 등)
+        self.invalidations = 0   # 오류로 폐기된 연결
+        self.engine = None
+
+    @property
+    def pool(self):
+        # engine.dispose() 후에는 새 풀로 바뀌므로 매번 엔진에서 가져옴
+        return self.engine.sync_engine.pool if self.engine is not None else None
+
+    def record_wait(self, seconds: float):
+        self.checkouts += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        self.waits.append(seconds)
+        if seconds * 1000 >= self.slow_ms:
+            self.slow_checkouts += 1
+            # 트래픽 폭주 시 로그가 넘치지 않도록 일정 간격으로만 출력
+            now = time.monotonic()
+            if now - self._last_warning >= self.warn_interval:
+                suppressed = self.slow_checkouts - self._warned_at
+                self._last_warning, self._warned_at = now, self.slow_checkouts
+                print(f"[DB] ⚠️ 커넥션 대기 {seconds * 1000:.0f}ms (최근 느린 체크아웃 {suppressed}회, "
+                      f"{self.pool.status() if self.pool else ''})")
+
+    def record_in_use(self, in_use: int):
+        self.peak_in_use = max(self.peak_in_use, in_use)
+
+    def attach(self, engine):
+        """엔진의 연결 생성/종료 이벤트를 집계합니다."""
+        self.engine = engine
+        sync_engine = engine.sync_engine
+
+        @event.listens_for(sync_engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            self.connects += 1
+
+        @event.listens_for(sync_engine, "close")
+        def _on_close(dbapi_connection, connection_record):
+            self.closes += 1
+
+        @event.listens_for(sync_engine, "invalidate")
+        def _on_invalidate(dbapi_connection, connection_record, exception):
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self.waits)
+        pool = self.pool
+        capacity = in_use = overflow = None
+        if isinstance(pool, QueuePool):
+            # DB_MAX_OVERFLOW 가 음수면 추가 연결 수 제한 없음
+            capacity = pool.size() + config.DB_MAX_OVERFLOW if config.DB_MAX_OVERFLOW >= 0 else None
+            in_use = pool.checkedout()
+            overflow = max(0, pool.overflow())  # pool_size 를 넘어 추가로 연 연결 수
+        return {
+            "checkouts": self.checkouts,
+            "wait_avg_ms": self.wait_total / self.checkouts * 1000 if self.checkouts else 0.0,
+            "wait_p95_ms": waits[int(len(waits) * 0.95)] * 1000 if waits else 0.0,
+            "wait_max_ms": self.wait_max * 1000,
+            "slow_checkouts": self.slow_checkouts,
+            "timeouts": self.timeouts,
+            "in_use": in_use,
+            "peak_in_use": self.peak_in_use,
+            "capacity": capacity,
+            "overflow": overflow,
+            "saturation": in_use / capacity if capacity else 0.0,
+            "connects": self.connects,
+            "closes": self.closes,
+            "invalidations": self.invalidations,
+        }
+
+
+pool_telemetry = PoolTelemetry()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """체크아웃 대기 시간을 pool_telemetry 에 기록하는 커넥션 풀
+
+    recreate() 로 새 풀이 만들어져도 같은 집계 객체를 사용합니다.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_telemetry.timeouts += 1
+            raise
+        waited = time.perf_counter() - start
+        pool_telemetry.record_wait(waited)
+        command_metrics.add_db(waited)
+        pool_telemetry.record_in_use(self.checkedout())
+        return connection
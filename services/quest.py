@@ -1,8 +1,20 @@
-import random
-from typing import List, Tuple, Optional
-from sqlalchemy import select
+import copy
+from contextlib import AsyncExitStack, asynccontextmanager, nullcontext
+from functools import partial
+from typing import Any, AsyncIterator, Dict, List, Tuple, Optional
+from sqlalchemy import bindparam, func, insert, literal, select, text
 from sqlalchemy.ext.mutable import MutableList
-from services.db import AsyncSessionLocal, User
+from sqlalchemy.orm import make_transient_to_detached
+from services.db import AsyncSessionLocal, User, USER_TABLES, engine, insert_ignore, gamble_stats_table
+from services.cache import COLUMN_TABLES, UserCache
+from services.writer import WriteQueue
+from services.ledger import Ledger
+from services.locks import KeyedLock
+from services.achievements import ACHIEVEMENTS, AchievementRegistry
+from services.quests import COMPLETED, QUEST_TYPES, QuestEngine, load_quests, save_quests
+from services.leaderboard import RankBoard
+from services.rng import game_rng
+import config
 
 class EconomyService:
     _instance = None
@@ -10,13 +22,23 @@ class EconomyService:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(EconomyService, cls).__new__(cls)
-            # 업적 정의
-            cls._instance.achievements = [
-                {"id": "first_win", "name": "첫 승리", "condition": lambda u: u.wins >= 1, "reward": 1000},
-                {"id": "lucky_streak_3", "name": "3연승", "condition": lambda u: u.streak >= 3, "reward": 5000},
-                {"id": "lucky_streak_5", "name": "5연승", "condition": lambda u: u.streak >= 5, "reward": 20000},
-                {"id": "bad_luck_3", "name": "3연패", "condition": lambda u: u.streak <= -3, "reward": 3000},
-            ]
+            # 업적 정의 (services/achievements.py)
+            cls._instance.achievements = AchievementRegistry(ACHIEVEMENTS)
+            # 퀘스트 종류 정의 (services/quests.py)
+            cls._instance.quest_engine = QuestEngine(QUEST_TYPES)
+            cls._instance.cache = UserCache(config.USER_CACHE_SIZE, config.USER_CACHE_FLUSH_INTERVAL)
+            cls._instance.gambling_board = RankBoard(
+                cls._instance._load_gambling_board,
+                cls._instance._gambling_score,
+                partial(cls._instance.count_higher, gamble_stats_table.c.total_gambling_win),
+            )
+            cls._instance._projections = {}
+            cls._instance._create_stmts = {}
+            cls._instance.writer = WriteQueue.get_instance()
+            cls._instance.ledger = Ledger.get_instance()
+            cls._instance.user_locks = KeyedLock("user")
+            # 클러스터 모드에서는 다른 프로세스도 같은 유저 행을 고치므로 모든 쓰기에서 행 잠금을 잡음
+            cls._instance.shared_rows = config.CLUSTER_ID is not None
         return cls._instance
 
     @classmethod
@@ -25,195 +47,427 @@ class EconomyService:
             cls()
         return cls._instance
 
-    async def get_user(self, session, user_id: int) -> User:
-        result = await session.execute(select(User).where(User.user_id == user_id))
-        user = result.scalar_one_or_none()
-        if not user:
-            user = User(
-                user_id=user_id,
-                balance=10000,
-                wins=0,
-                losses=0,
-                streak=0,
-                max_risk_win=0.0,
-                achievements=[],
-                warnings=[],
-                active_quest=None,
-                gear_level=1,
-                max_gear_level=1,
-                gear_name="기본 장비",
-                max_gambling_win=0,
-                total_gambling_win=0,
-                last_claim_time=None,
-                last_attendance_date=None,
-                attendance_streak=0
-            )
-            session.add(user)
-            await session.commit()
-            await session.refresh(user)
+    # 신규 유저 기본값
+    NEW_USER_DEFAULTS = {
+        "balance": 10000,
+        "wins": 0,
+        "losses": 0,
+        "streak": 0,
+        "max_risk_win": 0.0,
+        "achievements": [],
+        "gear_level": 1,
+        "max_gear_level": 1,
+        "gear_name": "기본 장비",
+        "max_gambling_win": 0,
+        "total_gambling_win": 0,
+        "last_claim_time": None,
+        "last_attendance_date": None,
+        "attendance_streak": 0,
+    }
+
+    async def get_user(self, session, user_id: int, lock: bool = False) -> User:
+        """유저를 조회하고, 없으면 생성합니다. (생성 시 session.info["user_created"] 가 설정되며 커밋은 호출자가 합니다)
+
+        없는 유저는 SELECT 한 번 뒤 PostgreSQL 에서는 구문 하나, SQLite 에서는 같은 트랜잭션 안의 INSERT 네 개
+        (프로필 행은 INSERT ... RETURNING, 나머지 세 테이블은 그 행이 만들어졌을 때만)로 만들며 다시 조회하지 않습니다.
+        """
+        user = await self._select_user(session, user_id, lock)
+        if user is None:
+            user = await self._create_user(session, user_id, lock)
         return user
 
-    async def get_balance(self, user_id: int) -> int:
-        async with AsyncSessionLocal() as session:
-            user = await self.get_user(session, user_id)
-            return user.balance
+    async def _select_user(self, session, user_id: int, lock: bool = False) -> Optional[User]:
+        stmt = select(User).where(User.user_id == user_id)
+        if lock:
+            stmt = stmt.with_for_update()
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none()
 
-    async def add_balance(self, user_id: int, amount: int):
-        async with AsyncSessionLocal() as session:
-            user = await self.get_user(session, user_id)
-            user.balance += amount
-            await session.commit()
+    async def _create_user(self, session, user_id: int, lock: bool = False) -> User:
+        # 프로필(users) 행을 INSERT ... ON CONFLICT DO NOTHING RETURNING 으로 만들고, 만들어졌을 때만
+        # 나머지 테이블 행을 같은 트랜잭션에서 추가합니다. (같은 유저의 동시 요청이 겹쳐도 unique 위반 없음)
+        # PostgreSQL 은 데이터 변경 CTE 로 네 테이블을 한 구문(한 번의 왕복)에 만들고,
+        # SQLite 는 같은 트랜잭션 안의 구문 네 개로 만듭니다. 어느 쪽도 다시 조회하지 않습니다.
+        params = {"user_id": user_id}
+        if session.bind.dialect.name == "postgresql":
+            created = (await session.execute(self._create_statement(session), params)).first() is not None
+        else:
+            stmt = insert_ignore(session, USER_TABLES[0]).returning(USER_TABLES[0].c.user_id)
+            created = (await session.execute(stmt, self._new_row(USER_TABLES[0], user_id))).first() is not None
+            if created:
+                for table in USER_TABLES[1:]:
+                    await session.execute(insert(table), self._new_row(table, user_id))
+        if not created:
+            # 동시에 다른 요청이 먼저 만든 경우 (그 트랜잭션이 끝난 뒤) 그 유저를 조회
+            return await self._select_user(session, user_id, lock)
 
-    async def remove_balance(self, user_id: int, amount: int) -> bool:
+        # 방금 넣은 값으로 객체를 만들어 세션에 연결 (이후 변경은 UPDATE 로 반영)
+        user = User(user_id=user_id, **copy.deepcopy(self.NEW_USER_DEFAULTS))
+        make_transient_to_detached(user)
+        session.add(user)
+        session.info["user_created"] = True
+        return user
+
+    def _new_row(self, table, user_id: int) -> Dict[str, Any]:
+        row = {"user_id": user_id}
+        row.update({c.name: self.NEW_USER_DEFAULTS[c.name] for c in table.columns if c.name != "user_id"})
+        return row
+
+    def _create_statement(self, session):
+        """PostgreSQL: 네 테이블 행을 한 번에 만드는 구문 (프로필 행이 만들어졌을 때만 결과 행이 있음)"""
+        stmt = self._create_stmts.get("postgresql")
+        if stmt is None:
+            core = USER_TABLES[0]
+            new_user = (
+                insert_ignore(session, core)
+                .values(self._new_row(core, bindparam("user_id")))
+                .returning(core.c.user_id)
+                .cte("new_user")
+            )
+            stmt = select(new_user.c.user_id)
+            for table in USER_TABLES[1:]:
+                row = self._new_row(table, None)
+                source = select(*(
+                    new_user.c.user_id if name == "user_id" else literal(value, table.c[name].type)
+                    for name, value in row.items()
+                ))
+                stmt = stmt.add_cte(insert(table).from_select(list(row), source).cte(f"new_{table.name}"))
+            self._create_stmts["postgresql"] = stmt
+        return stmt
+
+    async def _load_user(self, user_id: int) -> User:
         async with AsyncSessionLocal() as session:
+            result = await session.execute(select(User).where(User.user_id == user_id))
+            user = result.scalar_one_or_none()
+            if user is not None:
+                user.quests = await load_quests(session, user_id)
+                session.expunge(user)
+                return user
+        # 신규 유저 생성은 쓰기 작업이므로 쓰기 큐를 거침 (세션이 닫히면 객체는 분리됨)
+        # 가입 잔고 기록도 생성과 같은 트랜잭션에서 씀
+        async def create(session):
             user = await self.get_user(session, user_id)
+            if not session.info.pop("user_created", False):
+                user.quests = await load_quests(session, user_id)
+                return user
+            with self.ledger.transaction() as staged:
+                self._record_signup(user_id)
+                await self.ledger.write(session, staged)
+                staged.clear()
+            user.quests = {}  # 신규 유저는 퀘스트가 없음
+            return user
+
+        return await self.writer.run(create)
+
+    def _record_signup(self, user_id: int):
+        balance = self.NEW_USER_DEFAULTS["balance"]
+        self.ledger.record(user_id, balance, "signup", balance)
+
+    @asynccontextmanager
+    async def user_state(self, user_id: int, write: bool = True, lock: bool = False) -> AsyncIterator[User]:
+        """유저 상태를 불러와 작업합니다. 캐시 사용 시 변경 사항은 주기적으로 일괄 반영됩니다.
+
+        write=True 또는 lock=True 이면 유저별 잠금(user_locks)을 잡고 작업하므로, 같은 유저의 버튼
+        연타나 여러 창의 동시 조작이 이 프로세스 안에서는 하나씩 처리됩니다. (안에서 같은 유저의
+        user_state 를 다시 열면 안 됩니다.)
+        lock=True 이면 캐시를 쓰지 않을 때 행 잠금까지 잡아 다른 프로세스와의 경합도 막습니다.
+        (클러스터 모드에서는 캐시가 꺼지고 모든 쓰기가 행 잠금을 잡습니다.)
+
+        작업 중 남긴 잔고 기록(change_balance)은 유저 상태와 같은 트랜잭션에서 반영됩니다.
+        예외로 끝나면 캐시를 쓰지 않을 때는 롤백되고, 캐시 사용 시에는 캐시의 유저 객체를 작업 전
+        값으로 되돌리며, 두 경우 모두 남긴 잔고 기록은 버려집니다.
+
+        SQLite 는 FOR UPDATE 가 없어 행 잠금 대신 처음부터 쓰기 잠금(BEGIN IMMEDIATE)을 잡습니다.
+        성능 모드에서는 이 프로세스만 DB에 쓰므로 (쓰기 작업자 + user_locks) 클러스터가 아니면
+        생략하고, 읽기는 잠금 없이 한 뒤 쓰기 작업자와의 잠금은 반영(커밋)할 때만 잡습니다.
+        """
+        if not (write or lock):
+            async with self._user_state(user_id, write, lock) as user:
+                yield user
+            return
+        async with self.user_locks.hold(user_id), self._user_state(user_id, write, lock) as user:
+            yield user
+
+    @asynccontextmanager
+    async def _user_state(self, user_id: int, write: bool, lock: bool) -> AsyncIterator[User]:
+        if not self.cache.enabled:
+            lock = lock or (write and self.shared_rows)
+            sqlite = engine.dialect.name == "sqlite"
+            immediate = sqlite and lock and (self.shared_rows or not self.writer.enabled)
+            # 쓰기 잠금을 처음부터 잡지 않았으면 쓰는 구간만 쓰기 작업자와 겹치지 않게 잠금
+            write_lock = nullcontext if immediate else self.writer.exclusive
+            async with AsyncExitStack() as stack:
+                if immediate:
+                    await stack.enter_async_context(self.writer.exclusive())
+                session = await stack.enter_async_context(AsyncSessionLocal())
+                staged = stack.enter_context(self.ledger.transaction())
+                if immediate:
+                    await session.execute(text("BEGIN IMMEDIATE"))
+                user = await self._select_user(session, user_id, lock=lock and not sqlite)
+                created = new_user = False
+                if user is None:
+                    async with write_lock():
+                        user = await self._create_user(session, user_id, lock=lock and not sqlite)
+                        created = new_user = session.info.pop("user_created", False)
+                        if created:
+                            self._record_signup(user_id)
+                        if self.writer.enabled and not immediate:
+                            # SQLite 쓰기 잠금을 잡은 채로 잠금 밖에서 작업하지 않도록 바로 커밋
+                            await self.ledger.write(session, staged)
+                            staged.clear()
+                            await session.commit()
+                            created = False
+                    # 커밋하면 연결이 풀로 돌아가므로, 반영할 때 쓰기 잠금을 잡은 채 풀을 기다리지 않도록 다시 잡아 둠
+                    # (잠금을 기다리는 다른 요청들이 풀의 연결을 모두 쥐고 있을 수 있음)
+                    await session.connection()
+                user.quests = {} if new_user else await load_quests(session, user_id)
+                quests = copy.deepcopy(user.quests)
+                yield user
+                if write or created:
+                    async with write_lock():
+                        if write and user.quests != quests:
+                            await save_quests(session, {user_id: user.quests})
+                        await self.ledger.write(session, staged)
+                        staged.clear()
+                        await session.commit()
+            return
+
+        user = await self.cache.get(user_id, self._load_user)
+        if not write:
+            yield user
+            return
+        # 작업 중 캐시에서 밀려나지 않도록 먼저 변경 표시를 하고, 예외로 끝나면 작업 전 값으로 되돌림
+        # 잔고 기록은 캐시 항목에 붙여 두었다가 상태와 같은 반영 트랜잭션에서 씀
+        self.cache.mark_dirty(user_id)
+        backup = self.cache.backup(user)
+        with self.ledger.transaction() as staged:
+            try:
+                yield user
+            except BaseException:
+                self.cache.restore(user_id, backup)
+                raise
+            self.cache.mark_dirty(user_id, staged)
+            staged.clear()
+
+    def _projection(self, columns: Tuple[str, ...]):
+        """필요한 컬럼이 있는 테이블만 조인하는 SELECT 구문 (컬럼 조합별로 재사용)"""
+        stmt = self._projections.get(columns)
+        if stmt is None:
+            tables = list(dict.fromkeys(COLUMN_TABLES[c] for c in columns))
+            base = tables[0]
+            source = base
+            for table in tables[1:]:
+                source = source.join(table, base.c.user_id == table.c.user_id)
+            stmt = (
+                select(*(COLUMN_TABLES[c].c[c] for c in columns))
+                .select_from(source)
+                .where(base.c.user_id == bindparam("user_id"))
+            )
+            self._projections[columns] = stmt
+        return stmt
+
+    async def read_columns(self, user_id: int, *columns: str) -> tuple:
+        """읽기 전용 명령어용: 유저 상태 중 필요한 값만 읽습니다.
+
+        캐시에 있으면 (아직 반영되지 않은 값까지) 캐시에서 읽고, 없으면 해당 컬럼만 한 번의 쿼리로
+        조회합니다. 유저를 생성하거나 캐시에 올리지 않으며, 없는 유저는 신규 유저 기본값을 반환합니다.
+        """
+        user = self.cache.peek(user_id)
+        if user is not None:
+            return tuple(getattr(user, c) for c in columns)
+        async with engine.connect() as conn:
+            result = await conn.execute(self._projection(columns), {"user_id": user_id})
+            row = result.first()
+        if row is None:
+            return tuple(self.NEW_USER_DEFAULTS[c] for c in columns)
+        return tuple(row)
+
+    async def close(self):
+        """종료 전 캐시에 남은 유저 상태와 대기 중인 잔고 기록을 DB에 반영합니다."""
+        await self.cache.close()
+        await self.ledger.close()
+        await self.writer.close()
+
+    async def get_balance(self, user_id: int) -> int:
+        (balance,) = await self.read_columns(user_id, "balance")
+        return balance or 0
+
+    def change_balance(self, user: User, amount: int, reason: str):
+        """잔고를 변경하고 변동 기록을 남깁니다. (모든 잔고 변경은 이 함수를 거쳐야 함)"""
+        user.balance += amount
+        self.ledger.record(user.user_id, amount, reason, user.balance)
+
+    async def add_balance(self, user_id: int, amount: int, reason: str = "adjust"):
+        async with self.user_state(user_id) as user:
+            self.change_balance(user, amount, reason)
+
+    async def remove_balance(self, user_id: int, amount: int, reason: str = "adjust") -> bool:
+        async with self.user_state(user_id) as user:
             if user.balance < amount:
                 return False
-            user.balance -= amount
-            await session.commit()
+            self.change_balance(user, -amount, reason)
             return True
 
+    def check_achievements(self, user: User, *metrics: str) -> List[str]:
+        """값이 바뀐 지표의 업적만 확인하여 새로 달성한 업적의 보상을 지급하고 알림 문구를 반환합니다."""
+        reached = self.achievements.reached(user, metrics)
+        if not reached:
+            return []
+        notifications = []
+        for ach in reached:
+            self.change_balance(user, ach["reward"], "achievement")
+            notifications.append(f"🏆 업적 달성: **{ach['name']}** (+{ach['reward']:,}원)")
+        user.achievements = list(user.achievements or []) + [ach["id"] for ach in reached]
+        return notifications
+
     async def record_game_result(self, user_id: int, won: bool, amount: int = 0, risk: float = 0.5) -> List[str]:
-        async with AsyncSessionLocal() as session:
-            user = await self.get_user(session, user_id)
-            notifications = []
-
-            # 1. 스탯 업데이트
-            if won:
-                user.wins += 1
-                user.streak = max(1, user.streak + 1)
-                if risk < user.max_risk_win:
-                    user.max_risk_win = risk
+        async with self.user_state(user_id) as user:
+            return self._apply_game_result(user, won, risk)
+
+    def _apply_game_result(self, user: User, won: bool, risk: float) -> List[str]:
+        notifications = []
+
+        # 1. 스탯 업데이트
+        if won:
+            user.wins += 1
+            user.streak = max(1, user.streak + 1)
+            if risk < user.max_risk_win:
+                user.max_risk_win = risk
+        else:
+            user.losses += 1
+            user.streak = min(-1, user.streak - 1)
+
+        # 2. 업적 체크 (연승/연패는 매 판 바뀌고, 승수는 이겼을 때만 바뀜)
+        metrics = ("wins", "win_streak", "loss_streak") if won else ("win_streak", "loss_streak")
+        notifications.extend(self.check_achievements(user, *metrics))
+
+        # 3. 퀘스트 진행
+        notifications.extend(self.advance_quests(user, "game_result", won=won))
+        return notifications
+
+    def advance_quests(self, user: User, event: str, **data) -> List[str]:
+        """이벤트에 반응하는 퀘스트만 진행시키고, 끝난 퀘스트의 보상/페널티를 적용해 알림 문구를 반환합니다."""
+        notifications = []
+        for quest, outcome in self.quest_engine.dispatch(user, event, **data):
+            name = self.quest_engine.name(quest)
+            if outcome == COMPLETED:
+                self.change_balance(user, quest["reward"], "quest_reward")
+                notifications.append(f"📜 퀘스트 완료! **{name}** 성공! (+{quest['reward']:,}원)")
             else:
-                user.losses += 1
-                user.streak = min(-1, user.streak - 1)
-
-            # 2. 업적 체크
-            current_ach = list(user.achievements) if user.achievements else []
-            for ach in self.achievements:
-                if ach["id"] not in current_ach and ach["condition"](user):
-                    current_ach.append(ach["id"])
-                    user.balance += ach["reward"]
-                    notifications.append(f"🏆 업적 달성: **{ach['name']}** (+{ach['reward']:,}원)")
-            user.achievements = current_ach
-
-            # 3. 퀘스트 체크 (추가된 부분)
-            quest = user.active_quest
-            if quest:
-                if quest["type"] == "win_streak":
-                    if won:
-                        quest["current"] += 1
-                        if quest["current"] >= quest["target"]:
-                            user.balance += quest["reward"]
-                            notifications.append(f"📜 퀘스트 완료! **{quest['target']}연승 도전** 성공! (+{quest['reward']:,}원)")
-                            user.active_quest = None
-                        else:
-                            user.active_quest = quest # 진행 상황 업데이트
-                    else:
-                        user.balance = max(0, user.balance - quest["penalty"])
-                        notifications.append(f"📜 퀘스트 실패... **{quest['target']}연승 도전** 실패 (-{quest['penalty']:,}원)")
-                        user.active_quest = None
-
-            session.add(user)
-            await session.commit()
-            return notifications
+                self.change_balance(user, -min(user.balance, quest["penalty"]), "quest_penalty")
+                notifications.append(f"📜 퀘스트 실패... **{name}** 실패 (-{quest['penalty']:,}원)")
+        return notifications
 
     async def record_payout(self, user_id: int, amount: int) -> List[str]:
         """최종 배당금을 지급할 때 호출하여 랭킹용 데이터를 갱신합니다."""
-        async with AsyncSessionLocal() as session:
-            user = await self.get_user(session, user_id)
-            notifications = []
-            
-            if amount > 0:
-                # 누적 당첨금 기록
-                user.total_gambling_win += amount
-                
-                # 최고 당첨금 기록
-                if amount > user.max_gambling_win:
-                    user.max_gambling_win = amount
-                    notifications.append(f"✨ **도박 최고 당첨금 갱신!** (**{amount:,}원**)")
-                
-                await session.commit()
-            return notifications
-
-    async def assign_quest(self, user_id: int) -> Optional[dict]:
-        """랜덤 퀘스트 부여"""
-        async with AsyncSessionLocal() as session:
-            user = await self.get_user(session, user_id)
-            if user.active_quest:
-                return None
-            
-            target_wins = random.randint(3, 5)
-            quest = {
-                "type": "win_streak",
-                "target": target_wins,
-                "current": 0,
-                "reward": target_wins * 10000,
-                "penalty": target_wins * 2000
-            }
-            user.active_quest = quest
-            await session.commit()
-            return quest
-
-    async def get_quest(self, user_id: int) -> Optional[dict]:
-        async with AsyncSessionLocal() as session:
-            user = await self.get_user(session, user_id)
-            return user.active_quest
+        async with self.user_state(user_id, write=amount > 0) as user:
+            return self._apply_payout(user, amount)
 
-    async def cancel_quest(self, user_id: int):
-        async with AsyncSessionLocal() as session:
-            user = await self.get_user(session, user_id)
-            user.active_quest = None
-            await session.commit()
+    def _apply_payout(self, user: User, amount: int) -> List[str]:
+        notifications = []
+        if amount > 0:
+            # 누적 당첨금 기록
+            user.total_gambling_win += amount
+            self.gambling_board.update(user.user_id, user.total_gambling_win)
+
+            # 최고 당첨금 기록
+            if amount > user.max_gambling_win:
+                user.max_gambling_win = amount
+                notifications.append(f"✨ **도박 최고 당첨금 갱신!** (**{amount:,}원**)")
+            notifications.extend(self.check_achievements(user, "total_gambling_win", "max_gambling_win"))
+            notifications.extend(self.advance_quests(user, "payout", amount=amount))
+        return notifications
+
+    async def play_round(self, user_id: int, probability: float, multiplier: float, pot: int, bet: int = 0) -> Dict[str, Any]:
+        """
+        도박 한 판을 하나의 트랜잭션으로 정산합니다. (배팅 차감 → 결과 → 스탯/업적/퀘스트 갱신)
+        Returns: {
+            "ok": bool,       # 잔액 부족 시 False
+            "won": bool,
+            "pot": int,       # 갱신된 누적 금액 (실패 시 0)
+            "notifications": List[str],
+        }
+        """
+        async with self.user_state(user_id, lock=True) as user:
+            if bet > 0:
+                if user.balance < bet:
+                    return {"ok": False, "won": False, "pot": pot, "notifications": []}
+                self.change_balance(user, -bet, "gamble_bet")
+
+            won = game_rng.stream("gamble", user_id).random() < probability
+            pot = int(pot * multiplier) if won else 0
+            notifications = self._apply_game_result(user, won, probability)
+            return {"ok": True, "won": won, "pot": pot, "notifications": notifications}
+
+    async def cash_out(self, user_id: int, amount: int) -> List[str]:
+        """누적 금액 지급과 랭킹 데이터 갱신을 하나의 트랜잭션으로 처리합니다."""
+        async with self.user_state(user_id, lock=True) as user:
+            self.change_balance(user, amount, "gamble_payout")
+            return self._apply_payout(user, amount)
+
+    def describe_quest(self, quest: dict) -> dict:
+        """표시용 퀘스트 정보 (이름, 진행도 단위 포함 사본)"""
+        return dict(quest, name=self.quest_engine.name(quest), unit=self.quest_engine.unit(quest))
+
+    async def assign_quest(self, user_id: int, quest_type: Optional[str] = None) -> Optional[dict]:
+        """랜덤 퀘스트 부여 (진행 중인 퀘스트가 가득 찼거나 같은 종류가 진행 중이면 None)"""
+        async with self.user_state(user_id) as user:
+            quest = self.quest_engine.create(user, quest_type)
+            return self.describe_quest(quest) if quest else None
+
+    async def get_quests(self, user_id: int) -> List[dict]:
+        """진행 중인 퀘스트 목록 (부여된 순서)"""
+        async with self.user_state(user_id, write=False) as user:
+            quests = sorted(user.quests.values(), key=lambda q: q["created_at"])
+            return [self.describe_quest(quest) for quest in quests]
+
+    async def cancel_quest(self, user_id: int, quest_type: str):
+        async with self.user_state(user_id) as user:
+            user.quests.pop(quest_type, None)
 
     async def get_achievements_progress(self, user_id: int) -> List[dict]:
         """업적 목록과 달성 여부, 진행 상황을 반환합니다."""
-        async with AsyncSessionLocal() as session:
-            user = await self.get_user(session, user_id)
-            user_ach = list(user.achievements) if user.achievements else []
-            
-            result = []
-            for ach in self.achievements:
-                progress_info = {
-                    "id": ach["id"],
-                    "name": ach["name"],
-                    "reward": ach["reward"],
-                    "completed": ach["id"] in user_ach,
-                    "progress": "",
-                }
-                
-                # 진행 상황 계산 (None 대비 안전한 처리)
-                u_wins = user.wins or 0
-                u_streak = user.streak or 0
-
-                if ach["id"] == "first_win":
-                    progress_info["progress"] = f"{min(u_wins, 1)}/1 승"
-                elif ach["id"] == "lucky_streak_3":
-                    progress_info["progress"] = f"{min(max(u_streak, 0), 3)}/3 연승"
-                elif ach["id"] == "lucky_streak_5":
-                    progress_info["progress"] = f"{min(max(u_streak, 0), 5)}/5 연승"
-                elif ach["id"] == "bad_luck_3":
-                    progress_info["progress"] = f"{min(abs(min(u_streak, 0)), 3)}/3 연패"
-                
-                result.append(progress_info)
-            return result
+        async with self.user_state(user_id, write=False) as user:
+            return self.achievements.progress(user)
 
-    async def get_leaderboard(self) -> List[Tuple[int, int]]:
+    async def _load_gambling_board(self, limit: int) -> List[Tuple[int, int]]:
+        # 아직 반영되지 않은 당첨금까지 포함하여 불러오기
+        await self.cache.flush()
         async with AsyncSessionLocal() as session:
+            table = gamble_stats_table
             result = await session.execute(
-                select(User.user_id, User.total_gambling_win)
-                .where(User.total_gambling_win > 0)
-                .order_by(User.total_gambling_win.desc())
-                .limit(10)
+                select(table.c.user_id, table.c.total_gambling_win)
+                .where(table.c.total_gambling_win > 0)
+                .order_by(table.c.total_gambling_win.desc(), table.c.user_id)
+                .limit(limit)
             )
             return result.all()
 
+    async def _gambling_score(self, user_id: int) -> int:
+        (score,) = await self.read_columns(user_id, "total_gambling_win")
+        return score
+
+    async def count_higher(self, column, score: int) -> int:
+        """순위표 밖의 유저 순위용: 점수가 score 보다 높은 유저 수 (점수 컬럼 인덱스 사용)
+
+        캐시 사용 시 다른 유저의 아직 반영되지 않은 변경(최대 USER_CACHE_FLUSH_INTERVAL 초)은 포함되지 않습니다.
+        """
+        async with engine.connect() as conn:
+            result = await conn.execute(select(func.count()).select_from(column.table).where(column > score))
+            return result.scalar_one()
+
+    async def get_leaderboard(self) -> List[Tuple[int, int]]:
+        return await self.gambling_board.top(10)
+
+    async def get_rank(self, user_id: int) -> Optional[int]:
+        """도박 누적 당첨금 기준 내 순위 (랭킹에 없으면 None)"""
+        return await self.gambling_board.rank(user_id)
+
     async def claim_reward(self, user_id: int) -> Tuple[bool, Optional[int]]:
         """10분마다 지원금 5,000원을 수령합니다."""
         from datetime import datetime, timedelta
         
-        async with AsyncSessionLocal() as session:
-            user = await self.get_user(session, user_id)
+        async with self.user_state(user_id) as user:
             now = datetime.now()
             
             if user.last_claim_time:
@@ -223,17 +477,15 @@ class EconomyService:
                     remaining = int((next_claim - now).total_seconds())
                     return False, remaining
             
-            user.balance += 5000
+            self.change_balance(user, 5000, "claim")
             user.last_claim_time = now
-            await session.commit()
             return True, None
 
     async def attend(self, user_id: int) -> Tuple[bool, str, int, int]:
         """일일 출석 체크를 수행합니다. (보상: 100,000원)"""
         from datetime import date, timedelta
         
-        async with AsyncSessionLocal() as session:
-            user = await self.get_user(session, user_id)
+        async with self.user_state(user_id) as user:
             today = date.today()
             
             # 오늘 이미 출석했는지 확인
@@ -247,8 +499,10 @@ class EconomyService:
                 user.attendance_streak = 1
             
             reward = 100000
-            user.balance += reward
+            self.change_balance(user, reward, "attendance")
             user.last_attendance_date = today
-            
-            await session.commit()
-            return True, f"출석 보상 **{reward:,}원**이 지급되었습니다!", reward, user.attendance_streak
\ No newline at end of file
+
+            notes = self.check_achievements(user, "attendance_streak")
+            notes += self.advance_quests(user, "attendance", streak=user.attendance_streak)
+            message = "\n".join([f"출석 보상 **{reward:,}원**이 지급되었습니다!"] + notes)
+            return True, message, reward, user.attendance_streak
\ No newline at end of file
@@ -0,0 +1,200 @@
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import delete, insert, select
+from services.db import User, quests_table
+from services.rng import RandomStream, game_rng
+
+# 유저가 동시에 진행할 수 있는 퀘스트 수 (종류별로 하나씩)
+MAX_ACTIVE_QUESTS = 3
+
+# 이벤트 처리 결과
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+def _on_win_streak(quest: dict, won: bool, **_) -> Optional[str]:
+    if not won:
+        return FAILED
+    quest["current"] += 1
+    return COMPLETED if quest["current"] >= quest["target"] else None
+
+
+def _on_win_count(quest: dict, won: bool, **_) -> Optional[str]:
+    if won:
+        quest["current"] += 1
+    return COMPLETED if quest["current"] >= quest["target"] else None
+
+
+def _on_earn(quest: dict, amount: int, **_) -> Optional[str]:
+    quest["current"] = min(quest["target"], quest["current"] + amount)
+    return COMPLETED if quest["current"] >= quest["target"] else None
+
+
+def _on_gear_level(quest: dict, level: int, **_) -> Optional[str]:
+    quest["current"] = max(quest["current"], level)
+    return COMPLETED if quest["current"] >= quest["target"] else None
+
+
+def _on_attendance(quest: dict, streak: int, **_) -> Optional[str]:
+    # 연속 출석이 끊기면 진행도도 처음부터 다시 셈
+    quest["current"] = streak
+    return COMPLETED if quest["current"] >= quest["target"] else None
+
+
+def _new_win_streak(user: User, rng: RandomStream) -> Tuple[int, int, int, int]:
+    target = rng.randint(3, 5)
+    return target, 0, target * 10000, target * 2000
+
+
+def _new_win_count(user: User, rng: RandomStream) -> Tuple[int, int, int, int]:
+    target = rng.randint(5, 10)
+    return target, 0, target * 3000, 0
+
+
+def _new_earn(user: User, rng: RandomStream) -> Tuple[int, int, int, int]:
+    target = rng.choice((100000, 300000, 500000, 1000000))
+    return target, 0, target // 10, 0
+
+
+def _new_gear_level(user: User, rng: RandomStream) -> Tuple[int, int, int, int]:
+    level = user.gear_level or 1
+    target = min(100, level + rng.randint(3, 8))
+    return target, level, target * target * 50, 0
+
+
+def _new_attendance(user: User, rng: RandomStream) -> Tuple[int, int, int, int]:
+    target = rng.randint(3, 7)
+    return target, 0, target * 20000, 0
+
+
+# 퀘스트 종류: 표시 이름, 진행도 단위, 반응하는 이벤트와 처리 함수, 새 퀘스트 값 (목표, 시작 진행도, 보상, 페널티)
+# 이벤트: game_result(won), payout(amount), gear(level), attendance(streak)
+QUEST_TYPES = {
+    "win_streak": {
+        "name": "{target}연승 도전", "unit": "연승",
+        "events": {"game_result": _on_win_streak}, "new": _new_win_streak,
+    },
+    "win_count": {
+        "name": "{target}승 달성", "unit": "승",
+        "events": {"game_result": _on_win_count}, "new": _new_win_count,
+    },
+    "earn": {
+        "name": "도박으로 {target:,}원 벌기", "unit": "원",
+        "events": {"payout": _on_earn}, "new": _new_earn,
+    },
+    "gear_level": {
+        "name": "장비 Lv.{target} 달성", "unit": "레벨",
+        "events": {"gear": _on_gear_level}, "new": _new_gear_level,
+    },
+    "attendance": {
+        "name": "{target}일 연속 출석", "unit": "일",
+        "events": {"attendance": _on_attendance}, "new": _new_attendance,
+    },
+}
+
+
+class QuestEngine:
+    """퀘스트 이벤트 분배기
+
+    퀘스트 종류를 이벤트별로 묶어 두고, 이벤트가 오면 그 이벤트에 반응하는 종류의 퀘스트만
+    유저의 진행 중인 퀘스트({quest_type: dict})에서 꺼내 처리합니다.
+    """
+
+    def __init__(self, types: Dict[str, Dict[str, Any]]):
+        self.types = types
+        self.by_event: Dict[str, List[Tuple[str, Callable]]] = {}
+        for quest_type, spec in types.items():
+            for event, handler in spec["events"].items():
+                self.by_event.setdefault(event, []).append((quest_type, handler))
+
+    def name(self, quest: dict) -> str:
+        return self.types[quest["type"]]["name"].format(**quest)
+
+    def unit(self, quest: dict) -> str:
+        return self.types[quest["type"]]["unit"]
+
+    def create(self, user: User, quest_type: Optional[str] = None) -> Optional[dict]:
+        """새 퀘스트를 부여합니다. (종류를 정하지 않으면 진행 중이 아닌 종류 중 무작위)"""
+        active = user.quests
+        if len(active) >= MAX_ACTIVE_QUESTS:
+            return None
+        rng = game_rng.stream("quest", user.user_id)
+        if quest_type is None:
+            candidates = [t for t in self.types if t not in active]
+            if not candidates:
+                return None
+            quest_type = rng.choice(candidates)
+        elif quest_type in active:
+            return None
+
+        target, current, reward, penalty = self.types[quest_type]["new"](user, rng)
+        quest = {
+            "type": quest_type,
+            "target": target,
+            "current": current,
+            "reward": reward,
+            "penalty": penalty,
+            "created_at": datetime.now(),
+        }
+        active[quest_type] = quest
+        return quest
+
+    def dispatch(self, user: User, event: str, **data) -> List[Tuple[dict, str]]:
+        """이벤트를 해당 종류의 퀘스트에 전달하고, 끝난 퀘스트와 결과(completed/failed)를 반환합니다.
+
+        끝난 퀘스트는 진행 중 목록에서 제거됩니다. 보상/페널티 지급은 호출자가 합니다.
+        """
+        active = user.quests
+        if not active:
+            return []
+        finished = []
+        for quest_type, handler in self.by_event.get(event, ()):
+            quest = active.get(quest_type)
+            if quest is None:
+                continue
+            outcome = handler(quest, **data)
+            if outcome is not None:
+                del active[quest_type]
+                finished.append((quest, outcome))
+        return finished
+
+
+def _row_to_quest(row) -> dict:
+    return {
+        "type": row.quest_type,
+        "target": row.target,
+        "current": row.current,
+        "reward": row.reward,
+        "penalty": row.penalty,
+        "created_at": row.created_at,
+    }
+
+
+async def load_quests(session, user_id: int) -> Dict[str, dict]:
+    """유저의 진행 중인 퀘스트를 {quest_type: dict} 로 불러옵니다. (기본 키 앞부분으로 조회)"""
+    result = await session.execute(select(quests_table).where(quests_table.c.user_id == user_id))
+    return {row.quest_type: _row_to_quest(row) for row in result}
+
+
+async def save_quests(session, changed: Dict[int, Dict[str, dict]]):
+    """바뀐 유저들의 퀘스트 목록을 통째로 다시 씁니다. (유저당 최대 MAX_ACTIVE_QUESTS 행)"""
+    if not changed:
+        return
+    user_ids = list(changed)
+    for i in range(0, len(user_ids), 500):
+        await session.execute(delete(quests_table).where(quests_table.c.user_id.in_(user_ids[i:i + 500])))
+    rows = [
+        {
+            "user_id": user_id,
+            "quest_type": quest["type"],
+            "target": quest["target"],
+            "current": quest["current"],
+            "reward": quest["reward"],
+            "penalty": quest["penalty"],
+            "created_at": quest["created_at"],
+        }
+        for user_id, quests in changed.items()
+        for quest in (quests or {}).values()
+    ]
+    if rows:
+        await session.execute(insert(quests_table), rows)
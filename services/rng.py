@@ -0,0 +1,113 @@
+import zlib
+from collections import OrderedDict
+from itertools import chain
+from typing import Dict, Iterator, Optional, Sequence
+import numpy as np
+import config
+
+
+class RandomStream:
+    """numpy Generator 로 [0, 1) 난수를 한 번에 buffer_size 개씩 만들어 두고 하나씩 꺼내는 스트림
+
+    random 은 버퍼(파이썬 float 리스트)를 이어 붙인 chain 의 __next__ 라서, 꺼낼 때 파이썬 함수를
+    거치지 않습니다. 꺼낸 개수(drawn)는 현재 버퍼의 남은 개수로 계산하므로 따로 세지 않습니다.
+    PCG64 는 난수 하나에 상태를 한 단계 쓰므로, 같은 시드에서 advance(drawn) 로 정확히 같은
+    위치부터 다시 이어 갈 수 있습니다.
+    """
+    __slots__ = ("random", "_generator", "_batch", "_size", "_base")
+
+    def __init__(self, seed: np.random.SeedSequence, buffer_size: int, skip: int = 0):
+        bit_generator = np.random.PCG64(seed)
+        if skip:
+            bit_generator.advance(skip)
+        self._generator = np.random.Generator(bit_generator)
+        self._size = buffer_size
+        self._base = skip
+        self._batch: Optional[Iterator[float]] = None
+        self.random = chain.from_iterable(self._batches()).__next__
+
+    def _batches(self):
+        while True:
+            self._batch = iter(self._generator.random(self._size).tolist())
+            yield self._batch
+            self._base += self._size
+
+    @property
+    def drawn(self) -> int:
+        """지금까지 꺼낸 난수 개수 (skip 포함)"""
+        if self._batch is None:
+            return self._base
+        return self._base + self._size - self._batch.__length_hint__()
+
+    def randint(self, a: int, b: int) -> int:
+        """a 이상 b 이하 정수"""
+        return a + int(self.random() * (b - a + 1))
+
+    def choice(self, seq: Sequence):
+        return seq[int(self.random() * len(seq))]
+
+
+class GameRandom:
+    """게임 결과용 난수 서비스 (게임 종류 × 유저별 독립 스트림)
+
+    스트림마다 SeedSequence(루트 시드, spawn_key=(게임, 유저)) 로 시드를 나누므로, 여러 유저의
+    명령어가 어떤 순서로 섞여 실행되어도 한 유저의 한 게임 결과는 그 유저의 행동 순서에만
+    달려 있습니다. RNG_SEED 를 고정하면 기록된 세션(유저별 행동 순서)을 다시 실행했을 때
+    같은 결과가 나옵니다. 시드를 정하지 않으면 시작할 때 무작위로 정합니다. (log_seed() 로 출력)
+
+    스트림은 유저 단위로 묶어 최근에 쓴 max_users 명분만 보관하고, 유저 캐시에서 밀려난 유저의
+    스트림은 forget() 으로 함께 버립니다. 버린 스트림의 꺼낸 개수는 기억해 두었다가 다시 만들 때
+    그 위치부터 이어 가므로, 메모리 상황이나 실행 순서와 관계없이 같은 결과가 반복되지 않고
+    시드를 고정한 재현도 유지됩니다. (기억하는 값은 (게임, 유저)마다 정수 하나)
+    """
+
+    def __init__(self, seed: Optional[int] = None, buffer_size: int = 64, max_users: int = 20000):
+        self.buffer_size = buffer_size
+        self.max_users = max_users
+        self._game_keys: Dict[str, int] = {}
+        self.reseed(seed)
+
+    def reseed(self, seed: Optional[int] = None):
+        """모든 스트림을 버리고 새 시드로 다시 시작합니다. (시뮬레이션/재현용)"""
+        self.seeded = seed is not None
+        self.seed = seed if seed is not None else np.random.SeedSequence().entropy
+        self._users: "OrderedDict[int, Dict[str, RandomStream]]" = OrderedDict()
+        self._offsets: Dict[tuple, int] = {}  # 버린 스트림의 꺼낸 개수
+
+    def log_seed(self):
+        print(f"[RNG] 시드 {self.seed}" + ("" if self.seeded else " (무작위, RNG_SEED 로 지정하면 재현 가능)"))
+
+    def _game_key(self, game: str) -> int:
+        key = self._game_keys.get(game)
+        if key is None:
+            # hash() 는 실행마다 바뀌므로 고정된 값 사용
+            key = self._game_keys[game] = zlib.crc32(game.encode())
+        return key
+
+    def stream(self, game: str, key: int = 0) -> RandomStream:
+        """game 과 key(유저 ID 등)에 해당하는 스트림"""
+        streams = self._users.get(key)
+        if streams is None:
+            streams = self._users[key] = {}
+            if len(self._users) > self.max_users:
+                self._drop(*self._users.popitem(last=False))
+        else:
+            self._users.move_to_end(key)
+        stream = streams.get(game)
+        if stream is None:
+            seed = np.random.SeedSequence(self.seed, spawn_key=(self._game_key(game), key))
+            stream = streams[game] = RandomStream(seed, self.buffer_size, self._offsets.pop((game, key), 0))
+        return stream
+
+    def forget(self, key: int):
+        """key(유저 ID)의 스트림을 메모리에서 버립니다. (유저 캐시에서 밀려날 때, 꺼낸 위치는 유지)"""
+        streams = self._users.pop(key, None)
+        if streams:
+            self._drop(key, streams)
+
+    def _drop(self, key: int, streams: Dict[str, RandomStream]):
+        for game, stream in streams.items():
+            self._offsets[(game, key)] = stream.drawn
+
+
+game_rng = GameRandom(config.RNG_SEED, config.RNG_BUFFER_SIZE, config.RNG_MAX_USERS)
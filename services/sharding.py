@@ -0,0 +1,44 @@
+from typing import List, Optional
+
+
+def parse_shard_ids(spec: Optional[str]) -> Optional[List[int]]:
+    """'0-3,6,8' 형식의 샤드 목록을 정수 리스트로 변환합니다. 비어 있으면 None"""
+    if not spec or not spec.strip():
+        return None
+    shard_ids = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = (int(x) for x in part.split("-", 1))
+            shard_ids.extend(range(start, end + 1))
+        else:
+            shard_ids.append(int(part))
+    return sorted(set(shard_ids))
+
+
+def format_shard_ids(shard_ids: List[int]) -> str:
+    """연속된 구간을 묶어 '0-3,6' 형식으로 표시합니다. (parse_shard_ids 의 역함수)"""
+    parts = []
+    for shard_id in sorted(shard_ids):
+        if parts and parts[-1][1] == shard_id - 1:
+            parts[-1][1] = shard_id
+        else:
+            parts.append([shard_id, shard_id])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in parts)
+
+
+def shard_ranges(shard_count: int, clusters: int) -> List[List[int]]:
+    """전체 샤드를 clusters 개의 연속 구간으로 최대한 고르게 나눕니다."""
+    if shard_count < 1 or clusters < 1:
+        raise ValueError("shard_count 와 clusters 는 1 이상이어야 합니다.")
+    clusters = min(clusters, shard_count)
+    base, extra = divmod(shard_count, clusters)
+    ranges = []
+    start = 0
+    for index in range(clusters):
+        size = base + (1 if index < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
@@ -0,0 +1,88 @@
+from typing import Dict, Optional, Tuple
+import numpy as np
+from services.upgrade_service import UpgradeService
+
+MAX_LEVEL = 100
+
+# (표 지문, 보너스) -> UpgradeMarkovSolver
+_solutions: Dict[Tuple[str, float], "UpgradeMarkovSolver"] = {}
+
+
+class UpgradeMarkovSolver:
+    """강화 규칙을 흡수 마르코프 체인으로 보고 기대 시도 횟수/비용/도달 확률을 정확히 계산합니다.
+
+    모든 (시작 레벨, 목표 레벨) 쌍에 대해 목표 이상 레벨을 흡수 상태로 두고
+    (I - Q) x = b 를 풀어 결과를 표로 저장합니다.
+    """
+
+    def __init__(self, service: Optional[UpgradeService] = None, bonus: float = 0.0):
+        self.service = service or UpgradeService.get_instance()
+        self.bonus = bonus
+        self.fingerprint = self.service.tables_fingerprint()
+
+        size = MAX_LEVEL + 1
+        changes = self.service.OUTCOME_CHANGES
+        # transition[a, b]: 레벨 a 에서 한 번 강화 후 레벨 b 가 될 확률
+        # survive[a, b]: 위와 같지만 파괴되지 않은 경우만
+        self.transition = np.zeros((size, size))
+        self.survive = np.zeros((size, size))
+        self.cost = np.zeros(size)
+        for level in range(1, MAX_LEVEL):
+            probs = self.service.outcome_probabilities(level, bonus)
+            for change, p in zip(changes, probs):
+                to = min(MAX_LEVEL, max(1, level + change))
+                self.transition[level, to] += p
+                self.survive[level, to] += p
+            self.transition[level, 1] += probs[-1]  # 파괴 → Lv.1
+            self.cost[level] = self.service.calculate_cost(level)
+        self.transition[MAX_LEVEL, MAX_LEVEL] = 1.0
+
+        # attempts[s, t], spend[s, t], reach_safely[s, t]: 시작 s → 목표 t (s < t 에서만 유효)
+        self.attempts = np.zeros((size, size))
+        self.spend = np.zeros((size, size))
+        self.reach_safely = np.ones((size, size))
+        for target in range(2, MAX_LEVEL + 1):
+            self._solve(target)
+
+    def _solve(self, target: int):
+        states = slice(1, target)
+        n = target - 1
+        identity = np.eye(n)
+
+        # 기대 시도 횟수와 비용: (I - Q) x = 1, (I - Q) y = c
+        q = self.transition[states, states]
+        rhs = np.column_stack([np.ones(n), self.cost[states]])
+        solution = np.linalg.solve(identity - q, rhs)
+        self.attempts[states, target] = solution[:, 0]
+        self.spend[states, target] = solution[:, 1]
+
+        # 한 번도 파괴되지 않고 목표에 도달할 확률
+        q_safe = self.survive[states, states]
+        direct = self.survive[states, target:].sum(axis=1)
+        self.reach_safely[states, target] = np.linalg.solve(identity - q_safe, direct)
+
+    def expected(self, start: int, target: int) -> Dict[str, float]:
+        """start 레벨에서 target 레벨 이상에 처음 도달할 때까지의 기댓값"""
+        if not 1 <= start < target <= MAX_LEVEL:
+            raise ValueError("1 <= start < target <= 100 이어야 합니다.")
+        return {
+            "attempts": float(self.attempts[start, target]),
+            "cost": float(self.spend[start, target]),
+            "reach_without_destroy": float(self.reach_safely[start, target]),
+        }
+
+
+def get_solver(service: Optional[UpgradeService] = None, bonus: float = 0.0) -> UpgradeMarkovSolver:
+    """계산 결과를 캐시하여 반환합니다. 강화 표가 바뀌면 다시 계산합니다."""
+    service = service or UpgradeService.get_instance()
+    key = (service.tables_fingerprint(), bonus)
+    if key[0] != service._tables_fingerprint:
+        # 표가 바뀌었으면 레벨별 조회 표도 다시 계산
+        service.rebuild_tables()
+    solver = _solutions.get(key)
+    if solver is None:
+        # 이전 표로 계산한 결과는 버림
+        for old_key in [k for k in _solutions if k[0] != key[0]]:
+            del _solutions[old_key]
+        solver = _solutions[key] = UpgradeMarkovSolver(service, bonus)
+    return solver
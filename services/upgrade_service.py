@@ -1,7 +1,11 @@
-import random
+from array import array
+from functools import partial
 from typing import Tuple, Optional, Dict, Any
 from sqlalchemy import select
-from services.db import AsyncSessionLocal, User
+from services.db import AsyncSessionLocal, gear_table
+from services.quest import EconomyService
+from services.leaderboard import RankBoard
+from services.rng import game_rng
 
 
 class UpgradeService:
@@ -30,6 +34,19 @@ class UpgradeService:
         (91, 100): (50000000, 100000000),
     }
 
+    # 하락 시 '나머지' 구간에서 사용하는 하락 폭(1, 2, 3) 가중치
+    DROP_WEIGHTS = {
+        "Rare": (0.70, 0.25, 0.05),
+        "Epic": (0.70, 0.25, 0.05),
+        "Legendary": (0.50, 0.35, 0.15),
+        "Mythic": (0.30, 0.40, 0.30),
+    }
+
+    MAX_LEVEL = 100
+
+    # outcome_probabilities() 결과의 순서: 레벨 변화량 (+1, +2, +3, 유지, -1, -2, -3), 마지막은 파괴
+    OUTCOME_CHANGES = (1, 2, 3, 0, -1, -2, -3)
+
     TIER_COLORS = {
         "Rookie": 0x808080,     # 회색
         "Common": 0x00FF00,     # 초록
@@ -53,6 +70,14 @@ class UpgradeService:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(UpgradeService, cls).__new__(cls)
+            cls._instance.economy = EconomyService.get_instance()
+            cls._instance.gear_board = RankBoard(
+                cls._instance._load_gear_board,
+                cls._instance._gear_score,
+                partial(cls._instance.economy.count_higher, gear_table.c.gear_level),
+                min_score=1,
+            )
+            cls._instance.rebuild_tables()
         return cls._instance
 
     @classmethod
@@ -61,20 +86,34 @@ class UpgradeService:
             cls()
         return cls._instance
 
-    def get_tier_name(self, level: int) -> str:
-        """레벨에 해당하는 등급명 반환"""
+    def rebuild_tables(self):
+        """레벨별 등급/비용/확률 표를 미리 계산합니다. (TIERS, COST_RANGES 등을 바꾼 뒤에는 다시 호출)"""
+        size = self.MAX_LEVEL + 1
+        tier_names = tuple(self.TIERS)
+        self._tier_infos = tuple({"name": name, **self.TIERS[name]} for name in tier_names)
+        self._tier_index = array("B", (tier_names.index(self._find_tier_name(lv)) for lv in range(size)))
+        self._costs = array("q", (self._compute_cost(lv) for lv in range(size)))
+        self._base_rates = array("d", (self._compute_success_rate(lv) for lv in range(size)))
+        self._destroy_rates = array("d", (self._tier_infos[i]["destroy"] for i in self._tier_index))
+        self._gain_cdfs = tuple(self._cumulative(self._tier_infos[i]["gains"]) for i in self._tier_index)
+        self._drop_cdfs = tuple(
+            self._cumulative(self.DROP_WEIGHTS[self._tier_infos[i]["name"]])
+            if self._tier_infos[i]["name"] in self.DROP_WEIGHTS else None
+            for i in self._tier_index
+        )
+        self._tables_fingerprint = self.tables_fingerprint()
+
+    def tables_fingerprint(self) -> str:
+        """강화 표가 바뀌었는지 판단하기 위한 지문"""
+        return repr((self.TIERS, self.COST_RANGES, self.DROP_WEIGHTS))
+
+    def _find_tier_name(self, level: int) -> str:
         for tier_name, info in self.TIERS.items():
             if info["range"][0] <= level <= info["range"][1]:
                 return tier_name
         return "Ascension"
 
-    def get_tier_info(self, level: int) -> Dict[str, Any]:
-        """레벨에 해당하는 등급 정보 반환"""
-        tier_name = self.get_tier_name(level)
-        return {"name": tier_name, **self.TIERS[tier_name]}
-
-    def calculate_cost(self, level: int) -> int:
-        """레벨에 따른 강화 비용 계산"""
+    def _compute_cost(self, level: int) -> int:
         for (min_lv, max_lv), (min_cost, max_cost) in self.COST_RANGES.items():
             if min_lv <= level <= max_lv:
                 # 구간 내 레벨에 비례하여 비용 증가
@@ -82,53 +121,135 @@ class UpgradeService:
                 return int(min_cost + (max_cost - min_cost) * progress)
         return 50000000  # 기본값 (91+)
 
-    def calculate_success_rate(self, level: int, bonus: float = 0.0) -> float:
-        """레벨에 따른 성공 확률 계산 (보너스 포함)"""
-        tier = self.get_tier_info(level)
+    def _compute_success_rate(self, level: int) -> float:
+        tier = self.TIERS[self._find_tier_name(level)]
         min_lv, max_lv = tier["range"]
         max_rate, min_rate = tier["success"]  # 레벨이 올라갈수록 확률 감소
-        
+
         progress = (level - min_lv) / max(1, (max_lv - min_lv))
-        base_rate = max_rate - (max_rate - min_rate) * progress
-        
-        return min(1.0, base_rate + bonus)
+        return max_rate - (max_rate - min_rate) * progress
 
-    def _weighted_choice(self, weights: Tuple[float, ...], values: Tuple[int, ...]) -> int:
-        """가중치 기반 선택"""
-        roll = random.random()
+    @staticmethod
+    def _cumulative(weights: Tuple[float, ...]) -> Tuple[float, ...]:
+        # _weighted_choice 와 같은 순서로 더해 부동소수 결과까지 동일하게 유지
+        cdf = []
         cumulative = 0.0
-        for weight, value in zip(weights, values):
+        for weight in weights:
             cumulative += weight
+            cdf.append(cumulative)
+        return tuple(cdf)
+
+    def get_tier_name(self, level: int) -> str:
+        """레벨에 해당하는 등급명 반환"""
+        if 0 <= level <= self.MAX_LEVEL:
+            return self._tier_infos[self._tier_index[level]]["name"]
+        return self._find_tier_name(level)
+
+    def get_tier_info(self, level: int) -> Dict[str, Any]:
+        """레벨에 해당하는 등급 정보 반환 (공유 객체이므로 수정하지 마세요)"""
+        if 0 <= level <= self.MAX_LEVEL:
+            return self._tier_infos[self._tier_index[level]]
+        tier_name = self._find_tier_name(level)
+        return {"name": tier_name, **self.TIERS[tier_name]}
+
+    def calculate_cost(self, level: int) -> int:
+        """레벨에 따른 강화 비용 계산"""
+        if 0 <= level <= self.MAX_LEVEL:
+            return self._costs[level]
+        return self._compute_cost(level)
+
+    def calculate_success_rate(self, level: int, bonus: float = 0.0) -> float:
+        """레벨에 따른 성공 확률 계산 (보너스 포함)"""
+        if 0 <= level <= self.MAX_LEVEL:
+            return min(1.0, self._base_rates[level] + bonus)
+        return min(1.0, self._compute_success_rate(level) + bonus)
+
+    @staticmethod
+    def _choose(cdf: Tuple[float, ...], values: Tuple[int, ...], roll: float) -> int:
+        """누적 확률표 기반 선택 (roll: [0, 1) 난수)"""
+        for cumulative, value in zip(cdf, values):
             if roll < cumulative:
                 return value
         return values[-1]
 
+    def _weighted_choice(self, weights: Tuple[float, ...], values: Tuple[int, ...], roll: float) -> int:
+        """가중치 기반 선택"""
+        return self._choose(self._cumulative(weights), values, roll)
+
+    @staticmethod
+    def _choice_probabilities(weights: Tuple[float, ...]) -> Tuple[float, ...]:
+        """_weighted_choice 가 각 값을 고를 확률 (남는 확률은 마지막 값에 포함)"""
+        probs = []
+        cumulative = 0.0
+        for weight in weights[:-1]:
+            low = min(cumulative, 1.0)
+            cumulative += weight
+            probs.append(min(cumulative, 1.0) - low)
+        probs.append(1.0 - min(cumulative, 1.0))
+        return tuple(probs)
+
+    def outcome_probabilities(self, level: int, bonus: float = 0.0) -> Tuple[float, ...]:
+        """
+        upgrade() 한 번의 결과 확률을 반환합니다. (시뮬레이션/기댓값 계산용)
+        순서는 OUTCOME_CHANGES (+1, +2, +3, 유지, -1, -2, -3) 다음에 파괴입니다.
+        레벨 상·하한(1, 100)은 적용하지 않은 변화량 기준입니다.
+        """
+        tier = self.get_tier_info(level)
+        success = self.calculate_success_rate(level, bonus)
+        fail = 1.0 - success
+
+        gain = self._choice_probabilities(tier["gains"])
+        destroy = fail * tier["destroy"]
+        survive = fail - destroy
+
+        stay = survive
+        drops = [0.0, 0.0, 0.0]
+        if tier["drops"] is not None:
+            maintain_chance, drop1_chance = tier["drops"][0], tier["drops"][1]
+            rest = max(0.0, 1.0 - min(1.0, maintain_chance + drop1_chance))
+            stay = survive * min(1.0, maintain_chance)
+            drops[0] = survive * (min(1.0, maintain_chance + drop1_chance) - min(1.0, maintain_chance))
+            drop_weights = self.DROP_WEIGHTS.get(tier["name"])
+            rest_split = self._choice_probabilities(drop_weights) if drop_weights is not None else (1.0, 0.0, 0.0)
+            for i, p in enumerate(rest_split):
+                drops[i] += survive * rest * p
+
+        return (success * gain[0], success * gain[1], success * gain[2], stay, *drops, destroy)
+
+    def get_next_tier_estimate(self, level: int) -> Optional[Dict[str, Any]]:
+        """다음 등급(최고 등급이면 최대 레벨)까지의 기대 시도 횟수와 비용을 반환합니다."""
+        from services.upgrade_markov import get_solver
+
+        if level >= 100:
+            return None
+        target = min(100, self.get_tier_info(level)["range"][1] + 1)
+        return {
+            "target": target,
+            "tier": self.get_tier_name(target),
+            **get_solver(self).expected(level, target),
+        }
+
     async def get_user_gear(self, user_id: int) -> Tuple[int, int, str]:
         """유저의 장비 정보 조회 (현재 레벨, 최고 레벨, 장비 이름)"""
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(select(User).where(User.user_id == user_id))
-            user = result.scalar_one_or_none()
-            if user:
-                return user.gear_level or 1, user.max_gear_level or 1, user.gear_name or "기본 장비"
-            return 1, 1, "기본 장비"
+        level, max_level, name = await self.economy.read_columns(user_id, "gear_level", "max_gear_level", "gear_name")
+        return level or 1, max_level or 1, name or "기본 장비"
+
+    async def get_gear_overview(self, user_id: int) -> Tuple[int, int, str, int]:
+        """강화 화면용 장비 정보와 잔액을 한 번의 쿼리로 조회 (현재 레벨, 최고 레벨, 장비 이름, 잔액)"""
+        level, max_level, name, balance = await self.economy.read_columns(
+            user_id, "gear_level", "max_gear_level", "gear_name", "balance"
+        )
+        return level or 1, max_level or 1, name or "기본 장비", balance or 0
 
     async def set_gear_name(self, user_id: int, name: str):
         """장비 이름을 설정합니다."""
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(select(User).where(User.user_id == user_id))
-            user = result.scalar_one_or_none()
-            if user:
-                user.gear_name = name
-                await session.commit()
+        async with self.economy.user_state(user_id) as user:
+            user.gear_name = name
+            self.gear_board.update(user_id, user.gear_level or 1, user.max_gear_level or 1, name)
 
     async def get_balance(self, user_id: int) -> int:
         """유저의 잔액 조회"""
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(select(User).where(User.user_id == user_id))
-            user = result.scalar_one_or_none()
-            if user:
-                return user.balance or 0
-            return 0
+        return await self.economy.get_balance(user_id)
 
     async def upgrade(self, user_id: int, bonus: float = 0.0) -> Dict[str, Any]:
         """
@@ -142,24 +263,10 @@ class UpgradeService:
             "rate": float,
             "change": int,  # 레벨 변화량 (+1, +2, +3, -1, -2, -3, 0)
             "new_record": bool,  # 신기록 여부
+            "notifications": List[str],  # 업적 달성 알림
         }
         """
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(select(User).where(User.user_id == user_id))
-            user = result.scalar_one_or_none()
-            
-            if not user:
-                # 유저가 없으면 생성
-                user = User(
-                    user_id=user_id,
-                    balance=10000,
-                    gear_level=1,
-                    max_gear_level=1
-                )
-                session.add(user)
-                await session.commit()
-                await session.refresh(user)
-            
+        async with self.economy.user_state(user_id) as user:
             old_level = user.gear_level or 1
             cost = self.calculate_cost(old_level)
             
@@ -174,6 +281,7 @@ class UpgradeService:
                     "rate": 0,
                     "change": 0,
                     "new_record": False,
+                    "notifications": [],
                     "error": "insufficient_balance"
                 }
             
@@ -188,15 +296,17 @@ class UpgradeService:
                     "rate": 0,
                     "change": 0,
                     "new_record": False,
+                    "notifications": [],
                     "error": "max_level"
                 }
             
             # 비용 차감
-            user.balance -= cost
+            self.economy.change_balance(user, -cost, "upgrade")
             
             tier = self.get_tier_info(old_level)
             success_rate = self.calculate_success_rate(old_level, bonus)
-            roll = random.random()
+            rng = game_rng.stream("upgrade", user_id)
+            roll = rng.random()
             
             new_level = old_level
             destroyed = False
@@ -204,13 +314,13 @@ class UpgradeService:
             
             if roll < success_rate:
                 # 성공!
-                gain = self._weighted_choice(tier["gains"], (1, 2, 3))
+                gain = self._choose(self._gain_cdfs[old_level], (1, 2, 3), rng.random())
                 new_level = min(100, old_level + gain)
                 change = new_level - old_level
             else:
                 # 실패
-                destroy_rate = tier["destroy"]
-                if random.random() < destroy_rate:
+                destroy_rate = self._destroy_rates[old_level]
+                if rng.random() < destroy_rate:
                     # 파괴!
                     destroyed = True
                     new_level = 1
@@ -223,7 +333,7 @@ class UpgradeService:
                     drop1_chance = tier["drops"][1]
                     # 나머지는 -2 또는 -3
                     
-                    drop_roll = random.random()
+                    drop_roll = rng.random()
                     if drop_roll < maintain_chance:
                         # 유지
                         change = 0
@@ -233,13 +343,9 @@ class UpgradeService:
                         change = new_level - old_level
                     else:
                         # Rare 이상: 하락 가중치 적용
-                        tier_name = tier["name"]
-                        if tier_name in ["Rare", "Epic"]:
-                            drop = self._weighted_choice((0.70, 0.25, 0.05), (1, 2, 3))
-                        elif tier_name == "Legendary":
-                            drop = self._weighted_choice((0.50, 0.35, 0.15), (1, 2, 3))
-                        elif tier_name == "Mythic":
-                            drop = self._weighted_choice((0.30, 0.40, 0.30), (1, 2, 3))
+                        drop_cdf = self._drop_cdfs[old_level]
+                        if drop_cdf is not None:
+                            drop = self._choose(drop_cdf, (1, 2, 3), rng.random())
                         else:
                             drop = 1
                         new_level = max(1, old_level - drop)
@@ -252,9 +358,11 @@ class UpgradeService:
             if new_level > (user.max_gear_level or 1):
                 user.max_gear_level = new_level
                 new_record = True
-            
-            await session.commit()
-            
+            self.gear_board.update(user_id, new_level, user.max_gear_level, user.gear_name)
+            notifications = self.economy.check_achievements(user, "max_gear_level") if new_record else []
+            if change > 0:
+                notifications += self.economy.advance_quests(user, "gear", level=new_level)
+
             return {
                 "success": change > 0,
                 "destroyed": destroyed,
@@ -263,16 +371,30 @@ class UpgradeService:
                 "cost": cost,
                 "rate": success_rate,
                 "change": change,
-                "new_record": new_record
+                "new_record": new_record,
+                "notifications": notifications,
             }
 
-    async def get_leaderboard(self) -> list:
-        """장비 레벨 랭킹 TOP 10"""
+    async def _load_gear_board(self, limit: int) -> list:
+        # 아직 반영되지 않은 레벨 변화까지 포함하여 불러오기
+        await self.economy.cache.flush()
         async with AsyncSessionLocal() as session:
             result = await session.execute(
-                select(User.user_id, User.gear_level, User.max_gear_level, User.gear_name)
-                .where(User.gear_level > 1)
-                .order_by(User.gear_level.desc())
-                .limit(10)
+                select(gear_table.c.user_id, gear_table.c.gear_level, gear_table.c.max_gear_level, gear_table.c.gear_name)
+                .where(gear_table.c.gear_level > 1)
+                .order_by(gear_table.c.gear_level.desc(), gear_table.c.user_id)
+                .limit(limit)
             )
             return result.all()
+
+    async def _gear_score(self, user_id: int) -> int:
+        (level,) = await self.economy.read_columns(user_id, "gear_level")
+        return level
+
+    async def get_leaderboard(self) -> list:
+        """장비 레벨 랭킹 TOP 10"""
+        return await self.gear_board.top(10)
+
+    async def get_rank(self, user_id: int) -> Optional[int]:
+        """장비 레벨 기준 내 순위 (랭킹에 없으면 None)"""
+        return await self.gear_board.rank(user_id)
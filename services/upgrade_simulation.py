@@ -0,0 +1,127 @@
+from typing import Any, Dict, Optional
+import numpy as np
+from services.upgrade_service import UpgradeService
+
+MAX_LEVEL = 100
+
+
+class UpgradeSimulator:
+    """NumPy 배치 기반 강화 몬테카를로 시뮬레이터
+
+    UpgradeService.outcome_probabilities() 와 calculate_cost() 로 레벨별 결과 분포와 비용 표를
+    만든 뒤, 수많은 강화 시도 궤적을 한 번에 배열 연산으로 진행합니다. (잔액 제한은 없다고 가정)
+    """
+
+    def __init__(self, service: Optional[UpgradeService] = None, bonus: float = 0.0):
+        self.service = service or UpgradeService.get_instance()
+        self.bonus = bonus
+
+        changes = np.array(self.service.OUTCOME_CHANGES + (0,), dtype=np.int64)
+        n_outcomes = len(changes)
+        levels = np.arange(MAX_LEVEL + 1)
+
+        # 레벨별 결과 누적분포와 결과별 도달 레벨 (인덱스 0, 100 은 사용하지 않음)
+        self.cdf = np.ones((MAX_LEVEL + 1, n_outcomes))
+        self.next_level = np.tile(levels[:, None], (1, n_outcomes))
+        self.cost = np.zeros(MAX_LEVEL + 1, dtype=np.int64)
+        for level in range(1, MAX_LEVEL):
+            probs = np.array(self.service.outcome_probabilities(level, bonus))
+            self.cdf[level] = np.cumsum(probs)
+            self.next_level[level] = np.clip(level + changes, 1, MAX_LEVEL)
+            self.next_level[level, -1] = 1  # 파괴
+            self.cost[level] = self.service.calculate_cost(level)
+        self.cdf[:, -1] = 1.0  # 부동소수 오차로 마지막 결과를 놓치지 않도록
+
+    def _step(self, rng: np.random.Generator, level: np.ndarray):
+        """각 궤적을 한 번씩 강화하고 (새 레벨, 파괴 여부)를 반환합니다."""
+        rolls = rng.random(level.shape[0])
+        outcome = (rolls[:, None] >= self.cdf[level]).sum(axis=1)
+        return self.next_level[level, outcome], outcome == self.cdf.shape[1] - 1
+
+    def run(self, start: int = 1, target: int = MAX_LEVEL, trials: int = 1_000_000,
+            max_attempts: int = 100_000, seed: Optional[int] = None,
+            chunk_size: int = 250_000) -> Dict[str, Any]:
+        """
+        start 레벨에서 target 레벨에 처음 도달할 때까지 시뮬레이션합니다.
+        Returns: {
+            "reached": 레벨별 도달한 궤적 수,
+            "attempts_sum" / "cost_sum": 레벨별 첫 도달 시점의 시도 횟수/비용 합,
+            "destroy_by_level": 레벨별 파괴 횟수,
+            "attempts" / "cost" / "destroys": target 도달 궤적별 값 (분포 계산용),
+            "censored": max_attempts 안에 도달하지 못한 궤적 수,
+            ...
+        }
+        """
+        if not 1 <= start < target <= MAX_LEVEL:
+            raise ValueError("1 <= start < target <= 100 이어야 합니다.")
+
+        rng = np.random.default_rng(seed)
+        reached = np.zeros(MAX_LEVEL + 1, dtype=np.int64)
+        attempts_sum = np.zeros(MAX_LEVEL + 1, dtype=np.float64)
+        cost_sum = np.zeros(MAX_LEVEL + 1, dtype=np.float64)
+        destroy_by_level = np.zeros(MAX_LEVEL + 1, dtype=np.int64)
+        finished_attempts, finished_cost, finished_destroys = [], [], []
+        censored = 0
+        ever_destroyed = 0
+
+        for offset in range(0, trials, chunk_size):
+            n = min(chunk_size, trials - offset)
+            level = np.full(n, start, dtype=np.int64)
+            best = level.copy()
+            attempts = np.zeros(n, dtype=np.int64)
+            spent = np.zeros(n, dtype=np.int64)
+            destroys = np.zeros(n, dtype=np.int64)
+
+            for _ in range(max_attempts):
+                spent += self.cost[level]
+                attempts += 1
+                new_level, destroyed = self._step(rng, level)
+                destroy_by_level += np.bincount(level[destroyed], minlength=MAX_LEVEL + 1)
+                destroys += destroyed
+
+                # 처음 도달한 레벨마다 그 시점의 시도 횟수/비용을 누적 (한 번에 최대 +3)
+                new_best = np.maximum(best, new_level)
+                for gain in range(1, 4):
+                    hit = new_best >= best + gain
+                    if not hit.any():
+                        break
+                    lv = best[hit] + gain
+                    reached += np.bincount(lv, minlength=MAX_LEVEL + 1)
+                    attempts_sum += np.bincount(lv, weights=attempts[hit], minlength=MAX_LEVEL + 1)
+                    cost_sum += np.bincount(lv, weights=spent[hit], minlength=MAX_LEVEL + 1)
+                level, best = new_level, new_best
+
+                done = level >= target
+                if done.any():
+                    finished_attempts.append(attempts[done])
+                    finished_cost.append(spent[done])
+                    finished_destroys.append(destroys[done])
+                    ever_destroyed += int(np.count_nonzero(destroys[done]))
+                    keep = ~done
+                    level, best = level[keep], best[keep]
+                    attempts, spent, destroys = attempts[keep], spent[keep], destroys[keep]
+                if level.size == 0:
+                    break
+
+            censored += level.size
+            ever_destroyed += int(np.count_nonzero(destroys))
+
+        def concat(parts, dtype):
+            return np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+
+        return {
+            "start": start,
+            "target": target,
+            "trials": trials,
+            "bonus": self.bonus,
+            "max_attempts": max_attempts,
+            "reached": reached,
+            "attempts_sum": attempts_sum,
+            "cost_sum": cost_sum,
+            "destroy_by_level": destroy_by_level,
+            "attempts": concat(finished_attempts, np.int64),
+            "cost": concat(finished_cost, np.int64),
+            "destroys": concat(finished_destroys, np.int64),
+            "censored": censored,
+            "destroyed_trials": ever_destroyed,
+        }
@@ -0,0 +1,176 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from services.db import AsyncSessionLocal, engine
+from services.metrics import command_metrics
+import config
+
+WriteJob = Callable[[AsyncSession], Awaitable[Any]]
+
+
+class WriteQueue:
+    """SQLite 단일 쓰기 작업자
+
+    SQLite는 파일 전체에 쓰기 잠금이 하나뿐이므로, 여러 연결이 동시에 쓰면 서로 기다리다
+    "database is locked" 가 발생할 수 있습니다. 성능 모드에서는 모든 쓰기 작업을 이 큐로 보내
+    하나의 작업자가 쌓여 있는 작업들을 한 트랜잭션에서 실행하고 한 번만 커밋합니다.
+    (다른 DB이거나 성능 모드가 꺼져 있으면 작업마다 세션을 열어 바로 커밋합니다.)
+
+    작업마다 SAVEPOINT 를 두므로 실패한 작업만 되돌려지고, 어떤 작업도 두 번 실행되지 않습니다.
+    다만 커밋이 실패하면 이미 실행된 작업의 DB 변경도 모두 사라지므로, 작업은 세션 안의 DB 작업만
+    해야 합니다. (캐시 수정 같은 부수 효과는 run() 이 결과를 돌려준 뒤에)
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(WriteQueue, cls).__new__(cls)
+            cls._instance.enabled = engine.dialect.name == "sqlite" and config.SQLITE_PERFORMANCE_MODE
+            cls._instance.batch_size = config.SQLITE_WRITE_BATCH
+            cls._instance._queue = None
+            cls._instance._task = None
+            cls._instance._lock = None
+            cls._instance.jobs = 0
+            cls._instance.batches = 0
+            cls._instance.max_batch = 0
+            cls._instance.failed_jobs = 0
+        return cls._instance
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls()
+        return cls._instance
+
+    def _ensure_started(self):
+        # 이벤트 루프가 바뀐 경우(테스트/도구 스크립트의 asyncio.run 반복)에도 다시 시작
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._lock = asyncio.Lock()
+            self._task = asyncio.get_running_loop().create_task(self._worker())
+
+    async def run(self, job: WriteJob) -> Any:
+        """job(session) 을 쓰기 트랜잭션에서 실행하고, 커밋된 뒤 결과를 반환합니다. (job 은 DB 작업만)"""
+        if not self.enabled:
+            async with AsyncSessionLocal() as session:
+                result = await job(session)
+                await session.commit()
+                return result
+
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        # 작업자가 실행하는 쿼리도 요청한 명령어의 쿼리 수에 포함
+        self._queue.put_nowait((job, future, command_metrics.current()))
+        # 작업자 안의 쿼리는 다른 작업(task)에서 실행되므로 기다린 시간을 DB 시간으로 기록
+        start = time.perf_counter()
+        try:
+            return await future
+        finally:
+            command_metrics.add_db(time.perf_counter() - start)
+
+    @asynccontextmanager
+    async def exclusive(self):
+        """큐를 거치지 않는 쓰기 트랜잭션이 작업자와 겹치지 않도록 잠급니다."""
+        if not self.enabled:
+            yield
+            return
+        self._ensure_started()
+        start = time.perf_counter()
+        async with self._lock:
+            command_metrics.add_db(time.perf_counter() - start)
+            yield
+
+    async def _worker(self):
+        while True:
+            first = await self._queue.get()
+            taken = 1
+            # 큐가 빌 때까지 같은 연결을 계속 써서, 읽기 요청이 풀을 모두 쓰고 있어도
+            # 배치마다 연결을 기다리지 않게 함 (쉬는 동안에는 풀에 돌려줌)
+            try:
+                async with engine.connect() as conn:
+                    while first is not None or not self._queue.empty():
+                        batch = [first] if first is not None else []
+                        first = None
+                        while len(batch) < self.batch_size and not self._queue.empty():
+                            batch.append(self._queue.get_nowait())
+                            taken += 1
+                        async with self._lock:
+                            await self._run_batch(conn, batch)
+            except Exception as e:
+                # 연결을 얻지 못한 경우 (배치 안의 오류는 _run_batch 가 작업별로 전달)
+                print(f"[DB] ❌ 쓰기 작업자 연결 실패: {e}")
+                if first is not None and not first[1].done():
+                    self.failed_jobs += 1
+                    first[1].set_exception(e)
+            finally:
+                # 연결을 풀에 돌려준 뒤에 처리 완료로 표시 (close() 가 이것을 기다림)
+                for _ in range(taken):
+                    self._queue.task_done()
+
+    async def close(self):
+        """대기 중인 작업이 모두 끝나고 연결을 풀에 돌려줄 때까지 기다린 뒤 작업자를 멈춥니다."""
+        if self._task is None or self._task.done():
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run_batch(self, conn, batch):
+        self.jobs += len(batch)
+        self.batches += 1
+        self.max_batch = max(self.max_batch, len(batch))
+        try:
+            results = await self._execute(conn, batch)
+        except Exception as e:
+            # 커밋(또는 작업이 하나뿐인 배치)이 실패하면 다시 실행하지 않고 모두 오류를 받음
+            results = [(e, None)] * len(batch)
+        self.failed_jobs += sum(error is not None for error, _ in results)
+        for (_, future, _), (error, result) in zip(batch, results):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    async def _execute(self, conn, batch) -> list:
+        """배치를 한 트랜잭션에서 실행하고 작업별 (예외, 결과) 목록을 반환합니다."""
+        async with AsyncSession(bind=conn, expire_on_commit=False) as session:
+            await session.execute(text("BEGIN IMMEDIATE"))
+            if len(batch) == 1:
+                job, _, timing = batch[0]
+                with command_metrics.charge(timing):
+                    results = [(None, await job(session))]
+                await session.commit()
+                return results
+
+            results = []
+            for job, _, timing in batch:
+                # SAVEPOINT/RELEASE 는 작업을 요청한 명령어의 쿼리 수에 넣지 않음
+                try:
+                    async with session.begin_nested():
+                        await session.connection()  # SAVEPOINT 를 여기서 바로 실행
+                        with command_metrics.charge(timing):
+                            results.append((None, await job(session)))
+                except Exception as e:
+                    results.append((e, None))
+            await session.commit()
+            return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "jobs": self.jobs,
+            "batches": self.batches,
+            "avg_batch": self.jobs / self.batches if self.batches else 0.0,
+            "max_batch": self.max_batch,
+            "failed_jobs": self.failed_jobs,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
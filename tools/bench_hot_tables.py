@@ -0,0 +1,142 @@
+"""
+users 테이블 분리 전/후 비교 벤치마크 (SQLite)
+
+마이그레이션 1 시점의 넓은 users 테이블과 현재의 users/wallet/gamble_stats/gear 분리 스키마에
+같은 유저 데이터를 넣고 다음을 비교합니다.
+  - 잔고가 들어 있는 테이블의 크기 (dbstat)
+  - 잔고 변경 시 WAL 에 기록되는 양 (1건씩 커밋 / 캐시 반영처럼 여러 건을 한 번에 커밋)
+  - 잔고 변경 및 유저 상태 전체 조회 지연 시간
+
+사용법: python -m tools.bench_hot_tables [--users 5000] [--updates 2000] [--batch 500]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from sqlalchemy import create_engine
+from services.db import Base
+from services.migrations import _v1_meta
+
+ACHIEVEMENTS = ["first_win", "lucky_streak_3", "lucky_streak_5", "bad_luck_3"]
+QUEST = {"type": "win_streak", "target": 5, "current": 2, "reward": 50000, "penalty": 20000}
+
+
+def create_schema(path: str, split: bool):
+    engine = create_engine(f"sqlite:///{path}")
+    (Base.metadata if split else _v1_meta).create_all(engine)
+    engine.dispose()
+
+
+def populate(conn, split: bool, users: int):
+    rng = random.Random(0)
+    profile = []
+    for user_id in range(1, users + 1):
+        achievements = json.dumps(rng.sample(ACHIEVEMENTS, rng.randint(0, len(ACHIEVEMENTS))))
+        quest = json.dumps(QUEST) if rng.random() < 0.3 else None
+        profile.append((user_id, achievements, quest, "2024-01-01 00:00:00", "2024-01-01", rng.randint(0, 30)))
+    if split:
+        # 퀘스트는 마이그레이션 6 이후 quests 테이블로 분리됨
+        conn.executemany("INSERT INTO users VALUES (?, ?, ?, ?, ?)", [(p[0], p[1]) + p[3:] for p in profile])
+        conn.executemany("INSERT INTO wallet VALUES (?, ?)", [(u, 10000) for u in range(1, users + 1)])
+        conn.executemany("INSERT INTO gamble_stats VALUES (?, 0, 0, 0, 0.0, 0, 0)", [(u,) for u in range(1, users + 1)])
+        conn.executemany("INSERT INTO gear VALUES (?, 1, 1, '기본 장비')", [(u,) for u in range(1, users + 1)])
+    else:
+        conn.executemany(
+            "INSERT INTO users (user_id, balance, wins, losses, streak, max_risk_win, achievements, warnings,"
+            " active_quest, gear_level, max_gear_level, gear_name, max_gambling_win, total_gambling_win,"
+            " last_claim_time, last_attendance_date, attendance_streak)"
+            " VALUES (?, 10000, 0, 0, 0, 0.0, ?, '[]', ?, 1, 1, '기본 장비', 0, 0, ?, ?, ?)",
+            profile,
+        )
+    conn.commit()
+
+
+def wal_size(path: str) -> int:
+    wal = path + "-wal"
+    return os.path.getsize(wal) if os.path.exists(wal) else 0
+
+
+def run(layout: str, args) -> dict:
+    split = layout == "split"
+    tmpdir = tempfile.TemporaryDirectory()
+    path = os.path.join(tmpdir.name, f"{layout}.db")
+    create_schema(path, split)
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA wal_autocheckpoint=0")
+    conn.execute("BEGIN")
+    populate(conn, split, args.users)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    table = "wallet" if split else "users"
+    size = conn.execute("SELECT sum(pgsize) FROM dbstat WHERE name = ?", (table,)).fetchone()[0]
+    update_sql = f"UPDATE {table} SET balance = balance + ? WHERE user_id = ?"
+    rng = random.Random(1)
+
+    # 1건씩 커밋 (캐시를 쓰지 않을 때)
+    timings = []
+    for _ in range(args.updates):
+        start = time.perf_counter()
+        conn.execute("BEGIN")
+        conn.execute(update_sql, (rng.randint(-100, 100), rng.randint(1, args.users)))
+        conn.execute("COMMIT")
+        timings.append(time.perf_counter() - start)
+    single_wal = wal_size(path) / args.updates
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    # 여러 유저를 한 번에 반영 (write-behind 캐시 반영과 같은 형태)
+    rows = [(rng.randint(-100, 100), user_id) for user_id in rng.sample(range(1, args.users + 1), args.batch)]
+    conn.execute("BEGIN")
+    conn.executemany(update_sql, rows)
+    conn.execute("COMMIT")
+    batch_wal = wal_size(path)
+
+    # 유저 상태 전체 조회 (캐시 미스 시 불러오는 쿼리)
+    if split:
+        load_sql = (
+            "SELECT * FROM users JOIN wallet USING (user_id) JOIN gamble_stats USING (user_id)"
+            " JOIN gear USING (user_id) WHERE user_id = ?"
+        )
+    else:
+        load_sql = "SELECT * FROM users WHERE user_id = ?"
+    start = time.perf_counter()
+    for _ in range(args.updates):
+        conn.execute(load_sql, (rng.randint(1, args.users),)).fetchone()
+    load_time = (time.perf_counter() - start) / args.updates
+
+    conn.close()
+    tmpdir.cleanup()
+    timings.sort()
+    return {
+        "table": table,
+        "size": size,
+        "single_wal": single_wal,
+        "batch_wal": batch_wal,
+        "update_p50": timings[len(timings) // 2],
+        "load": load_time,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=500, help="한 번에 반영할 유저 수")
+    args = parser.parse_args()
+
+    results = {layout: run(layout, args) for layout in ("wide", "split")}
+    print(f"{'항목':<28} {'분리 전(users)':>16} {'분리 후(wallet)':>16}")
+    wide, split = results["wide"], results["split"]
+    print(f"{'잔고 테이블 크기':<28} {wide['size'] / 1024:>13.0f} KB {split['size'] / 1024:>13.0f} KB")
+    print(f"{'WAL / 1건 커밋':<28} {wide['single_wal']:>14.0f} B {split['single_wal']:>14.0f} B")
+    print(f"{f'WAL / {args.batch}건 일괄 커밋':<28} {wide['batch_wal'] / 1024:>13.0f} KB {split['batch_wal'] / 1024:>13.0f} KB")
+    print(f"{'잔고 변경 p50':<28} {wide['update_p50'] * 1e6:>13.1f} us {split['update_p50'] * 1e6:>13.1f} us")
+    print(f"{'유저 상태 전체 조회':<28} {wide['load'] * 1e6:>13.1f} us {split['load'] * 1e6:>13.1f} us")
+
+
+if __name__ == "__main__":
+    main()
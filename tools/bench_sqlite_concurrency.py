@@ -0,0 +1,111 @@
+"""
+SQLite 동시 접속 벤치마크
+
+여러 유저가 동시에 /지원금 과 도박(판 진행 + 정산)을 반복하는 상황을 흉내 내어
+처리량, 지연 시간, "database is locked" 등 오류 횟수를 설정별로 비교합니다.
+설정은 모듈 로드 시점에 읽히므로 모드마다 별도 프로세스로 실행합니다.
+
+  legacy      : 성능 모드 끔 (기본 저널, 연결마다 따로 커밋), 캐시 끔
+  perf        : WAL + PRAGMA + 단일 쓰기 작업자, 캐시 끔
+  perf+cache  : 성능 모드 + write-behind 캐시 (즉시 반영)
+
+사용법: python -m tools.bench_sqlite_concurrency [--users 200] [--rounds 10]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = {
+    "legacy": {"SQLITE_PERFORMANCE_MODE": "0", "USER_CACHE_SIZE": "0"},
+    "perf": {"SQLITE_PERFORMANCE_MODE": "1", "USER_CACHE_SIZE": "0"},
+    "perf+cache": {"SQLITE_PERFORMANCE_MODE": "1", "USER_CACHE_SIZE": "10000", "USER_CACHE_FLUSH_INTERVAL": "0"},
+}
+
+
+async def simulate(users: int, rounds: int) -> dict:
+    from services.db import init_db, engine
+    from services.quest import EconomyService
+    from services.writer import WriteQueue
+
+    await init_db()
+    economy = EconomyService.get_instance()
+    timings = []
+    errors = {}
+
+    async def timed(coro):
+        start = time.perf_counter()
+        try:
+            await coro
+        except Exception as e:
+            key = type(e).__name__ + (": database is locked" if "locked" in str(e) else "")
+            errors[key] = errors.get(key, 0) + 1
+        timings.append(time.perf_counter() - start)
+
+    async def player(user_id: int):
+        rng = random.Random(user_id)
+        await timed(economy.claim_reward(user_id))
+        for _ in range(rounds):
+            await timed(economy.play_round(user_id, 0.5, 1.98, 1000, bet=1000))
+            if rng.random() < 0.5:
+                await timed(economy.cash_out(user_id, 1980))
+
+    base = 10 ** 12
+    start = time.perf_counter()
+    await asyncio.gather(*(player(base + i) for i in range(users)))
+    await economy.cache.close()
+    elapsed = time.perf_counter() - start
+
+    timings.sort()
+    result = {
+        "ops": len(timings),
+        "elapsed": elapsed,
+        "p50": statistics.median(timings),
+        "p99": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        "errors": errors,
+        "writer": WriteQueue.get_instance().stats(),
+    }
+    await engine.dispose()
+    return result
+
+
+def run_mode(mode: str, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        env = dict(os.environ, **MODES[mode])
+        env["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(tmpdir, 'bench.db')}"
+        output = subprocess.run(
+            [sys.executable, "-m", "tools.bench_sqlite_concurrency", "--child",
+             "--users", str(args.users), "--rounds", str(args.rounds)],
+            env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200, help="동시에 플레이하는 유저 수")
+    parser.add_argument("--rounds", type=int, default=10, help="유저당 도박 판 수")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(simulate(args.users, args.rounds))))
+        return
+
+    print(f"{'모드':<12} {'작업':>7} {'처리량(ops/s)':>14} {'p50':>9} {'p99':>9} {'평균 배치':>9}  오류")
+    for mode in MODES:
+        r = run_mode(mode, args)
+        errors = ", ".join(f"{k} {v}" for k, v in r["errors"].items()) or "없음"
+        batch = f"{r['writer']['avg_batch']:.1f}" if r["writer"]["batches"] else "-"
+        print(f"{mode:<12} {r['ops']:>7} {r['ops'] / r['elapsed']:>14.0f} {r['p50'] * 1000:>7.1f}ms "
+              f"{r['p99'] * 1000:>7.1f}ms {batch:>9}  {errors}")
+
+
+if __name__ == "__main__":
+    main()
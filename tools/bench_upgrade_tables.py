@@ -0,0 +1,130 @@
+"""
+강화 조회 표 마이크로 벤치마크 + 기존 공식과의 일치 검사
+
+UpgradeService 의 get_tier_name / get_tier_info / calculate_cost / calculate_success_rate 가
+표 도입 이전의 공식(아래 legacy_*)과 모든 레벨·보너스에서 같은 값을 내는지 확인한 뒤,
+강화 화면 한 번을 그릴 때와 같은 호출 묶음의 속도를 비교합니다.
+
+사용법: python -m tools.bench_upgrade_tables [--number 20000]
+"""
+import argparse
+import random
+import timeit
+from services.upgrade_service import UpgradeService
+
+service = UpgradeService.get_instance()
+TIERS = service.TIERS
+COST_RANGES = service.COST_RANGES
+
+
+# ---- 표 도입 이전 구현 (비교 기준) ----
+def legacy_get_tier_name(level):
+    for tier_name, info in TIERS.items():
+        if info["range"][0] <= level <= info["range"][1]:
+            return tier_name
+    return "Ascension"
+
+
+def legacy_get_tier_info(level):
+    tier_name = legacy_get_tier_name(level)
+    return {"name": tier_name, **TIERS[tier_name]}
+
+
+def legacy_calculate_cost(level):
+    for (min_lv, max_lv), (min_cost, max_cost) in COST_RANGES.items():
+        if min_lv <= level <= max_lv:
+            progress = (level - min_lv) / max(1, (max_lv - min_lv))
+            return int(min_cost + (max_cost - min_cost) * progress)
+    return 50000000
+
+
+def legacy_calculate_success_rate(level, bonus=0.0):
+    tier = legacy_get_tier_info(level)
+    min_lv, max_lv = tier["range"]
+    max_rate, min_rate = tier["success"]
+    progress = (level - min_lv) / max(1, (max_lv - min_lv))
+    base_rate = max_rate - (max_rate - min_rate) * progress
+    return min(1.0, base_rate + bonus)
+
+
+def legacy_weighted_choice(weights, values):
+    roll = random.random()
+    cumulative = 0.0
+    for weight, value in zip(weights, values):
+        cumulative += weight
+        if roll < cumulative:
+            return value
+    return values[-1]
+
+
+def check_parity():
+    levels = range(-1, 103)
+    for level in levels:
+        assert service.get_tier_name(level) == legacy_get_tier_name(level), level
+        assert service.get_tier_info(level) == legacy_get_tier_info(level), level
+        assert service.calculate_cost(level) == legacy_calculate_cost(level), level
+        for bonus in (0.0, 0.03, 0.5):
+            assert service.calculate_success_rate(level, bonus) == legacy_calculate_success_rate(level, bonus), (level, bonus)
+
+    # 같은 난수 흐름에서 가중치 선택 결과가 같아야 함
+    for level in range(1, 100):
+        tier = legacy_get_tier_info(level)
+        weight_sets = [tier["gains"]]
+        if tier["name"] in service.DROP_WEIGHTS:
+            weight_sets.append(service.DROP_WEIGHTS[tier["name"]])
+        for weights in weight_sets:
+            random.seed(level)
+            expected = [legacy_weighted_choice(weights, (1, 2, 3)) for _ in range(200)]
+            random.seed(level)
+            cdf = service._cumulative(weights)
+            assert [service._choose(cdf, (1, 2, 3), random.random()) for _ in range(200)] == expected, level
+    print(f"✅ 일치 검사 통과 (레벨 {levels.start}~{levels.stop - 1}, 보너스 0/3/50%)")
+
+
+def render_legacy(level):
+    # UpgradeMainView.get_embed + start_upgrade 에서 한 번에 호출되는 조합
+    legacy_get_tier_name(level)
+    legacy_calculate_cost(level)
+    legacy_calculate_success_rate(level)
+    legacy_get_tier_info(level)
+    legacy_calculate_cost(level)
+    legacy_calculate_success_rate(level)
+    legacy_get_tier_info(level)
+
+
+def render_tables(level):
+    service.get_tier_name(level)
+    service.calculate_cost(level)
+    service.calculate_success_rate(level)
+    service.get_tier_info(level)
+    service.calculate_cost(level)
+    service.calculate_success_rate(level)
+    service.get_tier_info(level)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="레벨 1~100 전체를 도는 반복 횟수")
+    args = parser.parse_args()
+
+    check_parity()
+
+    cases = [
+        ("get_tier_name", legacy_get_tier_name, service.get_tier_name),
+        ("get_tier_info", legacy_get_tier_info, service.get_tier_info),
+        ("calculate_cost", legacy_calculate_cost, service.calculate_cost),
+        ("calculate_success_rate", legacy_calculate_success_rate, service.calculate_success_rate),
+        ("화면 1회 렌더링 묶음", render_legacy, render_tables),
+    ]
+    levels = range(1, 101)
+    number = max(1, args.number // 100)
+    print(f"{'항목':<24} {'기존(ns/회)':>12} {'표(ns/회)':>12} {'속도 향상':>8}")
+    for name, legacy, table in cases:
+        calls = number * len(levels)
+        old = timeit.timeit(lambda: [legacy(lv) for lv in levels], number=number) / calls * 1e9
+        new = timeit.timeit(lambda: [table(lv) for lv in levels], number=number) / calls * 1e9
+        print(f"{name:<24} {old:>12.1f} {new:>12.1f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
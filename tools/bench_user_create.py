@@ -0,0 +1,109 @@
+"""
+첫 명령어(신규 유저 생성) 지연 시간 벤치마크
+
+기존 방식(SELECT → add → commit → refresh)과 upsert 방식
+(SELECT → 프로필 INSERT ... ON CONFLICT DO NOTHING RETURNING → 나머지 테이블 INSERT → commit,
+PostgreSQL 은 SELECT → 네 테이블을 만드는 CTE 한 구문 → commit)을 비교합니다.
+
+사용법: python -m tools.bench_user_create [--url DATABASE_URL] [--users 500]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from services.db import Base, User
+from services.quest import EconomyService
+
+
+async def legacy_get_user(session, user_id: int) -> User:
+    """user-003 이전의 SELECT-then-INSERT-then-refresh 경로"""
+    result = await session.execute(select(User).where(User.user_id == user_id))
+    user = result.scalar_one_or_none()
+    if not user:
+        user = User(user_id=user_id, **EconomyService.NEW_USER_DEFAULTS)
+        session.add(user)
+        await session.commit()
+        await session.refresh(user)
+    return user
+
+
+async def upsert_get_user(session, user_id: int) -> User:
+    economy = EconomyService.get_instance()
+    user = await economy.get_user(session, user_id)
+    if session.info.pop("user_created", False):
+        await session.commit()
+    return user
+
+
+async def measure(session_factory, resolve, user_ids) -> list:
+    timings = []
+    for user_id in user_ids:
+        start = time.perf_counter()
+        async with session_factory() as session:
+            await resolve(session, user_id)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def race(session_factory, resolve, user_ids) -> int:
+    """같은 신규 유저에 대한 동시 요청 두 개를 보내고 실패 횟수를 셉니다."""
+    async def one(user_id):
+        async with session_factory() as session:
+            await resolve(session, user_id)
+
+    failures = 0
+    for user_id in user_ids:
+        results = await asyncio.gather(one(user_id), one(user_id), return_exceptions=True)
+        failures += sum(isinstance(r, IntegrityError) for r in results)
+    return failures
+
+
+def report(name: str, timings: list):
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f"{name:<8} mean {statistics.mean(timings) * 1000:7.3f}ms | "
+          f"p50 {statistics.median(timings) * 1000:7.3f}ms | p99 {p99 * 1000:7.3f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="벤치마크용 DB URL (기본: 임시 SQLite 파일)")
+    parser.add_argument("--users", type=int, default=500)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.url
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite+aiosqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+
+    engine = create_async_engine(url)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    base = 10 ** 15
+    n = args.users
+    paths = [("legacy", legacy_get_user), ("upsert", upsert_get_user)]
+    for offset, (name, resolve) in enumerate(paths):
+        ids = range(base + offset * 10 * n, base + offset * 10 * n + n)
+        report(name, await measure(session_factory, resolve, ids))
+
+    for offset, (name, resolve) in enumerate(paths, start=len(paths)):
+        ids = range(base + offset * 10 * n, base + offset * 10 * n + min(n, 100))
+        print(f"{name:<8} 동시 생성 경쟁 실패: {await race(session_factory, resolve, ids)}회")
+
+    await engine.dispose()
+    if tmpdir:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,160 @@
+"""
+잔고 ↔ 잔고 변동 기록(ledger) 정합성 검사 / 재계산 도구
+
+wallet 테이블과 ledger 테이블을 user_id 순서로 나누어 읽으면서(서버 측 커서, yield_per)
+두 흐름을 병합해 유저별로 다음을 확인합니다. 한 번에 메모리에 올리는 행은 청크 크기만큼이라
+유저·기록이 수백만 건이어도 메모리 사용량이 일정합니다.
+
+  - 잔고 불일치 : wallet.balance != sum(ledger.amount)
+  - 기록 없음   : 잔고가 0이 아닌데 ledger 기록이 없는 유저
+  - 고아 기록   : wallet 행이 없는 유저의 ledger 기록
+  - 연쇄 오류   : 기록 순서대로 누적한 합계와 balance_after 가 다른 행
+
+--fix 를 주면 ledger 합계를 기준으로 wallet.balance 를 다시 계산해 저장합니다.
+(write-behind 캐시에 반영되지 않은 잔고가 있을 수 있으므로 봇을 멈춘 상태에서 실행하세요.)
+
+사용법: python -m tools.check_ledger [--chunk 10000] [--show 20] [--fix]
+"""
+import argparse
+import asyncio
+import resource
+import time
+from sqlalchemy import bindparam, select, update
+from services.db import engine, ledger_table, wallet_table
+
+
+async def stream_rows(stmt, chunk: int):
+    """stmt 결과를 chunk 행씩 가져오며 한 행씩 돌려줍니다. (PostgreSQL 은 서버 측 커서)"""
+    async with engine.connect() as conn:
+        result = await conn.stream(stmt.execution_options(yield_per=chunk))
+        async for partition in result.partitions():
+            for row in partition:
+                yield row
+
+
+async def ledger_totals(chunk: int, report: dict):
+    """ledger 를 (user_id, id) 순서로 읽어 유저별 (user_id, 합계, 행 수)를 돌려줍니다."""
+    stmt = select(
+        ledger_table.c.user_id, ledger_table.c.id, ledger_table.c.amount, ledger_table.c.balance_after
+    ).order_by(ledger_table.c.user_id, ledger_table.c.id)
+
+    user_id = total = rows = None
+    async for row in stream_rows(stmt, chunk):
+        if row.user_id != user_id:
+            if user_id is not None:
+                yield user_id, total, rows
+            user_id, total, rows = row.user_id, 0, 0
+        total += row.amount
+        rows += 1
+        report["ledger_rows"] += 1
+        if total != row.balance_after:
+            report["chain_breaks"] += 1
+            if len(report["chain_samples"]) < report["show"]:
+                report["chain_samples"].append((row.user_id, row.id, total, row.balance_after))
+    if user_id is not None:
+        yield user_id, total, rows
+
+
+async def check(chunk: int, show: int, fix: bool) -> dict:
+    report = {
+        "show": show,
+        "users": 0,
+        "ledger_rows": 0,
+        "drift": 0,
+        "drift_total": 0,
+        "missing_ledger": 0,
+        "orphan_users": 0,
+        "chain_breaks": 0,
+        "fixed": 0,
+        "samples": [],
+        "chain_samples": [],
+    }
+    pending_fixes = []
+
+    async def apply_fixes():
+        if not pending_fixes:
+            return
+        stmt = (
+            update(wallet_table)
+            .where(wallet_table.c.user_id == bindparam("uid"))
+            .values(balance=bindparam("new_balance"))
+        )
+        async with engine.begin() as conn:
+            await conn.execute(stmt, pending_fixes)
+        report["fixed"] += len(pending_fixes)
+        pending_fixes.clear()
+
+    def drift(user_id: int, balance: int, total: int):
+        report["drift"] += 1
+        report["drift_total"] += balance - total
+        if len(report["samples"]) < show:
+            report["samples"].append((user_id, balance, total))
+        if fix:
+            pending_fixes.append({"uid": user_id, "new_balance": total})
+
+    wallets = stream_rows(
+        select(wallet_table.c.user_id, wallet_table.c.balance).order_by(wallet_table.c.user_id), chunk
+    )
+    ledgers = ledger_totals(chunk, report)
+
+    async def next_or_none(iterator):
+        try:
+            return await iterator.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    wallet = await next_or_none(wallets)
+    ledger = await next_or_none(ledgers)
+    # 두 흐름 모두 user_id 오름차순이므로 병합 조인
+    while wallet is not None or ledger is not None:
+        if ledger is None or (wallet is not None and wallet.user_id < ledger[0]):
+            report["users"] += 1
+            balance = wallet.balance or 0
+            if balance != 0:
+                report["missing_ledger"] += 1
+                drift(wallet.user_id, balance, 0)
+            wallet = await next_or_none(wallets)
+        elif wallet is None or ledger[0] < wallet.user_id:
+            report["orphan_users"] += 1
+            ledger = await next_or_none(ledgers)
+        else:
+            report["users"] += 1
+            balance = wallet.balance or 0
+            if balance != ledger[1]:
+                drift(wallet.user_id, balance, ledger[1])
+            wallet = await next_or_none(wallets)
+            ledger = await next_or_none(ledgers)
+
+        if len(pending_fixes) >= chunk:
+            await apply_fixes()
+    await apply_fixes()
+    return report
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk", type=int, default=10000, help="한 번에 가져올 행 수")
+    parser.add_argument("--show", type=int, default=20, help="출력할 불일치 예시 수")
+    parser.add_argument("--fix", action="store_true", help="ledger 합계로 wallet.balance 재계산")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = await check(args.chunk, args.show, args.fix)
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+
+    print(f"[Ledger] 유저 {report['users']:,}명, 기록 {report['ledger_rows']:,}건 검사 ({elapsed:.1f}초, "
+          f"최대 메모리 {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f}MB)")
+    print(f"[Ledger] 잔고 불일치 {report['drift']:,}명 (잔고 - 기록 합계 = {report['drift_total']:+,}), "
+          f"기록 없음 {report['missing_ledger']:,}명, 고아 기록 {report['orphan_users']:,}명, "
+          f"연쇄 오류 {report['chain_breaks']:,}건")
+    for user_id, balance, total in report["samples"]:
+        print(f"  - 유저 {user_id}: 잔고 {balance:,} / 기록 합계 {total:,} (차이 {balance - total:+,})")
+    for user_id, ledger_id, total, balance_after in report["chain_samples"]:
+        print(f"  - 유저 {user_id} 기록 #{ledger_id}: 누적 {total:,} / balance_after {balance_after:,}")
+    if args.fix:
+        print(f"[Ledger] ✅ wallet 잔고 {report['fixed']:,}건 재계산")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
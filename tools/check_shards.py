@@ -0,0 +1,101 @@
+"""
+샤드 분할 검사 도구 (가짜 게이트웨이)
+
+런처가 샤드를 클러스터로 나누는 과정(shard_ranges → SHARD_IDS 환경 변수 → main.py 의 parse_shard_ids)을
+그대로 거친 뒤, 무작위 길드 ID(스노플레이크)를 discord.py 의 Guild.shard_id 규칙으로 샤드에 배정하는
+가짜 게이트웨이를 돌려 모든 길드가 정확히 하나의 클러스터에만 전달되는지 확인합니다.
+(어느 클러스터에도 없는 길드는 이벤트를 받지 못하고, 둘 이상이면 같은 이벤트를 두 번 처리합니다.)
+
+--shards / --clusters 를 주면 그 조합만, 주지 않으면 1..--max-shards 샤드 × 1..--max-clusters 클러스터를
+모두 검사합니다. 하나라도 어긋나면 종료 코드 1로 끝납니다.
+
+사용법: python -m tools.check_shards [--shards 16 --clusters 4] [--max-shards 64] [--max-clusters 16]
+                                   [--guilds 10000] [--seed 0]
+"""
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+from types import SimpleNamespace
+import discord
+from services.sharding import format_shard_ids, parse_shard_ids, shard_ranges
+
+DISCORD_EPOCH_MS = 1420070400000
+
+
+def random_guild_ids(count: int, rng: random.Random) -> list:
+    """2015년 이후 생성 시각과 무작위 하위 22비트를 가진 스노플레이크"""
+    now_ms = int(time.time() * 1000)
+    return [((rng.randint(DISCORD_EPOCH_MS, now_ms) - DISCORD_EPOCH_MS) << 22) | rng.getrandbits(22) for _ in range(count)]
+
+
+def gateway_shards(guild_ids: list, shard_count: int) -> list:
+    """discord.py 가 길드에 붙이는 샤드 번호 (Guild.shard_id 를 그대로 사용)"""
+    state = SimpleNamespace(shard_count=shard_count)
+    shards = []
+    for guild_id in guild_ids:
+        guild = discord.Guild.__new__(discord.Guild)
+        guild.id = guild_id
+        guild._state = state
+        shards.append(guild.shard_id)
+    return shards
+
+
+def check(shard_count: int, clusters: int, guild_shards: Counter) -> list:
+    """한 조합을 검사하고 발견한 문제 목록을 반환합니다."""
+    problems = []
+    owners = Counter()
+    for cluster_id, shard_ids in enumerate(shard_ranges(shard_count, clusters)):
+        # 런처가 워커에 넘기는 값 → 워커(main.py)가 읽는 값
+        parsed = parse_shard_ids(format_shard_ids(shard_ids))
+        if parsed != shard_ids:
+            problems.append(f"클러스터 {cluster_id}: SHARD_IDS 왕복 불일치 {shard_ids} → {parsed}")
+        owners.update(parsed or [])
+
+    for shard_id in owners:
+        if not 0 <= shard_id < shard_count:
+            problems.append(f"샤드 {shard_id}: 범위 밖 샤드 번호")
+    for shard_id, guilds in sorted(guild_shards.items()):
+        if owners[shard_id] != 1:
+            problems.append(f"샤드 {shard_id}: 길드 {guilds}개가 클러스터 {owners[shard_id]}곳에 전달됨")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, help="검사할 샤드 수 (생략하면 1..--max-shards)")
+    parser.add_argument("--clusters", type=int, help="검사할 클러스터 수 (생략하면 1..--max-clusters)")
+    parser.add_argument("--max-shards", type=int, default=64)
+    parser.add_argument("--max-clusters", type=int, default=16)
+    parser.add_argument("--guilds", type=int, default=10000, help="가짜 게이트웨이가 보낼 길드 수")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    shard_counts = [args.shards] if args.shards else range(1, args.max_shards + 1)
+    cluster_counts = [args.clusters] if args.clusters else range(1, args.max_clusters + 1)
+    guild_ids = random_guild_ids(args.guilds, random.Random(args.seed))
+
+    start = time.perf_counter()
+    combos = 0
+    failed = 0
+    for shard_count in shard_counts:
+        guild_shards = Counter(gateway_shards(guild_ids, shard_count))
+        for clusters in cluster_counts:
+            combos += 1
+            problems = check(shard_count, clusters, guild_shards)
+            if problems:
+                failed += 1
+                print(f"[Shards] ❌ 샤드 {shard_count}개 / 클러스터 {clusters}개")
+                for problem in problems[:10]:
+                    print(f"  - {problem}")
+
+    elapsed = time.perf_counter() - start
+    if failed:
+        print(f"[Shards] ❌ {combos}개 조합 중 {failed}개 실패 ({elapsed:.1f}초)")
+        sys.exit(1)
+    print(f"[Shards] ✅ {combos}개 조합에서 길드 {len(guild_ids):,}개가 모두 정확히 한 클러스터에 전달됨 ({elapsed:.1f}초)")
+
+
+if __name__ == "__main__":
+    main()
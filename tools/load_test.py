@@ -0,0 +1,484 @@
+"""
+오프라인 부하 테스트 (가짜 디스코드 상호작용)
+
+디스코드에 접속하지 않고, 봇과 같은 CommandTree 에 cogs/gambling.py · cogs/upgrade.py 를 올린 뒤
+가짜 Interaction 으로 슬래시 커맨드, 버튼, 모달을 실제 경로(tree._call, View._scheduled_task,
+Modal._scheduled_task) 그대로 호출합니다. 유저마다 화면에 떠 있는 View/모달을 기억해 두고
+다음 버튼을 누르는 식으로 여러 유저가 동시에 다음 행동을 반복합니다.
+
+  gamble     : /도박 시작 → 금액 조정 → 게임 시작 → 계속/중단 (돌발 퀘스트 수락/거절)
+  upgrade    : /강화 시작 → (새 유저면 장비 이름 모달) → 강화 진행 → 강화하기 또는 미니게임
+  attendance : /출석, 가끔 /지원금 · /잔액
+  ranking    : /도박 랭킹 또는 /강화 랭킹
+
+명령어별 처리량, p50/p99 지연 시간, 명령어 한 번당 SQL 쿼리 수를 출력합니다.
+유저 행동은 --seed, 게임 결과는 --rng-seed(RNG_SEED)로 정해지므로 두 시드가 같으면 실행 순서가
+섞여도 끝난 뒤의 유저 상태가 같아야 합니다. 마지막에 출력하는 상태 요약값(digest)으로 비교합니다.
+DB는 기본적으로 임시 SQLite 파일이며 --database-url 로 로컬 PostgreSQL 등을 지정할 수 있습니다.
+(지정한 DB에 테이블을 만들고 데이터를 씁니다. 운영 DB를 지정하지 마세요.)
+USER_CACHE_SIZE, SQLITE_PERFORMANCE_MODE 등 다른 설정은 환경 변수로 그대로 바꿀 수 있습니다.
+
+--strict 이면 쿼리 예산(@query_budget)을 넘은 상호작용을 실패로 셉니다. 오류나 예산 초과가 있거나
+--check-ledger 검사에서 잔고 불일치가 나오면 종료 코드 1로 끝나므로 성능 변경의 회귀 검사로 씁니다.
+
+사용법: python -m tools.load_test [--users 1000] [--actions 20] [--concurrency 0] [--seed 1] [--rng-seed N]
+                                  [--mix gamble=5,upgrade=3,attendance=2,ranking=0.2]
+                                  [--latency-ms 0] [--database-url URL] [--strict]
+                                  [--check-ledger] [--json 결과.json]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import traceback
+from typing import Any, Dict, List, Optional
+
+import discord
+from discord.utils import MISSING
+
+BASE_USER_ID = 10 ** 17
+GUILD_ID = 10 ** 16
+
+
+# --- 가짜 디스코드 객체 ---
+
+class FakeUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.name = f"user{user_id - BASE_USER_ID}"
+        self.display_name = self.name
+        self.global_name = self.name
+        self.bot = False
+        self.mention = f"<@{user_id}>"
+
+
+class FakeGuild:
+    """이름 조회(NameResolver)가 REST 호출 없이 끝나도록 멤버를 모두 들고 있는 길드"""
+
+    def __init__(self, members: Dict[int, FakeUser]):
+        self.id = GUILD_ID
+        self.name = "load-test"
+        self.members = members
+
+    def get_member(self, user_id: int) -> Optional[FakeUser]:
+        return self.members.get(user_id)
+
+
+class Screen:
+    """유저 한 명에게 지금 보이는 View/모달"""
+
+    def __init__(self, user: FakeUser, guild: FakeGuild):
+        self.user = user
+        self.guild = guild
+        self.view: Optional[discord.ui.View] = None
+        self.modal: Optional[discord.ui.Modal] = None
+
+
+class FakeResponse:
+    """InteractionResponse 대신 응답을 화면(Screen)에 반영합니다. (latency 만큼 REST 왕복을 흉내)"""
+
+    def __init__(self, interaction: "FakeInteraction"):
+        self._parent = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def _respond(self, view=MISSING, modal=None):
+        if self._done:
+            raise discord.InteractionResponded(self._parent)
+        self._done = True
+        await self._parent.harness.round_trip()
+        self._parent.harness.show(self._parent.screen, view, modal)
+
+    async def send_message(self, content=None, *, view=MISSING, **kwargs):
+        # 새 메시지에 View 가 없으면 기존 화면은 그대로 남음
+        await self._respond(view if view is not None else MISSING)
+
+    async def edit_message(self, *, view=MISSING, **kwargs):
+        await self._respond(view)
+
+    async def defer(self, **kwargs):
+        await self._respond()
+
+    async def send_modal(self, modal):
+        await self._respond(modal=modal)
+
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._parent = interaction
+
+    async def send(self, content=None, *, view=MISSING, **kwargs):
+        await self._parent.harness.round_trip()
+        self._parent.harness.show(self._parent.screen, view if view is not None else MISSING, None)
+
+
+class FakeInteraction:
+    """cogs 와 discord.py 의 CommandTree/View/Modal 이 읽는 속성만 갖춘 Interaction"""
+
+    def __init__(self, harness: "Harness", screen: Screen, type: discord.InteractionType, data: dict):
+        self.harness = harness
+        self.screen = screen
+        self.type = type
+        self.data = data
+        self.user = screen.user
+        self.guild = screen.guild
+        self.guild_id = screen.guild.id
+        self.channel = None
+        self.message = None
+        self.client = harness.bot
+        self._state = None
+        self._cs_command = None
+        self._cs_namespace = None
+        self.command_failed = False
+        self.extras: Dict[str, Any] = {}
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+    @property
+    def command(self):
+        return self._cs_command
+
+    @property
+    def namespace(self):
+        return self._cs_namespace
+
+
+# --- 실행기 ---
+
+class Harness:
+    """가짜 상호작용을 실제 처리 경로로 보내고, 상호작용별 지연 시간과 오류를 모읍니다."""
+
+    def __init__(self, bot, latency: float, strict: bool):
+        from services.metrics import QueryBudgetExceeded
+
+        self.bot = bot
+        self.latency = latency
+        self.strict = strict
+        self.budget_error = QueryBudgetExceeded
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.over_budget: Dict[str, int] = {}
+        self.samples: List[str] = []   # 처음 몇 건의 오류 내용
+        bot.tree.error(self._command_error)
+
+    async def round_trip(self):
+        if self.latency:
+            from services.metrics import command_metrics
+
+            await asyncio.sleep(self.latency)
+            command_metrics.add_http(self.latency)
+
+    def show(self, screen: Screen, view, modal):
+        if modal is not None:
+            modal.on_error = self._ui_error(type(modal).__name__ + ".on_submit")
+            screen.modal = modal
+        elif view is not MISSING:
+            if view is not None:
+                view.on_error = self._ui_error(type(view).__name__)
+            screen.view = view
+
+    # 오류 기록: 명령어/콜백 안의 예외는 discord.py 가 잡아 on_error 로 넘기므로 여기서 셉니다.
+    def _record_error(self, name: str, error: BaseException):
+        self.errors[name] = self.errors.get(name, 0) + 1
+        if len(self.samples) < 5:
+            self.samples.append(f"{name}: " + "".join(traceback.format_exception(error)).rstrip())
+
+    async def _command_error(self, interaction, error):
+        command = interaction.command
+        self._record_error(f"/{command.qualified_name}" if command is not None else "/unknown", error)
+
+    def _ui_error(self, name: str):
+        async def on_error(interaction, error, item=None):
+            self._record_error(name, error)
+        return on_error
+
+    async def _timed(self, name: str, coro):
+        start = time.perf_counter()
+        try:
+            await coro
+        except self.budget_error as e:
+            self.over_budget[name] = self.over_budget.get(name, 0) + 1
+            if len(self.samples) < 5:
+                self.samples.append(str(e))
+        except Exception as e:
+            self._record_error(name, e)
+        finally:
+            self.latencies.setdefault(name, []).append(time.perf_counter() - start)
+
+    async def command(self, screen: Screen, name: str):
+        """슬래시 커맨드 실행 (예: "출석", "도박 시작")"""
+        parts = name.split()
+        data = {"name": parts[0], "type": 1, "options": []}
+        if len(parts) > 1:
+            data["options"] = [{"name": parts[1], "type": 1, "options": []}]
+        interaction = FakeInteraction(self, screen, discord.InteractionType.application_command, data)
+        await self._timed(f"/{name}", self.bot.tree._call(interaction))
+
+    async def click(self, screen: Screen, label: str) -> bool:
+        """화면의 View 에서 label 버튼을 누릅니다. 버튼이 없으면 False."""
+        view = screen.view
+        item = next((c for c in view.children if getattr(c, "label", None) == label), None) if view else None
+        if item is None:
+            return False
+        interaction = FakeInteraction(self, screen, discord.InteractionType.component,
+                                      {"custom_id": item.custom_id, "component_type": 2})
+        callback = getattr(item.callback, "callback", item.callback)
+        name = f"{type(view).__name__}.{getattr(callback, '__name__', type(item).__name__)}"
+        await self._timed(name, view._scheduled_task(item, interaction))
+        return True
+
+    async def submit(self, screen: Screen, values: Dict[str, str]) -> bool:
+        """화면의 모달을 제출합니다. values 는 {TextInput 속성 이름: 입력값}"""
+        modal, screen.modal = screen.modal, None
+        if modal is None:
+            return False
+        components = [
+            {"type": 1, "components": [{"type": 4, "custom_id": getattr(modal, attr).custom_id, "value": value}]}
+            for attr, value in values.items()
+        ]
+        interaction = FakeInteraction(self, screen, discord.InteractionType.modal_submit,
+                                      {"custom_id": modal.custom_id, "components": components})
+        await self._timed(f"{type(modal).__name__}.on_submit", modal._scheduled_task(interaction, components))
+        return True
+
+
+# --- 유저 행동 ---
+
+async def play_gamble(h: Harness, screen: Screen, rng: random.Random):
+    await h.command(screen, "도박 시작")
+    for _ in range(rng.randint(0, 3)):
+        await h.click(screen, "+1000원")
+    await h.click(screen, "게임 시작")
+    if not await h.click(screen, "🎲 게임 시작"):
+        return
+    for _ in range(5):
+        if rng.random() < 0.5:
+            if not await h.click(screen, "계속 (현재 확률 유지)"):
+                break
+        else:
+            await h.click(screen, "중단 (보상 수령)")
+            break
+    # 실패 후 돌발 퀘스트가 뜨면 응답
+    await h.click(screen, rng.choice(("수락", "거절")))
+
+
+async def play_upgrade(h: Harness, screen: Screen, rng: random.Random):
+    await h.command(screen, "강화 시작")
+    if screen.modal is not None:
+        await h.submit(screen, {"name": f"검{rng.randint(1, 999)}"})
+    for _ in range(rng.randint(1, 3)):
+        if not await h.click(screen, "🔨 강화 진행"):
+            return
+        if rng.random() < 0.2 and await h.click(screen, "🎯 미니게임 (확률+3%)"):
+            await h.click(screen, str(rng.randint(1, 5)))
+        elif not await h.click(screen, "🔨 강화하기"):
+            return
+
+
+async def play_attendance(h: Harness, screen: Screen, rng: random.Random):
+    await h.command(screen, "출석")
+    if rng.random() < 0.3:
+        await h.command(screen, "지원금")
+    if rng.random() < 0.2:
+        await h.command(screen, "잔액")
+
+
+async def play_ranking(h: Harness, screen: Screen, rng: random.Random):
+    await h.command(screen, rng.choice(("도박 랭킹", "강화 랭킹")))
+
+
+SCENARIOS = {
+    "gamble": play_gamble,
+    "upgrade": play_upgrade,
+    "attendance": play_attendance,
+    "ranking": play_ranking,
+}
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"알 수 없는 시나리오: {name} (가능: {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+# --- 실행 / 보고 ---
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+async def run(args) -> dict:
+    from discord.ext import commands
+    from services.db import engine, init_db
+    from services.metrics import InstrumentedCommandTree, command_metrics
+    from services.quest import EconomyService
+    from services.rng import game_rng
+
+    await init_db()
+    bot = commands.Bot(command_prefix="!", intents=discord.Intents.none(), tree_cls=InstrumentedCommandTree)
+    await bot.load_extension("cogs.gambling")
+    await bot.load_extension("cogs.upgrade")
+
+    harness = Harness(bot, args.latency_ms / 1000, args.strict)
+    command_metrics.strict = args.strict
+    members = {BASE_USER_ID + i: FakeUser(BASE_USER_ID + i) for i in range(args.users)}
+    guild = FakeGuild(members)
+    names, weights = zip(*args.mix.items())
+    limit = asyncio.Semaphore(args.concurrency) if args.concurrency else None
+
+    async def player(index: int, user: FakeUser):
+        rng = random.Random(args.seed * 1_000_003 + index)
+        screen = Screen(user, guild)
+        for _ in range(args.actions):
+            scenario = SCENARIOS[rng.choices(names, weights)[0]]
+            if limit is None:
+                await scenario(harness, screen, rng)
+            else:
+                async with limit:
+                    await scenario(harness, screen, rng)
+            screen.view = screen.modal = None
+            if args.think_ms:
+                await asyncio.sleep(rng.random() * args.think_ms / 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(player(i, user) for i, user in enumerate(members.values())))
+    elapsed = time.perf_counter() - start
+    # 캐시/ledger 에 남은 쓰기를 반영하는 시간은 처리량에 넣지 않음
+    await EconomyService.get_instance().close()
+
+    queries = command_metrics.queries
+    rows = []
+    for name, values in sorted(harness.latencies.items(), key=lambda item: len(item[1]), reverse=True):
+        values.sort()
+        stats = queries.get(name) or {"total": 0, "max": 0}
+        rows.append({
+            "name": name,
+            "count": len(values),
+            "per_sec": len(values) / elapsed,
+            "p50_ms": percentile(values, 0.5) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "max_ms": values[-1] * 1000,
+            "queries_avg": stats["total"] / len(values),
+            "queries_max": stats["max"],
+            "errors": harness.errors.get(name, 0),
+            "over_budget": harness.over_budget.get(name, 0),
+        })
+    interactions = sum(r["count"] for r in rows)
+    report = {
+        "database": engine.dialect.name,
+        "rng_seed": game_rng.seed,
+        "state_digest": await state_digest(),
+        "users": args.users,
+        "actions": args.users * args.actions,
+        "interactions": interactions,
+        "elapsed": elapsed,
+        "per_sec": interactions / elapsed if elapsed else 0.0,
+        "queries": sum(s["total"] for s in queries.values()),
+        "errors": sum(harness.errors.values()),
+        "over_budget": sum(harness.over_budget.values()),
+        "commands": rows,
+        "samples": harness.samples,
+    }
+    if args.check_ledger:
+        from tools.check_ledger import check
+
+        ledger = await check(10000, 0, False)
+        report["ledger_drift"] = ledger["drift"]
+        report["ledger_chain_breaks"] = ledger["chain_breaks"]
+    await engine.dispose()
+    return report
+
+
+async def state_digest() -> str:
+    """시간과 무관한 유저 상태(잔고, 전적, 장비, 퀘스트)의 해시 - 같은 시드로 다시 실행한 결과 비교용"""
+    from sqlalchemy import select
+    from services.db import AsyncSessionLocal, User, quests_table
+
+    digest = hashlib.sha256()
+    async with AsyncSessionLocal() as session:
+        users = await session.execute(select(
+            User.user_id, User.balance, User.wins, User.losses, User.streak, User.total_gambling_win,
+            User.gear_level, User.max_gear_level, User.gear_name, User.achievements,
+        ).order_by(User.user_id))
+        for row in users:
+            digest.update(repr(tuple(row)).encode())
+        quests = await session.execute(select(
+            quests_table.c.user_id, quests_table.c.quest_type, quests_table.c.target,
+            quests_table.c.current, quests_table.c.reward, quests_table.c.penalty,
+        ).order_by(quests_table.c.user_id, quests_table.c.quest_type))
+        for row in quests:
+            digest.update(repr(tuple(row)).encode())
+    return digest.hexdigest()[:16]
+
+
+def print_report(report: dict):
+    print(f"[LoadTest] {report['database']} · 유저 {report['users']:,}명 · 행동 {report['actions']:,}회 · "
+          f"상호작용 {report['interactions']:,}건 / {report['elapsed']:.2f}초 = {report['per_sec']:,.0f}건/s · "
+          f"쿼리 {report['queries']:,}개 ({report['queries'] / max(report['interactions'], 1):.2f}/건)")
+    print(f"{'상호작용':<36}{'호출':>8}{'건/s':>8}{'p50':>11}{'p99':>11}{'최대':>11} | {'쿼리 평균/최대':>14} | 오류 예산초과")
+    for r in report["commands"]:
+        print(f"{r['name'][:36]:<36}{r['count']:>8,}{r['per_sec']:>8.0f}{r['p50_ms']:>9.1f}ms{r['p99_ms']:>9.1f}ms"
+              f"{r['max_ms']:>9.1f}ms | {r['queries_avg']:>9.2f}/{r['queries_max']:<4} | {r['errors']:>4} {r['over_budget']:>6}")
+    print(f"[LoadTest] 게임 난수 시드 {report['rng_seed']} · 유저 상태 digest {report['state_digest']}")
+    if "ledger_drift" in report:
+        print(f"[LoadTest] ledger 검사: 잔고 불일치 {report['ledger_drift']:,}명, 연쇄 오류 {report['ledger_chain_breaks']:,}건")
+    for sample in report["samples"]:
+        print(f"[LoadTest] ⚠️ {sample}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000, help="동시에 플레이하는 유저 수")
+    parser.add_argument("--actions", type=int, default=20, help="유저당 행동(시나리오) 수")
+    parser.add_argument("--concurrency", type=int, default=0, help="동시에 진행하는 시나리오 수 상한 (0이면 모든 유저 동시)")
+    parser.add_argument("--think-ms", type=float, default=0, help="행동 사이 최대 대기 시간 (무작위)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="응답 한 번마다 흉내 낼 디스코드 REST 왕복 시간")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("gamble=5,upgrade=3,attendance=2,ranking=0.2"),
+                        help="시나리오 비율 (예: gamble=5,upgrade=3,attendance=2,ranking=0.2)")
+    parser.add_argument("--seed", type=int, default=1, help="유저 행동 선택용 난수 시드")
+    parser.add_argument("--rng-seed", type=int, help="게임 결과 난수 시드 (RNG_SEED, 기본: 무작위)")
+    parser.add_argument("--database-url", help="대상 DB (기본: 임시 SQLite 파일)")
+    parser.add_argument("--strict", action="store_true", help="쿼리 예산을 넘은 상호작용을 실패로 처리")
+    parser.add_argument("--check-ledger", action="store_true", help="끝난 뒤 잔고 ↔ ledger 정합성 검사")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+
+    # 설정은 모듈 로드 시점에 읽히므로 서비스를 불러오기 전에 지정
+    tmpdir = None
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(tmpdir.name, 'load_test.db')}"
+    os.environ["METRICS_ENABLED"] = "1"
+    if args.rng_seed is not None:
+        os.environ["RNG_SEED"] = str(args.rng_seed)
+
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    failed = report["errors"] or report["over_budget"] or report.get("ledger_drift") or report.get("ledger_chain_breaks")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
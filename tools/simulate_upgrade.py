@@ -0,0 +1,71 @@
+"""
+강화 밸런스 시뮬레이션 (오프라인)
+
+UpgradeService 의 등급/비용/확률 표를 그대로 사용하여 수많은 강화 궤적을 시뮬레이션하고
+레벨별 기대 시도 횟수·비용, 파괴율, 목표 레벨 도달 분포를 출력합니다.
+
+사용법: python -m tools.simulate_upgrade --target 70 --trials 1000000 [--start 1] [--bonus 0.03] [--seed 42]
+"""
+import argparse
+import time
+import numpy as np
+from services.upgrade_service import UpgradeService
+from services.upgrade_simulation import UpgradeSimulator
+
+
+def fmt_won(value: float) -> str:
+    return f"{value:,.0f}원"
+
+
+def print_report(result: dict, service: UpgradeService, elapsed: float):
+    start, target, trials = result["start"], result["target"], result["trials"]
+    print(f"시뮬레이션: Lv.{start} → Lv.{target} | {trials:,}회 | 보너스 {result['bonus'] * 100:.0f}% | {elapsed:.2f}초")
+    print()
+    print(f"{'레벨':>4} {'등급':<10} {'도달률':>8} {'평균 시도':>12} {'평균 누적 비용':>20} {'파괴 횟수':>10}")
+    for level in range(start + 1, target + 1):
+        reached = result["reached"][level]
+        if reached:
+            attempts = result["attempts_sum"][level] / reached
+            cost = result["cost_sum"][level] / reached
+            attempts_text, cost_text = f"{attempts:,.1f}", fmt_won(cost)
+        else:
+            attempts_text, cost_text = "-", "-"
+        print(f"{level:>4} {service.get_tier_name(level):<10} {reached / trials:>8.2%} "
+              f"{attempts_text:>12} {cost_text:>20} {result['destroy_by_level'][level]:>10,}")
+
+    print()
+    done = result["attempts"]
+    print(f"목표 도달: {done.size:,}회 ({done.size / trials:.2%}) | "
+          f"최대 {result['max_attempts']:,}회 안에 미도달: {result['censored']:,}회")
+    print(f"한 번 이상 파괴된 궤적: {result['destroyed_trials'] / trials:.2%}")
+    if done.size:
+        percentiles = (50, 90, 99)
+        attempts_p = np.percentile(done, percentiles)
+        cost_p = np.percentile(result["cost"], percentiles)
+        print(f"시도 횟수: 평균 {done.mean():,.1f} | " +
+              " | ".join(f"p{p} {v:,.0f}" for p, v in zip(percentiles, attempts_p)))
+        print(f"누적 비용: 평균 {fmt_won(result['cost'].mean())} | " +
+              " | ".join(f"p{p} {fmt_won(v)}" for p, v in zip(percentiles, cost_p)))
+        print(f"파괴 횟수: 평균 {result['destroys'].mean():.3f}회")
+    print("※ 레벨별 평균은 시도 제한 안에 해당 레벨에 처음 도달한 궤적 기준입니다.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start", type=int, default=1)
+    parser.add_argument("--target", type=int, default=70)
+    parser.add_argument("--trials", type=int, default=1_000_000)
+    parser.add_argument("--bonus", type=float, default=0.0, help="미니게임 보너스 확률 (예: 0.03)")
+    parser.add_argument("--max-attempts", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    service = UpgradeService.get_instance()
+    simulator = UpgradeSimulator(service, bonus=args.bonus)
+    started = time.perf_counter()
+    result = simulator.run(args.start, args.target, args.trials, args.max_attempts, seed=args.seed)
+    print_report(result, service, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,17 @@
 import asyncio
-import aiosqlite
-import os
+from services.db import engine
+from services.migrations import LATEST_VERSION, current_version, migrate
 
-DB_PATH = "stella.db"
+# 봇을 실행하지 않고 스키마만 최신 버전으로 올립니다. (봇 시작 시에도 자동 적용)
 
-async def add_column():
-    if not os.path.exists(DB_PATH):
-        print(f"Database not found at {DB_PATH}")
-        return
-
-    try:
-        async with aiosqlite.connect(DB_PATH) as db:
-            # Check if column exists
-            cursor = await db.execute("PRAGMA table_info(users)")
-            columns = await cursor.fetchall()
-            column_names = [col[1] for col in columns]
-            
-            if "active_quest" in column_names:
-                print("Column 'active_quest' already exists.")
-            else:
-                print("Adding 'active_quest' column to 'users' table...")
-                await db.execute("ALTER TABLE users ADD COLUMN active_quest JSON")
-                await db.commit()
-                print("Column added successfully.")
-    except Exception as e:
-        print(f"An error occurred: {e}")
+async def main():
+    before = await current_version(engine)
+    after = await migrate(engine)
+    if before == after:
+        print(f"Schema is up to date (version {after}).")
+    else:
+        print(f"Schema migrated: {before} -> {after} (latest {LATEST_VERSION})")
+    await engine.dispose()
 
 if __name__ == "__main__":
-    asyncio.run(add_column())
+    asyncio.run(main())